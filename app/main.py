@@ -2,13 +2,55 @@ import uasyncio
 import bbl.v7rc as v7rc
 from bbl import ServosController, MotorsController, LEDController, MusicController
 from bbl.v7rc_parser import V7RCParser
+from bbl.mailbox import CommandMailbox
+from bbl import log, diag, latency, profiler, resources
+from bbl.scheduler import Scheduler
+from bbl.smoothing import InputSmoother
+from bbl.mixer import compile_mixes
 
-# Import motor driver configuration
+# Import control loop rates
 try:
-    from bbl.config import MOTOR_DRIVER_TYPE, MOTOR_DRIVER_CONFIG
+    from bbl.config import (SCHED_MAILBOX_HZ, SCHED_SERVO_HZ, SCHED_LED_HZ,
+                            SCHED_MOTOR_PWM_MS, SCHED_MUSIC_SLACK_MS)
 except ImportError:
-    MOTOR_DRIVER_TYPE = 'L298N'
-    MOTOR_DRIVER_CONFIG = {'L298N': {'use_hardware_pwm': False}}
+    SCHED_MAILBOX_HZ = 100
+    SCHED_SERVO_HZ = 50
+    SCHED_LED_HZ = 30
+    SCHED_MOTOR_PWM_MS = 1
+    SCHED_MUSIC_SLACK_MS = 5
+
+try:
+    from bbl.config import INPUT_SMOOTHING
+except ImportError:
+    INPUT_SMOOTHING = 0
+
+# Import pin/LEDC channel priorities
+try:
+    from bbl.config import RESOURCE_PRIORITY, MOTOR_HARDWARE_PWM_AUTO
+except ImportError:
+    RESOURCE_PRIORITY = ('servo1', 'servo2', 'servo3', 'servo4',
+                         'LED1', 'LED2', 'motors', 'BUZZER1', 'BUZZER2')
+    MOTOR_HARDWARE_PWM_AUTO = True
+
+# Import channel mixes (the SS8/SRT presets apply when not overridden)
+try:
+    from bbl.config import MIXES
+except ImportError:
+    MIXES = {}
+
+# Import diagnostics configuration
+try:
+    from bbl.config import UDP_MEASURE
+except ImportError:
+    UDP_MEASURE = False
+try:
+    from bbl.config import LATENCY_PROBE
+except ImportError:
+    LATENCY_PROBE = False
+try:
+    from bbl.config import PROFILER
+except ImportError:
+    PROFILER = False
 
 # Import BLE configuration
 try:
@@ -21,6 +63,11 @@ except ImportError:
     ble_available = False
     print("[main] BLE not available (import failed)")
 
+# Grant pins and LEDC channels before any output is touched
+for note in resources.allocate(RESOURCE_PRIORITY, motor_pwm=MOTOR_HARDWARE_PWM_AUTO):
+    print("[main] Resource conflict:", note)
+diag.register_query(b'RES', lambda arg: resources.report())
+
 # Initialize all controllers
 servos = ServosController()
 motors = MotorsController()
@@ -28,29 +75,137 @@ led1 = LEDController('LED1')
 led2 = LEDController('LED2')  # Second LED group for LE2 command
 music = MusicController('BUZZER1', volume=50)
 
-# Initialize V7RC parser
-parser = V7RCParser(log_func=print)
+# Servo values from packets go through the smoother when it is enabled
+smoother = None
+set_servo_pwm = servos.set_pwm
+if INPUT_SMOOTHING:
+    smoother = InputSmoother(servos, mask=INPUT_SMOOTHING)
+    set_servo_pwm = smoother.target
 
-# Periodic task to update servo stepping and motor PWM
-async def periodic_update():
-    """Update servos and motors at regular intervals"""
-    # Determine if we need to call motor callback
-    driver_config = MOTOR_DRIVER_CONFIG.get(
-        motors.driver_type if hasattr(motors, 'driver_type') else MOTOR_DRIVER_TYPE,
-        {'use_hardware_pwm': False}
-    )
-    use_motor_callback = not driver_config['use_hardware_pwm']
+# Channel mixes, compiled once into integer tables (see bbl.mixer)
+mixes = compile_mixes(MIXES, motors.set_speed, set_servo_pwm)
+ss8_mix = mixes.pop('SS8')
+srt_mix = mixes.pop('SRT')
+
+# Loggers for the packet path (debug calls vanish in optimised builds)
+_log = log.get_logger('v7rc')
+_srv_log = log.get_logger('SRV')
+_ss8_log = log.get_logger('SS8')
+_srt_log = log.get_logger('SRT')
+
+# Initialize V7RC parser (its messages already carry a tag)
+parser = V7RCParser(log_func=log.get_logger('v7rc_parser', prefix=False).warn)
+
+# Control loop: every subsystem runs at its own rate (see bbl.scheduler)
+def setup_scheduler():
+    """Register the control loop subsystems with the scheduler"""
+    sched = Scheduler()
+    sched.add('mailbox', mailbox.apply, period_ms=1000 // SCHED_MAILBOX_HZ,
+              idle=lambda: not mailbox.pending())
     
-    while True:
-        servos.timing_proc()  # Update servo stepping
-        
-        # Only call motor callback for software PWM (L298N/TB6612)
-        if use_motor_callback:
-            motors.motors_period_cb()  # Update motor software PWM
+    # Servo stepping speed is scaled to the rate it is called at
+    servos.set_call_freq(SCHED_SERVO_HZ)
+    if smoother is not None:
+        sched.add('smoothing', smoother.tick, period_ms=1000 // SCHED_SERVO_HZ,
+                  idle=smoother.idle)
+    sched.add('servos', servos.timing_proc, period_ms=1000 // SCHED_SERVO_HZ,
+              idle=servos.idle)
+    
+    # Software PWM is normally stepped by a hardware timer; the control
+    # loop only steps it when the driver has no timer running
+    if motors.driver.needs_tick():
+        sched.add('motor_pwm', motors.driver.tick, period_ms=SCHED_MOTOR_PWM_MS)
+    
+    led_period = 1000 // SCHED_LED_HZ
+    sched.add('led1', led1.timing_proc, period_ms=led_period, idle=led1.idle)
+    sched.add('led2', led2.timing_proc, period_ms=led_period, idle=led2.idle)
+    
+    # Music runs on note boundaries only while a tune is playing
+    sched.add('music', music.timing_proc, period_ms=SCHED_MUSIC_SLACK_MS,
+              idle=music.idle, due=lambda: music.play_interval)
+    return sched
+
+# V7RC command handlers (bound to the command registry below)
+def handle_srv(frame):
+    """SRV: Car mode with basic PWM control for servos C1-C4"""
+    if __debug__:
+        if _srv_log.enabled(log.DEBUG):
+            _srv_log.debug("PWM: %s", list(frame[:4]))
+    for i in range(4):
+        if frame[i] > 0:  # Only update non-zero values
+            set_servo_pwm(i + 1, frame[i])
+
+def handle_sr2(frame):
+    """SR2: Second PWM group (C5-C8) - not supported"""
+    _log.warn("SR2: Only 4 servos supported (C1-C4). SR2 command ignored.")
+
+def handle_ss8(frame):
+    """
+    SS8: Pro + BOT + BOT2 mode with Simplified 8-channel PWM
+    First 4 channels → servos, channels 5-6 → motors
+    """
+    if __debug__:
+        if _ss8_log.enabled(log.DEBUG):
+            _ss8_log.debug("PWM: %s", list(frame[:8]))
+    
+    # Servos from channels 1-4, motor speeds from channels 5-6 with a
+    # deadzone around neutral (MIXES['SS8'] or the built-in preset)
+    ss8_mix.apply(frame)
+
+def handle_srt(frame):
+    """SRT: Tank mode with PWM (CH1 = throttle, CH2 = steering)"""
+    if __debug__:
+        if _srt_log.enabled(log.DEBUG):
+            _srt_log.debug("Throttle: %d, Steering: %d", frame[0], frame[1])
+    
+    # Tank mixing (motors stop when both sticks are at 1500 ± 50), servos
+    # C3-C4 from channels 3-4 (MIXES['SRT'] or the built-in preset)
+    srt_mix.apply(frame)
+
+def make_led_handler(led, led_log):
+    """
+    LED/LE2: 4 LED control with RGBM format, bound to one LED group
+    
+    Each LED in the frame is 4 values: R, G, B (0-255) and the mode nibble
+    (0 = off, 1-9 = blink M×100ms, A-F = solid).
+    """
+    def handle_led(frame):
+        if __debug__:
+            if led_log.enabled(log.DEBUG):
+                led_log.debug("LEDs: %s", list(frame))
         
-        led1.timing_proc()  # Update LED1 effects
-        led2.timing_proc()  # Update LED2 effects
-        await uasyncio.sleep_ms(10)  # 100Hz update rate
+        # Each LED keeps its own effect; the next LED tick renders all four
+        # into one buffer and writes the strip once
+        for i in range(4):
+            base = i * 4
+            mode = frame[base + 3]
+            rgb = (frame[base] << 16) | (frame[base + 1] << 8) | frame[base + 2]
+            
+            if mode == 0:
+                led.set_pixel_effect(i, 0, 0, 0x000000)
+            elif mode < 10:
+                # Blink: M×100ms on, same time off
+                led.set_pixel_effect(i, 1, mode * 200, rgb)
+            else:
+                led.set_pixel_effect(i, 0, 0, rgb)
+    return handle_led
+
+parser.registry.set_handler(b'SRV', handle_srv)
+parser.registry.set_handler(b'SR2', handle_sr2)
+parser.registry.set_handler(b'SS8', handle_ss8)
+parser.registry.set_handler(b'SRT', handle_srt)
+parser.registry.set_handler(b'LED', make_led_handler(led1, log.get_logger('LED')))
+parser.registry.set_handler(b'LE2', make_led_handler(led2, log.get_logger('LE2')))
+
+# Further mixes from the config take over their command
+for name, mix in mixes.items():
+    parser.registry.set_handler(name.encode(), mix.apply)
+
+# Received frames wait here until the next mailbox tick of the scheduler
+mailbox = CommandMailbox(parser)
+
+scheduler = setup_scheduler()
+diag.register_query(b'SCH', lambda arg: scheduler.report())
 
 # V7RC command handler
 def handle_v7rc_command(msg, addr):
@@ -64,151 +219,17 @@ def handle_v7rc_command(msg, addr):
     - SRT: Tank mode PWM
     - LED: 4 LED control with RGBM format
     - LE2: Second LED group
-    """
-    print(f"[v7rc] UDP received: {msg} from {addr}")
-    
-    # Parse V7RC command
-    result = parser.parse(msg)
-    if not result:
-        return
-    
-    cmd_type = result['type']
-    data = result['data']
+    - ?xxx: Diagnostic query, the reply is sent back (see bbl.diag)
     
-    try:
-        if cmd_type == 'SRV':
-            # SRV: Car mode with basic PWM control for servos C1-C4
-            pwm_values = data['pwm']
-            print(f"[SRV] PWM: {pwm_values}")
-            for i in range(min(4, len(pwm_values))):
-                if pwm_values[i] > 0:  # Only update non-zero values
-                    servos.set_pwm(i + 1, pwm_values[i])
-        
-        elif cmd_type == 'SR2':
-            # SR2: Second PWM group (C5-C8) - not supported
-            print("[SR2] Warning: Only 4 servos supported (C1-C4). SR2 command ignored.")
-        
-        elif cmd_type == 'SS8':
-            # SS8: Pro + BOT + BOT2 mode with Simplified 8-channel PWM
-            # First 4 channels → servos, channels 5-6 → motors
-            pwm_values = data['pwm']
-            print(f"[SS8] PWM: {pwm_values}")
-            
-            # Control servos (channels 1-4)
-            for i in range(min(4, len(pwm_values))):
-                if pwm_values[i] > 0:
-                    servos.set_pwm(i + 1, pwm_values[i])
-            
-            # Control motors with channels 5-6
-            if len(pwm_values) >= 6:
-                # Map PWM 0-2550 to motor speed -2048 to +2048
-                # 1275 is neutral (center)
-                motor1_speed = int((pwm_values[4] - 1275) * 2048 / 1275)
-                motor2_speed = int((pwm_values[5] - 1275) * 2048 / 1275)
-                
-                # Clamp to valid range
-                motor1_speed = max(-2048, min(2048, motor1_speed))
-                motor2_speed = max(-2048, min(2048, motor2_speed))
-                
-                # Apply deadzone for neutral position
-                # SS8 neutral: 0x96 (150) → 1500 PWM → speed = 361
-                # Deadzone 380 catches neutral (361) but allows control at ~400+
-                # This is ~18.5% deadzone - good balance between idle stop and sensitivity
-                DEADZONE = 380
-                if abs(motor1_speed) < DEADZONE:
-                    motor1_speed = 0
-                if abs(motor2_speed) < DEADZONE:
-                    motor2_speed = 0
-                
-                motors.set_speed(1, motor1_speed)
-                motors.set_speed(2, motor2_speed)
-                print(f"[SS8] Motor speeds: M1={motor1_speed}, M2={motor2_speed}")
-        
-        elif cmd_type == 'SRT':
-            # SRT: Tank mode with PWM
-            throttle = data['throttle']
-            steering = data['steering']
-            print(f"[SRT] Throttle: {throttle}, Steering: {steering}")
-            
-            # Check if in neutral position (1500 ± 50)
-            # If both throttle and steering are neutral, stop motors
-            NEUTRAL = 1500
-            DEADZONE = 50
-            
-            if abs(throttle - NEUTRAL) < DEADZONE and abs(steering - NEUTRAL) < DEADZONE:
-                # Neutral position - stop motors
-                motors.stop(1)
-                motors.stop(2)
-                print("[SRT] Neutral - motors stopped")
-            else:
-                # Active control - use tank mode
-                motors.set_tank_mode(throttle, steering)
-            
-            # Also control servos C3-C4 if provided
-            pwm_values = data['pwm']
-            if len(pwm_values) >= 4:
-                for i in range(2, 4):
-                    if pwm_values[i] > 0:
-                        servos.set_pwm(i + 1, pwm_values[i])
-        
-        elif cmd_type == 'LED':
-            # LED: 4 LED control with RGBM format
-            leds = data['leds']
-            print(f"[LED] LEDs: {leds}")
-            
-            # Group LEDs by (color, mode, blink_ms) to apply effects efficiently
-            # This prevents each LED from overwriting the previous one
-            led_groups = {}
-            for i, led_data in enumerate(leds):
-                key = (led_data['r'], led_data['g'], led_data['b'], 
-                       led_data['mode'], led_data['blink_ms'])
-                if key not in led_groups:
-                    led_groups[key] = []
-                led_groups[key].append(i)
-            
-            # Apply effect for each group
-            for (r, g, b, mode, blink_ms), led_indices in led_groups.items():
-                # Create bitmask for all LEDs in this group
-                led_mask = sum(1 << idx for idx in led_indices)
-                rgb = (r << 16) | (g << 8) | b
-                
-                if mode == 'off':
-                    led1.set_led_effect(0, 0, 1, led_mask, 0x000000)
-                elif mode == 'solid':
-                    led1.set_led_effect(0, 0, 0xFF, led_mask, rgb)
-                elif mode == 'blink':
-                    duration = blink_ms * 2 if blink_ms > 0 else 1000
-                    led1.set_led_effect(1, duration, 0xFF, led_mask, rgb)
-        
-        elif cmd_type == 'LE2':
-            # LE2: Second LED group
-            leds = data['leds']
-            print(f"[LE2] LEDs: {leds}")
-            
-            # Group LEDs by (color, mode, blink_ms) to apply effects efficiently
-            led_groups = {}
-            for i, led_data in enumerate(leds):
-                key = (led_data['r'], led_data['g'], led_data['b'], 
-                       led_data['mode'], led_data['blink_ms'])
-                if key not in led_groups:
-                    led_groups[key] = []
-                led_groups[key].append(i)
-            
-            # Apply effect for each group
-            for (r, g, b, mode, blink_ms), led_indices in led_groups.items():
-                led_mask = sum(1 << idx for idx in led_indices)
-                rgb = (r << 16) | (g << 8) | b
-                
-                if mode == 'off':
-                    led2.set_led_effect(0, 0, 1, led_mask, 0x000000)
-                elif mode == 'solid':
-                    led2.set_led_effect(0, 0, 0xFF, led_mask, rgb)
-                elif mode == 'blink':
-                    duration = blink_ms * 2 if blink_ms > 0 else 1000
-                    led2.set_led_effect(1, duration, 0xFF, led_mask, rgb)
-        
-    except Exception as e:
-        print(f"[v7rc] Handler error: {e}")
+    Frames are only decoded here; the scheduler's mailbox task applies the
+    newest frame of each command type once per tick (see mailbox.stats()).
+    """
+    if __debug__:
+        if _log.enabled(log.DEBUG):
+            _log.debug("UDP received: %s from %s", bytes(msg), addr)
+    if msg and msg[0] == diag.QUERY:
+        return diag.answer(msg)
+    mailbox.post(msg, addr)
 
 # Initialize WiFi if enabled
 start = None
@@ -219,7 +240,8 @@ if CONNECTION_MODE in ['WIFI', 'BOTH']:
         udp_ip='192.168.4.1',
         udp_port=6188,
         use_default_led=True,  # Enable built-in LED (GPIO 8)
-        cb=handle_v7rc_command
+        cb=handle_v7rc_command,
+        measure_udp=UDP_MEASURE
     )
     print(f"[main] WiFi AP initialized")
 
@@ -229,26 +251,36 @@ if BLE_ENABLED and ble_available and CONNECTION_MODE in ['BLE', 'BOTH']:
     try:
         ble_service = BLEService(
             name=BLE_DEVICE_NAME,
-            callback=handle_v7rc_command  # Reuse same V7RC handler!
+            callback=handle_v7rc_command,  # Reuse same V7RC handler!
+            prefixes=parser.registry.prefixes() + diag.prefixes()
         )
         print(f"[main] BLE initialized: {BLE_DEVICE_NAME}")
     except Exception as e:
         print(f"[main] BLE init failed: {e}")
         ble_service = None
 
+# Latency instrumentation (no cost unless enabled)
+if LATENCY_PROBE:
+    latency.enable(mailbox, udp_server=v7rc.udp_server, ble=ble_service)
+    print("[main] Latency probe enabled")
+if PROFILER:
+    profiler.enable(scheduler, parser.registry)
+    print("[main] Control loop profiler enabled")
+
 # Main async function
 async def main():
     """Run V7RC server and periodic updates"""
-    tasks = [periodic_update()]
+    tasks = [scheduler.run(), log.drain_task()]
     
     # Add WiFi task if enabled
     if start is not None:
         tasks.append(start())
         print("[main] WiFi task added")
     
-    # BLE runs in background via IRQ, no task needed
+    # BLE frames are queued by the IRQ and applied by this task
     if ble_service is not None:
-        print("[main] BLE running in background")
+        tasks.append(ble_service.run())
+        print("[main] BLE task added")
     
     # Print active connection modes
     active_modes = []
@@ -5,11 +5,34 @@ CyberBrick V7RC Controller
 
 Provides BLE connectivity for V7RC commands using standard BLE UART service UUIDs.
 Compatible with generic BLE UART terminal apps.
+
+GATT writes are not processed in the Bluetooth IRQ: the handler only
+cuts the written bytes into 20-byte frames (V7RCFramer, so writes may
+carry several frames or fragments of one), copies them into a
+preallocated ring buffer and signals a ThreadSafeFlag. The run() task
+hands the frames to the callback from asyncio, so the NimBLE stack is
+never blocked and controllers are only touched from the event loop.
+Connects and disconnects are only counted in the IRQ; run() logs them,
+so the IRQ never writes into the bbl.log ring.
 """
 
 import bluetooth
 from micropython import const
 import struct
+import utime
+import uasyncio
+from array import array
+from bbl.log import get_logger
+from bbl.v7rc_framer import V7RCFramer
+from bbl import v7rc_parser
+
+try:
+    from bbl.config import BLE_RING_SLOTS, BLE_RX_BUFFER
+except ImportError:
+    BLE_RING_SLOTS = 8
+    BLE_RX_BUFFER = 240
+
+_log = get_logger('ble')
 
 # BLE Events
 _IRQ_CENTRAL_CONNECT = const(1)
@@ -29,6 +52,12 @@ _FLAG_WRITE = const(0x0008)
 _FLAG_NOTIFY = const(0x0010)
 _FLAG_WRITE_NO_RESPONSE = const(0x0004)
 
+_FRAME_LEN = const(20)
+
+# We don't have direct access to the client address in the WRITE event,
+# so callbacks get a placeholder
+_BLE_ADDR = ("BLE", 0)
+
 
 class BLEService:
     """
@@ -42,18 +71,25 @@ class BLEService:
         ...     print(f"Received: {data}")
         >>> 
         >>> ble = BLEService(name="CyberBrick", callback=command_handler)
-        >>> # BLE service runs in background via IRQ
+        >>> # Frames are delivered by the consumer task
+        >>> uasyncio.create_task(ble.run())
     """
     
-    def __init__(self, name="Cyber_V7RC", callback=None):
+    def __init__(self, name="Cyber_V7RC", callback=None, ring_slots=BLE_RING_SLOTS,
+                 prefixes=None):
         """
         Initialize BLE GATT service
         
         Args:
             name (str): BLE device name for advertising
             callback (function): Callback(data, addr) when V7RC command received
-                - data: bytes, V7RC command (20 bytes)
+                - data: memoryview, V7RC command (20 bytes), valid until
+                  the callback returns
                 - addr: tuple, BLE client address (for logging)
+                A returned bytes value is sent back as notifications.
+            ring_slots (int): Frames buffered between the IRQ and run()
+            prefixes (list, optional): Packed command prefixes the framer
+                accepts (default: the parser's built-in registry)
         """
         self.name = name
         self.callback = callback
@@ -61,6 +97,28 @@ class BLEService:
         self._rx_handle = None
         self._tx_handle = None
         
+        # IRQ -> asyncio ring buffer (single producer, single consumer:
+        # the IRQ only moves _head, run() only moves _tail)
+        self._slots = ring_slots
+        self._ring = bytearray(ring_slots * _FRAME_LEN)
+        self._ring_mv = memoryview(self._ring)
+        self._ring_ts = array('L', [0] * ring_slots)  # ticks_us at IRQ
+        self._head = 0
+        self._tail = 0
+        self._flag = uasyncio.ThreadSafeFlag()
+        
+        # Connection events: counted by the IRQ, logged by run()
+        self.connects = 0
+        self.disconnects = 0
+        self._logged_connects = 0
+        self._logged_disconnects = 0
+        self._peer = bytearray(6)
+        
+        if prefixes is None:
+            prefixes = v7rc_parser.registry.prefixes()
+        self._framer = V7RCFramer(prefixes, self._enqueue)
+        self.reset_stats()
+        
         # Initialize BLE
         self.ble = bluetooth.BLE()
         self.ble.active(True)
@@ -98,6 +156,13 @@ class BLEService:
         services = (NUS,)
         ((self._rx_handle, self._tx_handle),) = self.ble.gatts_register_services(services)
         
+        # Default RX buffer is 20 bytes; allow multi-frame writes
+        self.ble.gatts_set_buffer(self._rx_handle, BLE_RX_BUFFER)
+        try:
+            self.ble.config(mtu=BLE_RX_BUFFER + 3)
+        except Exception:
+            pass  # Port without MTU configuration
+        
         print("[ble] GATT services registered")
     
     def _advertise(self, interval_us=500000):
@@ -118,7 +183,9 @@ class BLEService:
         adv_data.extend(struct.pack('BB', len(name_bytes) + 1, 0x09))
         adv_data.extend(name_bytes)
         
-        # Start advertising
+        # Start advertising (the IRQ restarts it with the same payload)
+        self._adv_interval_us = interval_us
+        self._adv_data = adv_data
         self.ble.gap_advertise(interval_us, adv_data=adv_data)
         print(f"[ble] Advertising as '{self.name}'")
     
@@ -132,21 +199,25 @@ class BLEService:
         - GATTS_WRITE: Client wrote data to RX characteristic
         """
         if event == _IRQ_CENTRAL_CONNECT:
-            # Client connected
+            # Client connected (logged by run())
             conn_handle, addr_type, addr = data
             self._conn_handle = conn_handle
-            addr_str = ':'.join(['%02X' % b for b in bytes(addr)])
-            print(f"[ble] Connected: {addr_str}")
+            self._framer.reset()
+            self._peer[:] = addr
+            self.connects += 1
+            self._flag.set()
         
         elif event == _IRQ_CENTRAL_DISCONNECT:
-            # Client disconnected
+            # Client disconnected (logged by run())
             conn_handle, addr_type, addr = data
             self._conn_handle = None
-            addr_str = ':'.join(['%02X' % b for b in bytes(addr)])
-            print(f"[ble] Disconnected: {addr_str}")
+            self._framer.reset()
+            self._peer[:] = addr
+            self.disconnects += 1
+            self._flag.set()
             
             # Restart advertising
-            self._advertise()
+            self.ble.gap_advertise(self._adv_interval_us, adv_data=self._adv_data)
         
         elif event == _IRQ_GATTS_WRITE:
             # Client wrote data
@@ -156,19 +227,111 @@ class BLEService:
                 # Read data from RX characteristic
                 data = self.ble.gatts_read(self._rx_handle)
                 
-                # Get client address for logging
-                # Note: We don't have direct access to addr in WRITE event,
-                # so we'll use a placeholder
-                addr = ("BLE", 0)  # Placeholder address
-                
-                # Call callback with V7RC command
-                if self.callback and len(data) == 20:
+                # Any length: whole frames, several frames or fragments
+                self._framer.feed(data)
+    
+    def _enqueue(self, frame):
+        # Framer callback (IRQ context): queue the frame for run(),
+        # drop it if the ring is full
+        head = self._head
+        nxt = head + 1 if head + 1 < self._slots else 0
+        if nxt == self._tail:
+            self.overflows += 1
+            return
+        pos = head * _FRAME_LEN
+        self._ring[pos:pos + _FRAME_LEN] = frame
+        self._ring_ts[head] = utime.ticks_us()
+        self._head = nxt
+        self._flag.set()
+    
+    async def run(self):
+        """
+        Consumer task: deliver queued frames to the callback
+        
+        Parsing and actuation happen here, in asyncio context, instead of
+        inside the Bluetooth IRQ.
+        """
+        ring = self._ring_mv
+        ring_ts = self._ring_ts
+        while True:
+            await self._flag.wait()
+            if (self.connects != self._logged_connects
+                    or self.disconnects != self._logged_disconnects):
+                self._log_events()
+            while self._tail != self._head:
+                tail = self._tail
+                pos = tail * _FRAME_LEN
+                if self.callback:
                     try:
-                        self.callback(data, addr)
+                        ret = self.callback(ring[pos:pos + _FRAME_LEN], _BLE_ADDR)
+                        if ret:
+                            # Reply (e.g. diagnostic query) in 20-byte notifications
+                            for i in range(0, len(ret), _FRAME_LEN):
+                                self.send(ret[i:i + _FRAME_LEN])
                     except Exception as e:
-                        print(f"[ble] Callback error: {e}")
-                elif len(data) != 20:
-                    print(f"[ble] Invalid data length: {len(data)}, expected 20")
+                        _log.error("Callback error: %s", e)
+                
+                latency = utime.ticks_diff(utime.ticks_us(), ring_ts[tail])
+                self.frames += 1
+                self.post_sum_us += latency
+                if latency > self.post_max_us:
+                    self.post_max_us = latency
+                self._tail = tail + 1 if tail + 1 < self._slots else 0
+    
+    def _log_events(self):
+        # Connection events counted by the IRQ since the last call
+        addr_str = ':'.join(['%02X' % b for b in self._peer])
+        connects = self.connects
+        if connects != self._logged_connects:
+            self._logged_connects = connects
+            _log.info("Connected: %s", addr_str)
+        disconnects = self.disconnects
+        if disconnects != self._logged_disconnects:
+            self._logged_disconnects = disconnects
+            _log.info("Disconnected: %s", addr_str)
+    
+    def rx_ticks_us(self):
+        """
+        IRQ timestamp (ticks_us) of the frame currently being delivered
+        to the callback, for latency measurements
+        """
+        return self._ring_ts[self._tail]
+    
+    def stats(self):
+        """
+        Ring statistics, to size the ring buffer
+
+        The times run from the IRQ to the return of the callback. In
+        app/main.py the callback posts to the command mailbox, so they
+        cover the wait in the ring but not the wait in the mailbox or the
+        handler; bbl.latency measures the whole way to the pins.
+        
+        Returns:
+            dict: {
+                'frames': frames delivered to the callback,
+                'overflows': frames dropped because the ring was full,
+                'dropped_bytes': bytes discarded by the framer while
+                    resynchronizing,
+                'irq_to_post_avg_us': mean IRQ-to-callback-return time,
+                'irq_to_post_max_us': worst IRQ-to-callback-return time
+            }
+        """
+        return {
+            'frames': self.frames,
+            'overflows': self.overflows,
+            'dropped_bytes': self._framer.dropped,
+            'irq_to_post_avg_us': self.post_sum_us // self.frames if self.frames else 0,
+            'irq_to_post_max_us': self.post_max_us,
+        }
+    
+    def reset_stats(self):
+        """Clears the ring statistics"""
+        self.frames = 0
+        self.overflows = 0
+        self.post_sum_us = 0
+        self.post_max_us = 0
+        self._framer.dropped = 0
+        self._framer.resyncs = 0
     
     def send(self, data):
         """
@@ -187,7 +350,7 @@ class BLEService:
             self.ble.gatts_notify(self._conn_handle, self._tx_handle, data)
             return True
         except Exception as e:
-            print(f"[ble] Send error: {e}")
+            _log.warn("Send error: %s", e)
             return False
     
     def is_connected(self):
@@ -1,10 +1,14 @@
 # -*- coding:utf-8 -*-
 from machine import Pin, PWM
 import utime
+from bbl import resources
+from bbl.log import get_logger
 
 BUZZER_CHANNEL1 = 21
 BUZZER_CHANNEL2 = 20
 
+_log = get_logger('buzzer')
+
 
 class BuzzerController:
     """
@@ -65,7 +69,7 @@ class BuzzerController:
         if self.ch not in self.buzzer_pins_map:
             raise ValueError("Invalid BUZZER channel")
 
-        self.buzzer = PWM(Pin(self.buzzer_pins_map[self.ch], Pin.OUT))
+        self.buzzer = self._open()
         self.set_duty(duty)
         self.set_freq(freq)
 
@@ -128,8 +132,16 @@ class BuzzerController:
             >>> buzzer.reinit(freq=1000, duty=512)
         """
         self.buzzer.deinit()
-        self.buzzer = PWM(Pin(self.buzzer_pins_map[self.ch], Pin.OUT),
-                          freq=freq, duty=duty)
+        self.buzzer = self._open(freq=freq, duty=duty)
+
+    def _open(self, **kwargs):
+        # PWM on the buzzer pin, or a silent stand-in if bbl.resources
+        # gave the pin (shared with an LED port) or the channel away
+        gpio = self.buzzer_pins_map[self.ch]
+        if resources.acquire(self.ch, (gpio,)) != resources.PWM:
+            _log.error("%s disabled: no PWM on GPIO %d, see ?RES", self.ch, gpio)
+            return resources.NullPWM()
+        return PWM(Pin(gpio, Pin.OUT), **kwargs)
 
     def deinit(self):
         """
@@ -321,6 +333,16 @@ class MusicController:
                 utime.sleep(msec * 0.001)
             self.buzzer.stop()
 
+    def idle(self):
+        """
+        Returns True when no tune is playing (timing_proc has nothing to do).
+
+        Example:
+            >>> music.idle()
+            True
+        """
+        return not self.is_playing
+
     def timing_proc(self):
         """
         A callback method to periodically check and \
@@ -334,7 +356,7 @@ class MusicController:
         """
         if self.is_playing:
             current_time = utime.ticks_ms()
-            if current_time >= self.play_interval:
+            if utime.ticks_diff(current_time, self.play_interval) >= 0:
 
                 if self.tune_index >= len(self.tune):
                     if self.loop:
@@ -358,7 +380,7 @@ class MusicController:
                 else:
                     self.buzzer.stop()
 
-                self.play_interval = current_time + msec  # 设置下一个音符的播放时间
+                self.play_interval = utime.ticks_add(current_time, int(msec))  # 设置下一个音符的播放时间
                 self.tune_index += 1
 
 
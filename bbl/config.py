@@ -31,6 +31,7 @@ MOTOR_DRIVER_CONFIG = {
         'logic_type': 'digital',
         'stop_state': 'high',  # Both pins HIGH to stop
         'pwm_period': 100,  # Increased from 20 to 100 for smoother control
+        'pwm_carrier_hz': 50,  # Software PWM carrier (timer runs at carrier * period)
         'description': 'L298N Dual H-Bridge (software PWM control)'
     },
     'TB6612': {
@@ -39,6 +40,7 @@ MOTOR_DRIVER_CONFIG = {
         'logic_type': 'digital',
         'stop_state': 'high',  # Both pins HIGH to stop
         'pwm_period': 100,  # Increased from 20 to 100 for smoother control
+        'pwm_carrier_hz': 50,  # Software PWM carrier (timer runs at carrier * period)
         'description': 'TB6612FNG Dual H-Bridge (software PWM control)'
     },
     'L9110S': {
@@ -47,14 +49,98 @@ MOTOR_DRIVER_CONFIG = {
         'logic_type': 'pwm',
         'stop_state': 'low',  # Both pins LOW to stop
         'pwm_period': 100,  # Higher resolution software PWM (100 steps vs 20)
+        'pwm_carrier_hz': 50,  # Software PWM carrier (timer runs at carrier * period)
         'description': 'L9110S Dual H-Bridge (software PWM control)'
     }
 }
 
+# Speed resolution: speeds are looked up in calibrated duty tables with
+# one entry per table step (bbl.motor_drivers.speed_shift()). The step
+# follows the duty range: 8 for software PWM (up to 256 duty steps, 4 KB
+# of tables), 2 for hardware PWM so all 1023 duty levels are reachable
+# (16 KB of tables).
+
 # Software PWM settings
 SOFTWARE_PWM_PERIOD = 20  # Default for L298N/TB6612
 L9110S_PWM_PERIOD = 100   # Higher resolution for L9110S
 
+# Software PWM carrier (Hz) for drivers without 'pwm_carrier_hz'.
+# The timer callback runs carrier * pwm_period times per second
+# (50 Hz * 100 steps = 5 kHz); lower pwm_period to trade resolution
+# for CPU time.
+SOFTWARE_PWM_CARRIER_HZ = 50
+SOFTWARE_PWM_USE_TIMER = True  # False: step from the control loop scheduler
+SOFTWARE_PWM_TIMER_ID = 0      # machine.Timer used for the carrier
+# GPIO peripheral base for batched W1TS/W1TC register writes
+# (0x60004000 on ESP32-C3, 0x3FF44000 on ESP32); None = Pin.value()
+SOFTWARE_PWM_GPIO_BASE = 0x60004000
+
+# ============================================================================
+# Control Loop Scheduling
+# ============================================================================
+
+# Rates of the control loop subsystems (see bbl.scheduler). Each runs on
+# its own absolute deadline; idle subsystems are skipped.
+SCHED_MAILBOX_HZ = 100   # Apply received V7RC frames
+SCHED_SERVO_HZ = 50      # Servo stepping (one update per servo frame)
+SCHED_LED_HZ = 30        # LED blink/breathing effects
+SCHED_MOTOR_PWM_MS = 1   # Software PWM step when no hardware timer runs it
+SCHED_MUSIC_SLACK_MS = 5 # Music runs on note boundaries; later is an overrun
+
+# ============================================================================
+# LEDs
+# ============================================================================
+
+# Breathing brightness curve: 1.0 is the plain sine, about 2.2 makes the
+# fade look even to the eye (more time spent dim)
+LED_BREATH_GAMMA = 1.0
+
+# ============================================================================
+# Servo Input Smoothing
+# ============================================================================
+
+# Servos whose SRV/SS8/SRT values are interpolated between packets instead
+# of jumping (bit 0 = servo 1 ... bit 3 = servo 4, 0 = off); see
+# bbl.smoothing
+INPUT_SMOOTHING = 0
+SMOOTH_MAX_LAG_MS = 100    # Longest ramp, bounds the added lag
+SMOOTH_EXTRAPOLATE_MS = 0  # Keep moving this long past a late packet
+
+# ============================================================================
+# Channel Mixing
+# ============================================================================
+
+# Channel mixes per V7RC command (see bbl.mixer). SS8 and SRT use the
+# built-in presets (bbl.mixer.PRESETS) unless they are listed here; other
+# commands listed here are handled by their mix. Example: arcade steering
+# on SS8 channels 5-6 with a 30% expo on the throttle
+# MIXES = {
+#     'SS8': {
+#         'servos': ((0, 1), (1, 2), (2, 3), (3, 4)),
+#         'inputs': ({'ch': 4, 'center': 1275, 'span': 1275, 'expo': 30},
+#                    {'ch': 5, 'center': 1275, 'span': 1275}),
+#         'outputs': ({'motor': 1, 'mix': (1, 0.5), 'deadzone': 380},
+#                     {'motor': 2, 'mix': (1, -0.5), 'deadzone': 380}),
+#     },
+# }
+MIXES = {}
+
+# ============================================================================
+# Pins and LEDC Channels
+# ============================================================================
+
+# Boot-time grant order of the shared pins and the 6 LEDC channels (see
+# bbl.resources), highest priority first. GPIO 21/20 carry either LED1/2
+# (NeoPixel) or BUZZER1/2 (PWM): the device listed first gets the pin and
+# the other one is reported and disabled. Drop servos that are not fitted
+# to leave their channels to the motors.
+RESOURCE_PRIORITY = ('servo1', 'servo2', 'servo3', 'servo4',
+                     'LED1', 'LED2', 'motors', 'BUZZER1', 'BUZZER2')
+# Motors take hardware PWM when four channels are left after the devices
+# above them, otherwise software PWM. False: the driver's use_hardware_pwm
+# decides, with the channels the other devices left
+MOTOR_HARDWARE_PWM_AUTO = True
+
 # ============================================================================
 # BLE (Bluetooth Low Energy) Configuration
 # ============================================================================
@@ -83,3 +169,48 @@ CONNECTION_MODE = 'BOTH'
 BLE_SERVICE_UUID = "6E400001-B5A3-F393-E0A9-E50E24DCCA9E"
 BLE_RX_UUID = "6E400002-B5A3-F393-E0A9-E50E24DCCA9E"  # Write (RX from client)
 BLE_TX_UUID = "6E400003-B5A3-F393-E0A9-E50E24DCCA9E"  # Notify (TX to client)
+
+# Frames buffered between the BLE IRQ and the asyncio consumer task.
+# Increase if BLEService.stats() reports overflows.
+BLE_RING_SLOTS = 8
+
+# Largest single GATT write accepted on the RX characteristic (bytes).
+# Clients with a larger MTU can pack several 20-byte frames into one write.
+BLE_RX_BUFFER = 240
+
+# ============================================================================
+# Logging Configuration
+# ============================================================================
+
+# Minimum log level: 'DEBUG', 'INFO', 'WARN', 'ERROR' or 'OFF'
+# DEBUG prints every received packet (only in builds that keep debug code,
+# see _STRIP_DEBUG_LOGS in boot.py)
+LOG_LEVEL = 'INFO'
+
+# Ring buffer for queued log text (bytes); messages that don't fit are dropped
+LOG_BUFFER_SIZE = 1024
+
+# Minimum interval between two messages with the same tag (0 = no limit)
+LOG_RATE_LIMIT_MS = 1000
+
+# Console drain: at most LOG_DRAIN_CHUNK bytes every LOG_DRAIN_INTERVAL_MS
+LOG_DRAIN_INTERVAL_MS = 20
+LOG_DRAIN_CHUNK = 64
+
+# ============================================================================
+# Diagnostics
+# ============================================================================
+
+# UDP server measurement mode: logs loop iterations/s, packets/s and the
+# fraction of time the receive task is idle (see v7rc.udp_server.report())
+UDP_MEASURE = False
+
+# Packet-to-pin latency histograms per command type and transport
+# (see bbl.latency; query remotely with '?LAT' or latency.print_report())
+LATENCY_PROBE = False
+
+# Control loop CPU profiler: per-task / per-handler timing and ticks over
+# budget (see bbl.profiler; query remotely with '?PRF' or
+# profiler.print_report())
+PROFILER = False
+PROFILE_BUDGET_US = 2000  # A scheduler pass longer than this is flagged
@@ -1,46 +1,242 @@
 #https://github.com/perbu/dgram/blob/master/dgram.py
-import uselect
 import usocket
 import uasyncio
+import utime
+from uasyncio import core
+from array import array
+from bbl.log import get_logger
+
+_log = get_logger('dgram')
+
+_MAX_SOURCES = 8  # Distinct addresses tracked in stale_by_source
+
+
+class _Readable:
+    """
+    Awaitable that parks the current task on the uasyncio I/O queue until
+    the socket is readable (the same mechanism uasyncio streams use).
+    """
+
+    def __init__(self, sock):
+        self.sock = sock
+
+    def __iter__(self):
+        yield core._io_queue.queue_read(self.sock)
+
+    __await__ = __iter__
 
 
 # UDP server
 class UDPServer:
-    def __init__(self, polltimeout=1, max_packet=1024):
-        self.polltimeout = polltimeout
+    def __init__(self, max_packet=64, drain_slots=8, measure=False, report_ms=5000):
+        """
+        Event-driven UDP server
+
+        The serve task sleeps on the uasyncio I/O queue and only runs when
+        a datagram has arrived, leaving the CPU to the control loop.
+
+        Datagrams are received into preallocated buffers. Every wake-up
+        drains all pending datagrams and hands the callback only the
+        newest one per command type (same 3-byte prefix), as a memoryview
+        that is valid until the callback returns. Older ones are counted
+        as stale per source address. Datagrams longer than max_packet are
+        dropped and counted (oversize), never passed on cut off.
+
+        The buffer pool only makes receiving allocation-free where the
+        socket has recvfrom_into, i.e. CPython and the host simulator.
+        The ESP32 MicroPython socket has no recvfrom_into: there every
+        datagram goes through recvfrom, which allocates the data and the
+        address, and is then copied into its slot. (readinto would not
+        allocate but gives no source address, which replies and the
+        per-source counters need.)
+
+        An exception in the callback is logged and does not stop the
+        server.
+
+        Args:
+            max_packet (int): Largest datagram accepted (V7RC frames are 20,
+                diagnostic queries too)
+            drain_slots (int): Distinct command types kept per drain
+            measure (bool): Count loop iterations and busy time; a report
+                is logged every report_ms while packets arrive
+            report_ms (int): Measurement report interval in milliseconds
+        """
         self.max_packet = max_packet
         self.sock = usocket.socket(usocket.AF_INET, usocket.SOCK_DGRAM) #### add by yapo
-        
-    
+        self.measure = measure
+        self.report_ms = report_ms
+
+        # Receive buffers: drain_slots pending + one spare being received into.
+        # One byte over max_packet, so a longer datagram shows up as such
+        # instead of being cut to size by the socket.
+        count = drain_slots + 1
+        self._slots = drain_slots
+        self._bufs = [bytearray(max_packet + 1) for _ in range(count)]
+        self._views = [memoryview(b) for b in self._bufs]
+        self._lens = array('H', [0] * count)
+        self._keys = array('l', [0] * count)
+        self._addrs = [None] * count
+        self._order = bytearray(drain_slots)        # Pending slots, arrival order
+        self._free = bytearray(range(1, count))     # Free slot stack
+        self._n_free = drain_slots
+        self._spare = 0
+        self._recv_into = None
+
+        self.stale = 0
+        self.stale_by_source = {}
+        self.oversize = 0
+        self.reset_stats()
+
     def close(self):
         self.sock.close()
 
+    def reset_stats(self):
+        """Restart the measurement window"""
+        self.iterations = 0
+        self.packets = 0
+        self.busy_us = 0
+        self._window_start = utime.ticks_ms()
+
+    def report(self):
+        """
+        Measurement report for the current window
+
+        Returns:
+            dict: {
+                'iterations_per_s': loop wake-ups per second,
+                'packets_per_s': datagrams received per second,
+                'idle_fraction': share of wall time the serve task was
+                    parked on the I/O queue (1.0 = never running),
+                'stale': datagrams dropped as superseded (total),
+                'oversize': datagrams dropped as too long (total)
+            }
+        """
+        elapsed_ms = utime.ticks_diff(utime.ticks_ms(), self._window_start)
+        if elapsed_ms <= 0:
+            elapsed_ms = 1
+        return {
+            'iterations_per_s': self.iterations * 1000 / elapsed_ms,
+            'packets_per_s': self.packets * 1000 / elapsed_ms,
+            'idle_fraction': 1 - self.busy_us / (elapsed_ms * 1000),
+            'stale': self.stale,
+            'oversize': self.oversize,
+        }
+
+    def _count_stale(self, addr):
+        self.stale += 1
+        stale = self.stale_by_source
+        if addr in stale:
+            stale[addr] += 1
+        elif len(stale) < _MAX_SOURCES:
+            stale[addr] = 1
+        else:
+            stale['other'] = stale.get('other', 0) + 1
+
+    def _receive(self, idx):
+        # Receive one datagram into slot idx; OSError when drained
+        s = self.sock
+        if self._recv_into is not None:
+            n, addr = self._recv_into(self._bufs[idx])
+        else:
+            data, addr = s.recvfrom(self.max_packet + 1)
+            n = len(data)
+            self._bufs[idx][:n] = data
+        self._lens[idx] = n
+        self._addrs[idx] = addr
+        v = self._views[idx]
+        self._keys[idx] = ((v[0] << 16) | (v[1] << 8) | v[2]) if n >= 3 else -1
+        return n
+
+    def _deliver(self, cb, n_pending):
+        # Hand the pending slots to the callback and release them
+        s = self.sock
+        order = self._order
+        free = self._free
+        for j in range(n_pending):
+            idx = order[j]
+            addr = self._addrs[idx]
+            try:
+                ret = cb(self._views[idx][:self._lens[idx]], addr)
+                if ret:
+                    s.sendto(ret, addr) # blocking
+            except Exception as e:
+                _log.error("Callback error: %s", e)
+            self._addrs[idx] = None
+            free[self._n_free] = idx
+            self._n_free += 1
+
+    def _drain(self, cb):
+        # Read every pending datagram, keep the newest per command type
+        order = self._order
+        keys = self._keys
+        n_pending = 0
+        received = 0
+        while True:
+            spare = self._spare
+            try:
+                n = self._receive(spare)
+            except OSError:
+                break
+            received += 1
+            if n > self.max_packet:
+                # Would be cut off: drop it, the spare slot is reused
+                self.oversize += 1
+                _log.warn("Dropped datagram over %d bytes from %s",
+                          self.max_packet, self._addrs[spare])
+                self._addrs[spare] = None
+                continue
+            key = keys[spare]
+
+            for j in range(n_pending):
+                idx = order[j]
+                if key >= 0 and keys[idx] == key:
+                    # Newer frame of the same type replaces the pending one
+                    self._count_stale(self._addrs[idx])
+                    self._addrs[idx] = None
+                    order[j] = spare
+                    self._spare = idx
+                    break
+            else:
+                if n_pending == self._slots:
+                    self._deliver(cb, n_pending)
+                    n_pending = 0
+                order[n_pending] = spare
+                n_pending += 1
+                self._n_free -= 1
+                self._spare = self._free[self._n_free]
+
+        self._deliver(cb, n_pending)
+        return received
+
     async def serve(self, cb, host, port, backlog=5):
         ai = usocket.getaddrinfo(host, port)[0]  # blocking!
-        #s = usocket.socket(usocket.AF_INET, usocket.SOCK_DGRAM)
-        #self.sock = s
         s = self.sock   ## add by yapo
         s.setblocking(False)
         s.bind(ai[-1])
+        # recvfrom_into where the port provides it, else recvfrom + copy
+        self._recv_into = getattr(s, 'recvfrom_into', None)
 
-        p = uselect.poll()
-        p.register(s,uselect.POLLIN)
-        to = self.polltimeout
+        readable = _Readable(s)
+        measure = self.measure
         while True:
             try:
-                if p.poll(to):
-                    #buf, addr = s.recvfrom(MAX_PACKET_SIZE)
-                    buf, addr = s.recvfrom(1024)
-                    ret = cb(buf,addr)
-                    await uasyncio.sleep(0)
-                    if ret:
-                        s.sendto(ret, addr) # blocking
-#                await uasyncio.sleep(0.1)
-                await uasyncio.sleep(0)
+                await readable
+                if measure:
+                    t0 = utime.ticks_us()
+                    self.iterations += 1
+
+                received = self._drain(cb)
+
+                if measure:
+                    self.packets += received
+                    self.busy_us += utime.ticks_diff(utime.ticks_us(), t0)
+                    if utime.ticks_diff(utime.ticks_ms(), self._window_start) >= self.report_ms:
+                        r = self.report()
+                        _log.info("%.1f loops/s, %.1f pkts/s, idle %.1f%%, stale %d",
+                                  r['iterations_per_s'], r['packets_per_s'],
+                                  r['idle_fraction'] * 100, r['stale'])
+                        self.reset_stats()
             except uasyncio.core.CancelledError:
                 # Shutdown server
                 s.close()
                 return
-    
-
-    
\ No newline at end of file
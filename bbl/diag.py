@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Diagnostic Queries
+CyberBrick V7RC Controller
+
+Frames starting with '?' are diagnostic queries instead of V7RC commands.
+A query is '?' plus a 3-letter name, optionally followed by an argument,
+and is padded to 20 bytes with a '#' terminator so it also passes the BLE
+framer:
+
+    ?LAT               #    latency histograms (bbl.latency)
+    ?LAT R             #    ... and reset them
+    ?SCH               #    control loop task counters (bbl.scheduler)
+    ?PRF               #    control loop CPU profile (bbl.profiler)
+    ?RES               #    pin and LEDC channel grants (bbl.resources)
+
+The reply text is returned to the receiver callback, which sends it back
+to the client (UDP datagram or BLE notifications).
+
+Example:
+    >>> diag.register_query(b'LAT', lambda arg: "report text")
+    >>> diag.answer(b'?LAT               #')
+    b'report text'
+"""
+
+QUERY = 0x3F  # '?'
+
+_queries = {}  # 3-byte name -> function(arg) returning str
+
+
+def register_query(name, func):
+    """
+    Register a query handler
+
+    Args:
+        name (bytes): 3-letter query name, e.g. b'LAT'
+        func (function): func(arg) -> str, arg is the bytes after the
+            name with padding removed (b'' if none)
+    """
+    _queries[bytes(name)] = func
+
+
+def query(name, arg=b''):
+    """Builds the 20-byte query frame for a name and argument"""
+    body = b'?' + bytes(name) + (b' ' + arg if arg else b'')
+    return body + b' ' * (19 - len(body)) + b'#'
+
+
+def prefixes():
+    """Packed 3-byte prefixes of the registered queries (for the BLE framer)"""
+    return [(QUERY << 16) | (name[0] << 8) | name[1] for name in _queries]
+
+
+def answer(msg):
+    """
+    Run the query in msg
+
+    Args:
+        msg (bytes|memoryview): Query frame (any length, '?' first)
+
+    Returns:
+        bytes: Reply text, or None if the query is unknown
+    """
+    func = _queries.get(bytes(msg[1:4]))
+    if func is None:
+        return None
+    arg = bytes(msg[4:]).rstrip(b'#').strip()
+    return func(arg).encode()
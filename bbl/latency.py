@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+Packet-to-pin Latency Probe
+CyberBrick V7RC Controller
+
+Measures how long a V7RC frame takes from reception to the PWM/pin write
+it causes, split into stages:
+
+    rx>parse    receive (UDP wake-up / BLE IRQ) to decoded in the mailbox
+    parse>disp  waiting in the mailbox for the control tick
+    disp>act    command handler writing PWM duties / motor duties
+    total       receive to actuation
+
+Every stage is aggregated into a fixed-bucket histogram per command type
+and transport (UDP, BLE). All storage is preallocated in enable(); no
+per-packet allocation.
+
+Disabled (the default) the probe costs nothing: enable() wraps the
+mailbox, the command registry and the UDP server in place, disable()
+removes the wrappers again.
+
+Example:
+    >>> from bbl import latency
+    >>> latency.enable(mailbox, udp_server=v7rc.udp_server, ble=ble_service)
+    >>> latency.print_report()          # REPL
+    >>> # Remotely: send diag.query(b'LAT') over UDP or BLE
+"""
+
+import utime
+from array import array
+from bbl import diag
+
+UDP = 0
+BLE = 1
+TRANSPORTS = ('UDP', 'BLE')
+
+STAGES = ('rx>parse', 'parse>disp', 'disp>act', 'total')
+
+# Bucket upper bounds in microseconds; the last bucket is everything above
+BOUNDS_US = (100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000)
+_NB = len(BOUNDS_US) + 1
+_NS = len(STAGES)
+
+
+class LatencyProbe:
+    """
+    Stage timestamps and histograms for one mailbox / command registry
+    """
+
+    def __init__(self, mailbox, udp_server=None, ble=None):
+        """
+        Args:
+            mailbox (CommandMailbox): Mailbox the receivers post to
+            udp_server (UDPServer, optional): Timestamps UDP wake-ups
+            ble (BLEService, optional): Provides BLE IRQ timestamps
+        """
+        self.mailbox = mailbox
+        self.registry = mailbox.registry
+        self.udp_server = udp_server
+        self.ble = ble
+        self.names = self.registry.names
+
+        n = len(self.registry)
+        self._codes = n
+        # Pending stage timestamps of the newest frame per command code
+        self._rx = array('L', [0] * n)
+        self._parsed = array('L', [0] * n)
+        self._transport = bytearray(n)
+        self._rx_udp = 0
+
+        cells = n * len(TRANSPORTS) * _NS
+        self.hist = array('L', [0] * (cells * _NB))
+        self.count = array('L', [0] * cells)
+        self.sum_us = array('Q', [0] * cells)
+        self.max_us = array('L', [0] * cells)
+
+    def _cell(self, code, transport, stage):
+        return (code * len(TRANSPORTS) + transport) * _NS + stage
+
+    def _add(self, cell, us):
+        if us < 0:
+            us = 0
+        b = 0
+        for bound in BOUNDS_US:
+            if us <= bound:
+                break
+            b += 1
+        self.hist[cell * _NB + b] += 1
+        self.count[cell] += 1
+        self.sum_us[cell] += us
+        if us > self.max_us[cell]:
+            self.max_us[cell] = us
+
+    # Wrappers installed by attach()
+
+    def _udp_drain(self, cb):
+        self._rx_udp = utime.ticks_us()
+        return self._orig_drain(cb)
+
+    def _post(self, msg, addr=None):
+        start = utime.ticks_us()
+        code = self._orig_post(msg, addr)
+        if code:
+            if addr is not None and addr[0] == 'BLE':
+                self._transport[code] = BLE
+                self._rx[code] = self.ble.rx_ticks_us() if self.ble else start
+            else:
+                self._transport[code] = UDP
+                self._rx[code] = self._rx_udp if self.udp_server and addr else start
+            self._parsed[code] = utime.ticks_us()
+        return code
+
+    def _dispatch(self, code, frame):
+        t_disp = utime.ticks_us()
+        handled = self._orig_dispatch(code, frame)
+        t_act = utime.ticks_us()
+        rx = self._rx[code]
+        parsed = self._parsed[code]
+        cell = self._cell(code, self._transport[code], 0)
+        diff = utime.ticks_diff
+        self._add(cell, diff(parsed, rx))
+        self._add(cell + 1, diff(t_disp, parsed))
+        self._add(cell + 2, diff(t_act, t_disp))
+        self._add(cell + 3, diff(t_act, rx))
+        return handled
+
+    def attach(self):
+        """Install the timestamping wrappers"""
+        self._orig_post = self.mailbox.post
+        self.mailbox.post = self._post
+        self._orig_dispatch = self.registry.dispatch
+        self.registry.dispatch = self._dispatch
+        if self.udp_server is not None:
+            self._orig_drain = self.udp_server._drain
+            self.udp_server._drain = self._udp_drain
+
+    def detach(self):
+        """Remove the wrappers (back to the methods found by attach())"""
+        self.mailbox.post = self._orig_post
+        self.registry.dispatch = self._orig_dispatch
+        if self.udp_server is not None:
+            self.udp_server._drain = self._orig_drain
+
+    def reset(self):
+        """Clears all histograms"""
+        for a in (self.hist, self.count, self.sum_us, self.max_us):
+            for i in range(len(a)):
+                a[i] = 0
+
+    def percentile(self, cell, pct):
+        """Upper bucket bound (us) below which pct% of the samples fall"""
+        total = self.count[cell]
+        if not total:
+            return 0
+        need = (total * pct + 99) // 100
+        seen = 0
+        base = cell * _NB
+        for b in range(_NB):
+            seen += self.hist[base + b]
+            if seen >= need:
+                return BOUNDS_US[b] if b < len(BOUNDS_US) else self.max_us[cell]
+        return self.max_us[cell]
+
+    def report(self, histograms=False):
+        """
+        Text table of all command/transport pairs with samples
+
+        Args:
+            histograms (bool): Append the bucket counts of every stage
+
+        Returns:
+            str: One line per command, transport and stage
+        """
+        lines = ["cmd/tr  stage        n    avg  p50<  p99<    max  (us)"]
+        for code in range(1, self._codes):
+            for tr in range(len(TRANSPORTS)):
+                for stage in range(_NS):
+                    cell = self._cell(code, tr, stage)
+                    n = self.count[cell]
+                    if not n:
+                        continue
+                    lines.append("%-3s/%s %-10s %5d %6d %5d %5d %6d" % (
+                        self.names[code], TRANSPORTS[tr], STAGES[stage], n,
+                        self.sum_us[cell] // n, self.percentile(cell, 50),
+                        self.percentile(cell, 99), self.max_us[cell]))
+                    if histograms:
+                        base = cell * _NB
+                        lines.append("    " + " ".join(
+                            str(self.hist[base + b]) for b in range(_NB)))
+        if histograms:
+            lines.append("buckets <= " + " ".join(str(b) for b in BOUNDS_US) + " +")
+        return "\n".join(lines)
+
+
+# Active probe, None while disabled
+probe = None
+
+
+def enable(mailbox, udp_server=None, ble=None):
+    """
+    Start measuring (no-op if already enabled)
+
+    Returns:
+        LatencyProbe: The active probe
+    """
+    global probe
+    if probe is None:
+        probe = LatencyProbe(mailbox, udp_server, ble)
+        probe.attach()
+    return probe
+
+
+def disable():
+    """Stop measuring and remove all instrumentation"""
+    global probe
+    if probe is not None:
+        probe.detach()
+        probe = None
+
+
+def report(histograms=False):
+    """Returns the report text of the active probe"""
+    if probe is None:
+        return "latency probe disabled"
+    return probe.report(histograms)
+
+
+def print_report(histograms=True):
+    """Prints the report (REPL)"""
+    print(report(histograms))
+
+
+def _query(arg):
+    # ?LAT [R]: summary table, R also resets the histograms
+    text = report()
+    if probe is not None and arg[:1] in (b'R', b'r'):
+        probe.reset()
+    return text
+
+
+diag.register_query(b'LAT', _query)
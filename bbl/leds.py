@@ -1,58 +1,49 @@
 # -*- coding: utf-8 -*-
 from machine import Pin
-from machine import bitstream
+from array import array
 import utime
 import math
+from bbl.log import get_logger
+from bbl.neopixel import NeoPixel
+from bbl import resources
+
+try:
+    from bbl.config import LED_BREATH_GAMMA
+except ImportError:
+    LED_BREATH_GAMMA = 1.0
 
 LED_CHANNEL1 = 21
 LED_CHANNEL2 = 20
 
+_log = get_logger('LEDS')
+
+# Bit timing of the LED ports (high_0, low_0, high_1, low_1) in ns
+LED_TIMING = (400, 1000, 1000, 400)
+
+_BLACK = (0, 0, 0)
+
+# Effect modes of an LED and LEDs per port
+SOLID = 0
+BLINK = 1
+BREATHING = 2
+N_PIXELS = 4
+
+# Breathing brightness for each 1/BREATH_STEPS of the period, 0..256
+# (256 = full color): a sine from off to full and back, raised to
+# LED_BREATH_GAMMA. Built once so a tick is a table lookup and three
+# integer multiplies.
+BREATH_STEPS = 128
+
+
+def _breath_table(gamma):
+    table = array('H', bytes(2 * BREATH_STEPS))
+    for k in range(BREATH_STEPS):
+        level = (1 + math.sin(2 * math.pi * k / BREATH_STEPS - math.pi / 2)) / 2
+        table[k] = int(256 * level ** gamma + 0.5)
+    return table
 
-class NeoPixel:
-    # NeoPixel driver for MicroPython
-    # MIT license; Copyright (c) 2016 Damien P. George, 2021 Jim Mussared
-    # G R B W
-    ORDER = (1, 0, 2, 3)
-
-    def __init__(self, pin, n, bpp=3, timing=1):
-        self.pin = pin
-        self.n = n
-        self.bpp = bpp
-        self.buf = bytearray(n * bpp)
-        self.pin.init(pin.OUT)
-        # or a user-specified timing ns tuple (high_0, low_0, high_1, low_1).
-        self.timing = (
-            ((400, 850, 800, 450) if timing else (400, 1000, 1000, 400))
-            if isinstance(timing, int)
-            else timing
-        )
-
-    def __len__(self):
-        return self.n
-
-    def __setitem__(self, i, v):
-        offset = i * self.bpp
-        for i in range(self.bpp):
-            self.buf[offset + self.ORDER[i]] = v[i]
-
-    def __getitem__(self, i):
-        offset = i * self.bpp
-        return tuple(self.buf[offset + self.ORDER[i]] for i in range(self.bpp))
-
-    def fill(self, v):
-        b = self.buf
-        l = len(self.buf)
-        bpp = self.bpp
-        for i in range(bpp):
-            c = v[i]
-            j = self.ORDER[i]
-            while j < l:
-                b[j] = c
-                j += bpp
-
-    def write(self):
-        # BITSTREAM_TYPE_HIGH_LOW = 0
-        bitstream(self.pin, 0, self.timing, self.buf)
+
+_BREATH = _breath_table(LED_BREATH_GAMMA)
 
 
 class LEDController:
@@ -71,8 +62,8 @@ class LEDController:
         """
         Initializes the LEDController instance for controlling an LED based \
             on the specified channel.
-        This method sets up the LED effects, initializes the current effect \
-            index, repeat count, duration, and start time.
+        This method sets up the per-LED effect table (all LEDs solid \
+            black).
         It then maps the provided LED channel to its corresponding pin number \
             and initializes the NeoPixel object.
 
@@ -106,122 +97,103 @@ pin configuration.
         if led_channel not in self.led_pins_map:
             raise ValueError("Invalid LED channel")
 
-        self.effects = [
-            self._solid_effect, self._blink_effect, self._breathing_effect
-        ]
         self.channel = led_channel
-        self.current_effect_index = 0
-        self.repeat_count = 0
-        self.duration = 0
-        self.current_effect_start_time = 0
-        self.duty_cycle = 0
-        self.led_index = 0
-        self.rgb = 0x000000
-        self.is_on = False
-
-        pin = Pin(self.led_pins_map[led_channel], Pin.OUT)
-        self.np = NeoPixel(pin, 4, timing=0)
-
-        for i in range(4):
-            self.np[i] = (0, 0, 0)
+
+        # Effect table, one entry per LED: mode, color, period (ms), phase
+        # origin (ticks_ms) and repeats left (0xFF = forever)
+        self.modes = bytearray(N_PIXELS)
+        self.colors = [_BLACK] * N_PIXELS
+        self.periods = [0] * N_PIXELS
+        self.starts = [0] * N_PIXELS
+        self.repeats = bytearray(N_PIXELS)
+        self._static = True     # Only solid LEDs: nothing changes over time
+        self._rendered = False
+
+        self.np = self._open()
+
+        self.np.fill(_BLACK)
         self.np.write()
 
     def reinit(self):
-        self.current_effect_index = 0
-        self.repeat_count = 0
-        self.duration = 0
-        self.current_effect_start_time = 0
-
-        pin = Pin(self.led_pins_map[self.channel], Pin.OUT)
-        self.np = NeoPixel(pin, 4, timing=0)
-
-    def _breathing_effect(self):
-        current_time = utime.ticks_ms()
-        elapsed_time = utime.ticks_diff(current_time,
-                                        self.current_effect_start_time)
-
-        # Calculate duty cycle based on elapsed time and duration
-        progress = (elapsed_time % self.duration) / self.duration
-
-        # Sine wave pattern for smooth breathing (0 to 1 to 0)
-        self.duty_cycle = int(512 * (1 + math.sin(2 * math.pi * progress - math.pi/2)))
-
-        # Calculate the duty cycle factor once for use in all colors
-        duty_factor = self.duty_cycle / 1024.0
-
-        for i in range(4):
-            if self.led_index & (1 << i):
-                red = int(((self.rgb >> 16) & 0xFF) * duty_factor)
-                green = int(((self.rgb >> 8) & 0xFF) * duty_factor)
-                blue = int((self.rgb & 0xFF) * duty_factor)
-                self.np[i] = (red, green, blue)
-            else:
-                self.np[i] = (0, 0, 0)
-        self.np.write()
+        for i in range(N_PIXELS):
+            self.modes[i] = SOLID
+            self.colors[i] = _BLACK
+            self.repeats[i] = 0
+        self._static = True
+        self._rendered = False
+
+        self.np = self._open()
+
+    def _open(self):
+        # NeoPixel on the LED port, unless bbl.resources gave the pin away
+        gpio = self.led_pins_map[self.channel]
+        if resources.acquire(self.channel, (gpio,), pwm=False) == resources.DENIED:
+            _log.error("%s disabled: GPIO %d is assigned to another device, see ?RES",
+                       self.channel, gpio)
+            return NeoPixel(None, 4)
+        return NeoPixel(Pin(gpio, Pin.OUT), 4, timing=LED_TIMING)
+
+    def idle(self):
+        """
+        Returns True when the LEDs show static colors already written, so
+        timing_proc has nothing to do.
 
-    def _blink_effect(self):
-        current_time = utime.ticks_ms()
-        elapsed_time = utime.ticks_diff(current_time,
-                                        self.current_effect_start_time)
-        if elapsed_time < self.duration / 2:
-            if self.is_on is False:
-                self.is_on = True
-                for i in range(4):
-                    if self.led_index & (1 << i):
-                        self.np[i] = ((self.rgb >> 16) & 0xFF,
-                                      (self.rgb >> 8) & 0xFF, self.rgb & 0xFF)
-                    else:
-                        self.np[i] = (0, 0, 0)
-                self.np.write()
-        else:
-            if self.is_on is True:
-                self.is_on = False
-                for i in range(4):
-                    self.np[i] = (0, 0, 0)
-                self.np.write()
-
-    def _solid_effect(self):
-        if self.is_on is False:
-            self.is_on = True
-            for i in range(4):
-                if self.led_index & (1 << i):
-                    self.np[i] = ((self.rgb >> 16) & 0xFF,
-                                  (self.rgb >> 8) & 0xFF, self.rgb & 0xFF)
-                else:
-                    self.np[i] = (0, 0, 0)
-                pass
-            self.np.write()
+        Returns:
+            bool: True when every LED is solid and the frame is rendered
+        """
+        return self._static and self._rendered
 
     def timing_proc(self):
         """
-        Callback function to update the LED effect.
-        This method is called at regular intervals to update the current \
-            LED effect.
+        Renders every LED's effect into the frame buffer and writes it
+        once (nothing is sent when no pixel changed).
+        This method is called at regular intervals to update the LED \
+            effects.
 
         Args:
             None
         Returns:
             None
         """
-        current_effect = self.effects[self.current_effect_index]
-        current_effect()
-        self._update_effect()
-
-    def _update_effect(self):
-        current_time = utime.ticks_ms()
-        elapsed_time = utime.ticks_diff(current_time,
-                                        self.current_effect_start_time)
-        if elapsed_time >= self.duration:
-            if self.repeat_count != 0xFF:
-                self.repeat_count -= 1
-            if self.repeat_count > 0:
-                self.current_effect_start_time = current_time
+        now = utime.ticks_ms()
+        np = self.np
+        modes = self.modes
+        for i in range(N_PIXELS):
+            mode = modes[i]
+            color = self.colors[i]
+            if mode != SOLID:
+                period = self.periods[i]
+                elapsed = utime.ticks_diff(now, self.starts[i])
+                if mode == BLINK:
+                    # On for the first half of the period
+                    if elapsed * 2 >= period:
+                        color = _BLACK
+                else:
+                    # Brightness from the sine table (0 to 256 to 0)
+                    level = _BREATH[elapsed % period * BREATH_STEPS // period]
+                    color = (color[0] * level >> 8, color[1] * level >> 8,
+                             color[2] * level >> 8)
+                if elapsed >= period:
+                    self._repeat(i, now)
+            np[i] = color
+        np.write()
+        self._rendered = True
+
+    def _repeat(self, i, now):
+        # End of a period: start the next one while repeats are left
+        repeats = self.repeats[i]
+        if repeats != 0xFF and repeats > 0:
+            repeats -= 1
+            self.repeats[i] = repeats
+        if repeats > 0:
+            self.starts[i] = now
 
     def set_led_effect(self, mod, duration, repeat_count, led_index, rgb):
         """
         Sets the LED effect.
-        This method configures the LED with the specified effect, duration, 
-        repeat count, LED index, and RGB color.
+        This method configures the LEDs selected by led_index with the
+        specified effect, duration, repeat count, and RGB color. The other
+        LEDs keep their own effects.
 
         Args:
             mod (int): The index of the effect to set.
@@ -251,22 +223,50 @@ pin configuration.
             >>> # Blink green on LED1 and LED2 indefinitely
             >>> set_led_effect(1, 500, 255, 0b0011, 0x00FF00)
         """
-        if not 0 <= mod < len(self.effects):
-            print("[LEDS]Invalid effect index. Must be between 0 and 2.")
+        if not 0 <= mod <= BREATHING:
+            _log.warn("Invalid effect index. Must be between 0 and 2.")
             return
 
         if not isinstance(repeat_count,
                           int) or repeat_count < 0 or repeat_count > 255:
-            print("[LEDS]Invalid repeat count.")
+            _log.warn("Invalid repeat count.")
+            return
+        for i in range(N_PIXELS):
+            if led_index & (1 << i):
+                self.set_pixel_effect(i, mod, duration, rgb, repeat_count)
+
+    def set_pixel_effect(self, led_idx, mod, duration, rgb, repeat_count=0xFF):
+        """
+        Sets the effect of one LED; the other LEDs keep theirs.
+        Setting the effect an LED already runs forever keeps its phase, so
+        a blink repeated in every frame keeps blinking.
+
+        Args:
+            led_idx (int): LED index (0-3)
+            mod (int): 0 = solid, 1 = blink, 2 = breathing
+            duration (int): Effect period in milliseconds (blink/breathing)
+            rgb (int): The RGB color value of the LED in hexadecimal.
+            repeat_count (int): Periods to run, 0xFF = forever
+
+        Example:
+            >>> # LED 2 blinks blue at 2 Hz, the others are untouched
+            >>> led.set_pixel_effect(2, 1, 500, 0x0000FF)
+        """
+        if mod != SOLID and duration <= 0:
+            _log.warn("Invalid duration for effect %d.", mod)
+            return
+        color = ((rgb >> 16) & 0xFF, (rgb >> 8) & 0xFF, rgb & 0xFF)
+        if (repeat_count == 0xFF and self.repeats[led_idx] == 0xFF
+                and self.modes[led_idx] == mod and self.colors[led_idx] == color
+                and (mod == SOLID or self.periods[led_idx] == duration)):
             return
-        self.current_effect_index = mod
-        self.duration = duration
-        self.repeat_count = repeat_count
-        self.duty_cycle = 0
-        self.led_index = led_index
-        self.rgb = rgb
-        self.is_on = False
-        self.current_effect_start_time = utime.ticks_ms()
+        self.modes[led_idx] = mod
+        self.colors[led_idx] = color
+        self.periods[led_idx] = duration
+        self.starts[led_idx] = utime.ticks_ms()
+        self.repeats[led_idx] = repeat_count
+        self._static = not any(self.modes)
+        self._rendered = False
 
     def set_led_rgbm(self, led_idx, r, g, b, mode, blink_ms=0):
         """
@@ -290,7 +290,7 @@ pin configuration.
             >>> led1.set_led_rgbm(1, 0, 255, 0, 'blink', 500)
         """
         if not 0 <= led_idx <= 3:
-            print("[LEDS]Invalid LED index. Must be between 0 and 3.")
+            _log.warn("Invalid LED index. Must be between 0 and 3.")
             return
             
         rgb = (r << 16) | (g << 8) | b
@@ -308,7 +308,7 @@ pin configuration.
             duration = blink_ms * 2 if blink_ms > 0 else 1000
             self.set_led_effect(1, duration, 0xFF, led_mask, rgb)
         else:
-            print(f"[LEDS]Unknown mode: {mode}")
+            _log.warn("Unknown mode: %s", mode)
 
 
 
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+Non-blocking Log Sink
+CyberBrick V7RC Controller
+
+A 70-character print() at 115200 baud blocks for ~6 ms, most of a 10 ms
+control tick. Messages logged through this module are filtered by level,
+rate limited per tag and copied into a fixed-size bytearray ring buffer
+that an asyncio task drains to the console in small chunks.
+
+Debug-level calls in hot paths are written as
+
+    if __debug__:
+        if _log.enabled(DEBUG):
+            _log.debug("...", list(frame))
+
+so they are removed entirely when the firmware is compiled with
+optimisation level 1 (see _STRIP_DEBUG_LOGS in boot.py or mpy-cross -O1),
+and otherwise build their arguments only when the level lets them through.
+
+Until drain_task() is started, messages are printed directly so logging
+from the REPL or during boot behaves like print().
+
+Example:
+    >>> from bbl.log import get_logger
+    >>> _log = get_logger('servo')
+    >>> _log.warn("Invalid angle: %d", 200)
+    [servo] Invalid angle: 200
+"""
+
+import sys
+import utime
+import uasyncio
+
+try:
+    from bbl.config import (
+        LOG_LEVEL,
+        LOG_BUFFER_SIZE,
+        LOG_RATE_LIMIT_MS,
+        LOG_DRAIN_INTERVAL_MS,
+        LOG_DRAIN_CHUNK
+    )
+except ImportError:
+    LOG_LEVEL = 'INFO'
+    LOG_BUFFER_SIZE = 1024
+    LOG_RATE_LIMIT_MS = 1000
+    LOG_DRAIN_INTERVAL_MS = 20
+    LOG_DRAIN_CHUNK = 64
+
+DEBUG = 10
+INFO = 20
+WARN = 30
+ERROR = 40
+OFF = 100
+
+LEVELS = {'DEBUG': DEBUG, 'INFO': INFO, 'WARN': WARN, 'ERROR': ERROR, 'OFF': OFF}
+
+
+class LogSink:
+    """
+    Level-filtered, per-tag rate-limited log ring buffer.
+
+    Messages that do not fit into the ring are dropped (counted in
+    `dropped`), never blocking the caller. ERROR messages bypass the
+    rate limit.
+    """
+
+    def __init__(self, size=LOG_BUFFER_SIZE, level=LOG_LEVEL,
+                 rate_limit_ms=LOG_RATE_LIMIT_MS):
+        """
+        Initialize the log sink
+
+        Args:
+            size (int): Ring buffer size in bytes
+            level (str|int): Minimum level, e.g. 'INFO' or WARN
+            rate_limit_ms (int): Minimum interval between two messages with
+                the same tag (0 disables rate limiting)
+        """
+        self._buf = bytearray(size)
+        self._size = size
+        self._start = 0     # Read position
+        self._used = 0      # Bytes waiting to be drained
+        self._last = {}     # tag -> ticks_ms of the last accepted message
+        self._held = {}     # tag -> messages suppressed since then
+        self.set_level(level)
+        self.rate_limit_ms = rate_limit_ms
+        self.buffered = False
+        self.suppressed = 0
+        self.dropped = 0
+
+    def set_level(self, level):
+        """
+        Sets the minimum level ('DEBUG', 'INFO', 'WARN', 'ERROR', 'OFF')
+        """
+        self.level = LEVELS[level] if isinstance(level, str) else level
+
+    def log(self, level, tag, msg, args=(), prefix=True):
+        """
+        Log a message
+
+        Args:
+            level (int): DEBUG, INFO, WARN or ERROR
+            tag (str): Message tag, printed as "[tag]" and used for rate limiting
+            msg (str): Message, %-formatted with args if given
+            args (tuple): Format arguments (only formatted if the message passes)
+            prefix (bool): Prepend "[tag] " to the message
+
+        Returns:
+            bool: True if the message was accepted
+        """
+        if level < self.level:
+            return False
+
+        held = 0
+        if self.rate_limit_ms and level < ERROR:
+            now = utime.ticks_ms()
+            last = self._last.get(tag)
+            if last is not None and utime.ticks_diff(now, last) < self.rate_limit_ms:
+                self._held[tag] = self._held.get(tag, 0) + 1
+                self.suppressed += 1
+                return False
+            self._last[tag] = now
+            held = self._held.pop(tag, 0)
+
+        if args:
+            msg = msg % args
+        if prefix:
+            msg = f"[{tag}] {msg}"
+        if held:
+            msg = f"{msg} (+{held} suppressed)"
+        self.write(msg)
+        return True
+
+    def write(self, text):
+        """
+        Queue a line of text (a newline is appended)
+        """
+        if not self.buffered:
+            print(text)
+            return
+
+        data = (text + '\n').encode()
+        n = len(data)
+        if n > self._size - self._used:
+            self.dropped += 1
+            return
+
+        end = (self._start + self._used) % self._size
+        first = min(n, self._size - end)
+        self._buf[end:end + first] = data[:first]
+        if first < n:
+            self._buf[0:n - first] = data[first:]
+        self._used += n
+
+    def drain(self, max_bytes=LOG_DRAIN_CHUNK):
+        """
+        Write up to max_bytes of queued text to the console
+
+        Returns:
+            int: Bytes written
+        """
+        n = min(self._used, max_bytes, self._size - self._start)
+        if n <= 0:
+            return 0
+        out = getattr(sys.stdout, 'buffer', sys.stdout)
+        out.write(memoryview(self._buf)[self._start:self._start + n])
+        self._start = (self._start + n) % self._size
+        self._used -= n
+        return n
+
+    def flush(self):
+        """Write all queued text to the console (blocking)"""
+        while self.drain(self._size):
+            pass
+
+    async def drain_task(self, interval_ms=LOG_DRAIN_INTERVAL_MS,
+                         chunk=LOG_DRAIN_CHUNK):
+        """
+        Switch to buffered mode and drain the ring in small chunks
+
+        Each wake-up writes at most `chunk` bytes (~5.5 ms at 115200 baud
+        for 64 bytes) and then yields for `interval_ms`, so logging never
+        takes a whole control tick.
+        """
+        self.buffered = True
+        try:
+            while True:
+                self.drain(chunk)
+                await uasyncio.sleep_ms(interval_ms)
+        finally:
+            self.flush()
+            self.buffered = False
+
+
+class Logger:
+    """
+    Tagged front-end of a LogSink
+
+    Example:
+        >>> _log = get_logger('motors')
+        >>> _log.warn("Invalid motor index: %d", 3)
+    """
+
+    def __init__(self, tag, sink, prefix=True):
+        """
+        Args:
+            tag (str): Tag used for output and rate limiting
+            sink (LogSink): Sink to write to
+            prefix (bool): Prepend "[tag] " to messages (disable for
+                messages that already carry their own tag)
+        """
+        self.tag = tag
+        self.sink = sink
+        self.prefix = prefix
+
+    def _emit(self, level, msg, args):
+        self.sink.log(level, self.tag, msg, args, self.prefix)
+
+    def enabled(self, level):
+        """True if messages of this level pass the sink's level filter"""
+        return level >= self.sink.level
+
+    def debug(self, msg, *args):
+        self._emit(DEBUG, msg, args)
+
+    def info(self, msg, *args):
+        self._emit(INFO, msg, args)
+
+    def warn(self, msg, *args):
+        self._emit(WARN, msg, args)
+
+    def error(self, msg, *args):
+        self._emit(ERROR, msg, args)
+
+
+# Default sink shared by all loggers
+sink = LogSink()
+
+
+def get_logger(tag, prefix=True):
+    """
+    Returns a Logger writing to the default sink
+
+    Args:
+        tag (str): Tag used for output and rate limiting
+        prefix (bool): Prepend "[tag] " to messages
+    """
+    return Logger(tag, sink, prefix)
+
+
+def set_level(level):
+    """Sets the minimum level of the default sink"""
+    sink.set_level(level)
+
+
+def drain_task():
+    """Returns the drain coroutine of the default sink (add to main tasks)"""
+    return sink.drain_task()
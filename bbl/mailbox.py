@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+V7RC Command Mailbox
+CyberBrick V7RC Controller
+
+Decouples packet reception from actuator updates. Receivers (UDP, BLE)
+only decode into a fixed slot per command type; the control tick applies
+at most one frame per command type. A frame that arrives while the
+previous one of the same type is still pending replaces it (latest wins),
+so bursts of packets within one tick cost one actuator update.
+"""
+
+from array import array
+from bbl.v7rc_parser import new_frame, CMD_NONE
+from bbl.log import get_logger
+
+_log = get_logger('mailbox')
+
+
+class CommandMailbox:
+    """
+    Fixed-slot, latest-wins mailbox for decoded V7RC frames.
+
+    One slot per command code of the parser's registry; nothing grows
+    while running. Commands must be registered before the mailbox is
+    created.
+
+    Example:
+        >>> mailbox = CommandMailbox(parser)
+        >>> mailbox.post(b'SRV1500150015001500#')  # receive side
+        >>> mailbox.apply()                        # control tick
+        >>> mailbox.stats()
+    """
+
+    def __init__(self, parser):
+        """
+        Initialize the mailbox
+
+        Args:
+            parser (V7RCParser): Parser (and command registry) to decode with
+        """
+        self.parser = parser
+        self.registry = parser.registry
+
+        slots = len(self.registry)
+        self.slots = slots
+        self._frames = [new_frame() for _ in range(slots)]
+        self._scratch = new_frame()
+        self._pending = bytearray(slots)
+
+        # Per command code counters
+        self.received = array('L', [0] * slots)
+        self.superseded = array('L', [0] * slots)
+        self.applied = array('L', [0] * slots)
+        self.invalid = 0
+
+    def post(self, msg, addr=None):
+        """
+        Decode a raw frame and store it as the newest of its command type
+
+        Args:
+            msg (bytes|memoryview): Raw 20-byte V7RC frame
+            addr: Source address (unused, matches the receiver callbacks)
+
+        Returns:
+            int: Command code, or CMD_NONE if the frame was invalid
+        """
+        scratch = self._scratch
+        code = self.parser.parse_into(msg, scratch)
+        if code == CMD_NONE or code >= self.slots:
+            self.invalid += 1
+            return CMD_NONE
+
+        # Swap the freshly decoded frame into the slot, old one becomes scratch
+        self._scratch = self._frames[code]
+        self._frames[code] = scratch
+
+        self.received[code] += 1
+        if self._pending[code]:
+            self.superseded[code] += 1
+        else:
+            self._pending[code] = 1
+        return code
+
+    def apply(self):
+        """
+        Apply the pending frame of every command type (call once per tick)
+
+        Returns:
+            int: Number of frames applied
+        """
+        pending = self._pending
+        count = 0
+        for code in range(1, self.slots):
+            if not pending[code]:
+                continue
+            pending[code] = 0
+            count += 1
+            self.applied[code] += 1
+            try:
+                self.registry.dispatch(code, self._frames[code])
+            except Exception as e:
+                _log.error("%s handler error: %s", self.registry.names[code], e)
+        return count
+
+    def pending(self):
+        """Returns True if any frame is waiting to be applied"""
+        return any(self._pending)
+
+    def stats(self):
+        """
+        Returns the counters per command type
+
+        Returns:
+            dict: {name: {'received': int, 'superseded': int,
+                          'applied': int}, ..., 'invalid': int}
+        """
+        result = {'invalid': self.invalid}
+        for code in range(1, self.slots):
+            result[self.registry.names[code]] = {
+                'received': self.received[code],
+                'superseded': self.superseded[code],
+                'applied': self.applied[code],
+            }
+        return result
+
+    def reset_stats(self):
+        """Clears all counters"""
+        for code in range(self.slots):
+            self.received[code] = 0
+            self.superseded[code] = 0
+            self.applied[code] = 0
+        self.invalid = 0
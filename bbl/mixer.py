@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+Channel Mixing
+CyberBrick V7RC Controller
+
+Maps the channels of a decoded V7RC frame to servo and motor outputs. A
+mix is described by a small dict (built-in PRESETS, or MIXES in
+bbl.config) and compiled once at boot:
+
+- inputs: channel, center, span, deadzone and expo become one lookup
+  table per distinct input shape, indexed by |value - center|. The table
+  already holds the normalised value (-2048..2048 after the sign), so
+  scaling, deadzone, clamping and the expo curve cost one index per input.
+- outputs: each output is a row of Q8 coefficients (256 = 1.0) over the
+  normalised inputs, followed by a limit and a deadzone. The sum is
+  rounded toward zero like int(), so fractional coefficients give the
+  same result for both stick directions. Servo outputs map the result
+  onto center ± travel microseconds.
+- servos: channels passed straight to a servo (non-zero values only).
+- neutral: when every input is within this many units of its center the
+  outputs are zeroed (motors stopped, servo outputs at center).
+
+Applying a frame is integer multiply-adds and table lookups only, in
+index loops over the preallocated arrays (no iterator objects).
+
+Example:
+    >>> arcade = {
+    ...     'inputs': ({'ch': 0, 'center': 1500, 'span': 500, 'expo': 30},
+    ...                {'ch': 1, 'center': 1500, 'span': 500}),
+    ...     'outputs': ({'motor': 1, 'mix': (1, 0.5)},
+    ...                 {'motor': 2, 'mix': (1, -0.5)}),
+    ... }
+    >>> mix = Mixer(arcade, motors.set_speed, servos.set_pwm)
+    >>> mix.apply(frame)
+"""
+
+from array import array
+
+FULL = 2048         # Normalised full scale (motor speed units)
+Q = 8               # Coefficient fraction bits
+SERVO_SHIFT = 11    # v * travel >> 11 == v * travel / FULL
+
+# Today's SS8 and SRT behaviour
+PRESETS = {
+    # Channels 1-4 drive the servos; 5-6 are motor speeds with 1275
+    # (hex 7F.8 × 10) as neutral. The app's idle value 0x96 gives speed
+    # 361, so a deadzone of 380 stops the motors at rest.
+    'SS8': {
+        'servos': ((0, 1), (1, 2), (2, 3), (3, 4)),
+        'inputs': ({'ch': 4, 'center': 1275, 'span': 1275},
+                   {'ch': 5, 'center': 1275, 'span': 1275}),
+        'outputs': ({'motor': 1, 'mix': (1, 0), 'deadzone': 380},
+                    {'motor': 2, 'mix': (0, 1), 'deadzone': 380}),
+    },
+    # Tank mixing: CH1 throttle, CH2 steering, left = T + S, right = T - S.
+    # Both sticks within ±50 of 1500 stops the motors. CH3-4 are servos.
+    'SRT': {
+        'servos': ((2, 3), (3, 4)),
+        'inputs': ({'ch': 0, 'center': 1500, 'span': 1000},
+                   {'ch': 1, 'center': 1500, 'span': 1000}),
+        'neutral': 50,
+        'outputs': ({'motor': 1, 'mix': (1, 1)},
+                    {'motor': 2, 'mix': (1, -1)}),
+    },
+}
+
+
+def input_table(span, deadzone=0, expo=0):
+    """
+    Normalised magnitude for every offset from the center
+
+    Args:
+        span (int): Offset that reaches full scale
+        deadzone (int): Offsets below this read as 0
+        expo (int): Expo curve 0-100 (% of cubic blended into linear)
+
+    Returns:
+        array: table[a] for a = 0..span, 0..FULL (truncated like int())
+    """
+    table = array('h', bytes(2 * (span + 1)))
+    full2 = FULL * FULL
+    for a in range(deadzone, span + 1):
+        n = a * FULL // span
+        if expo:
+            n = (n * (100 - expo) * full2 + expo * n * n * n) // (100 * full2)
+        table[a] = n
+    return table
+
+
+class Mixer:
+    """
+    One compiled mix: frame channels -> servo and motor outputs
+    """
+
+    def __init__(self, spec, set_motor, set_servo, tables=None):
+        """
+        Args:
+            spec (dict): Mix description (see PRESETS)
+            set_motor (function): set_motor(motor_idx, speed)
+            set_servo (function): set_servo(servo_idx, pwm_us)
+            tables (dict): Shared input table cache between mixers
+
+        Raises:
+            ValueError: When an output row does not match the inputs
+        """
+        if tables is None:
+            tables = {}
+        self.set_motor = set_motor
+        self.set_servo = set_servo
+
+        passthrough = spec.get('servos', ())
+        self.pass_ch = bytes(ch for ch, _ in passthrough)
+        self.pass_idx = bytes(idx for _, idx in passthrough)
+
+        inputs = spec.get('inputs', ())
+        n_in = len(inputs)
+        self.in_ch = bytes(i['ch'] for i in inputs)
+        self.in_center = array('h', [i['center'] for i in inputs])
+        self.in_table = []
+        for i in inputs:
+            key = (i['span'], i.get('deadzone', 0), i.get('expo', 0))
+            if key not in tables:
+                tables[key] = input_table(*key)
+            self.in_table.append(tables[key])
+        self.neutral = spec.get('neutral', 0)
+        self.norm = array('h', bytes(2 * n_in))
+
+        outputs = spec.get('outputs', ())
+        self.out_set = []
+        self.coef = array('h', bytes(2 * n_in * len(outputs)))
+        self.limit = array('h', bytes(2 * len(outputs)))
+        self.deadzone = array('h', bytes(2 * len(outputs)))
+        self.center = array('h', bytes(2 * len(outputs)))
+        self.travel = array('h', bytes(2 * len(outputs)))
+        out_idx = bytearray(len(outputs))
+        for j, out in enumerate(outputs):
+            mix = out['mix']
+            if len(mix) != n_in:
+                raise ValueError("mix needs one coefficient per input")
+            for i, c in enumerate(mix):
+                self.coef[j * n_in + i] = int(round(c * (1 << Q)))
+            self.limit[j] = out.get('limit', FULL)
+            self.deadzone[j] = out.get('deadzone', 0)
+            if 'servo' in out:
+                self.out_set.append(set_servo)
+                out_idx[j] = out['servo']
+                self.center[j] = out.get('center', 1500)
+                self.travel[j] = out.get('travel', 1000)
+            else:
+                self.out_set.append(set_motor)
+                out_idx[j] = out['motor']
+        self.out_idx = bytes(out_idx)
+
+    def apply(self, frame):
+        """
+        Drive the outputs from one decoded frame
+
+        Args:
+            frame (array): Decoded channel values of the command
+        """
+        pass_ch = self.pass_ch
+        pass_idx = self.pass_idx
+        for k in range(len(pass_ch)):
+            ch = pass_ch[k]
+            if frame[ch] > 0:
+                self.set_servo(pass_idx[k], frame[ch])
+
+        norm = self.norm
+        in_ch = self.in_ch
+        in_center = self.in_center
+        in_table = self.in_table
+        neutral = self.neutral
+        live = not neutral
+        n_in = len(norm)
+        for i in range(n_in):
+            d = frame[in_ch[i]] - in_center[i]
+            table = in_table[i]
+            top = len(table) - 1
+            if d >= 0:
+                norm[i] = table[d if d < top else top]
+            else:
+                norm[i] = -table[-d if -d < top else top]
+            if d >= neutral or -d >= neutral:
+                live = True
+
+        coef = self.coef
+        limit = self.limit
+        deadzone = self.deadzone
+        travel = self.travel
+        out_idx = self.out_idx
+        row = 0
+        for j in range(len(out_idx)):
+            v = 0
+            if live:
+                for i in range(n_in):
+                    v += coef[row + i] * norm[i]
+                # Toward zero (>> alone floors negative sums)
+                v = v >> Q if v >= 0 else -(-v >> Q)
+                lim = limit[j]
+                if v > lim:
+                    v = lim
+                elif v < -lim:
+                    v = -lim
+                if -deadzone[j] < v < deadzone[j]:
+                    v = 0
+            row += n_in
+            if travel[j]:
+                v = self.center[j] + (v * travel[j] >> SERVO_SHIFT)
+            self.out_set[j](out_idx[j], v)
+
+
+def compile_mixes(mixes, set_motor, set_servo):
+    """
+    Compile the built-in presets, overridden or extended by `mixes`
+
+    Args:
+        mixes (dict): Command name -> mix spec (see PRESETS)
+        set_motor, set_servo (function): Output setters
+
+    Returns:
+        dict: Command name -> Mixer
+    """
+    specs = dict(PRESETS)
+    specs.update(mixes)
+    tables = {}
+    return {name: Mixer(spec, set_motor, set_servo, tables)
+            for name, spec in specs.items()}
@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+"""
+Motor Driver Strategies
+CyberBrick V7RC Controller
+
+Each H-bridge type is a class that owns the motor pins and knows how to
+turn a speed into pin duties. MotorsController picks one class at init
+from the configured driver name (and its use_hardware_pwm flag) and then
+only calls the bound methods:
+
+- apply(motor, speed): calibrated duties from the speed tables
+- stop(motor): the driver's stop state (brake high or coast low)
+- tick(): one software PWM step, for when no hardware timer runs it
+
+Everything driver-specific (PWM period, stop level, duty range) is
+resolved to attributes in __init__, so the hot path has no config dict
+lookups or string comparisons.
+
+The base class MotorDriver is itself a driver that drives nothing; it
+stands in when the motor pins were given to another device.
+
+A new driver is added by registering its class:
+
+    >>> class DRV8833(L9110S):
+    ...     pass
+    >>> register_driver('DRV8833', DRV8833)
+    >>> # MOTOR_DRIVER_CONFIG['DRV8833'] = {...} in bbl.config
+"""
+
+from array import array
+from machine import Pin, PWM
+from micropython import const
+from bbl.softpwm import SoftPWM, motor_duties
+from bbl.resources import NullPWM
+
+try:
+    from bbl.config import (
+        SOFTWARE_PWM_PERIOD,
+        SOFTWARE_PWM_CARRIER_HZ,
+        SOFTWARE_PWM_USE_TIMER,
+        SOFTWARE_PWM_TIMER_ID,
+        SOFTWARE_PWM_GPIO_BASE
+    )
+except ImportError:
+    SOFTWARE_PWM_PERIOD = 20
+    SOFTWARE_PWM_CARRIER_HZ = 50
+    SOFTWARE_PWM_USE_TIMER = True
+    SOFTWARE_PWM_TIMER_ID = 0
+    SOFTWARE_PWM_GPIO_BASE = None
+
+# Calibrated speed -> duty tables: one entry per table step of speed
+# (-2048..2048), speeds are truncated towards 0 to a multiple of the step.
+# Each driver sizes its step to its duty range (see speed_shift()), up to
+# SPEED_STEP: software PWM (period <= 256) uses 8, hardware PWM (1023) 2.
+SPEED_SHIFT = const(3)
+SPEED_STEP = const(8)
+HW_PWM_DUTY_MAX = const(1023)
+
+# (driver name, hardware PWM) -> class
+_drivers = {}
+
+
+def speed_shift(period):
+    """
+    Table step (as a shift) for a duty range: the coarsest step up to
+    SPEED_STEP that still gives every duty level its own table entry
+
+    Args:
+        period (int): Duty steps of the driver (full on)
+
+    Returns:
+        int: Speed shift, 1 << shift is the table step
+    """
+    shift = SPEED_SHIFT
+    while shift and (2048 >> shift) < period:
+        shift -= 1
+    return shift
+
+
+def register_driver(name, cls, hardware_pwm=False):
+    """
+    Make a driver class available to MotorsController
+
+    Args:
+        name (str): Driver name as used in MOTOR_DRIVER_TYPE/MOTOR_DRIVER_CONFIG
+        cls (type): MotorDriver subclass
+        hardware_pwm (bool): Used when the config sets use_hardware_pwm
+    """
+    _drivers[(name, hardware_pwm)] = cls
+
+
+def create_driver(name, config, gpios, hardware_pwm=None):
+    """
+    Instantiate the driver class registered for a config
+
+    Args:
+        name (str): Driver name
+        config (dict): The driver's MOTOR_DRIVER_CONFIG entry
+        gpios (tuple): Motor 1 channel 1/2, motor 2 channel 1/2
+        hardware_pwm (bool): Overrides the config's use_hardware_pwm
+            (set from the LEDC channels bbl.resources granted)
+
+    Returns:
+        MotorDriver: Driver with its pins initialised and motors stopped
+    """
+    if hardware_pwm is None:
+        hardware_pwm = config.get('use_hardware_pwm', False)
+    cls = _drivers.get((name, hardware_pwm))
+    if cls is None:
+        # Unknown combination: generic driver of the same PWM kind
+        cls = HardwarePWMDriver if hardware_pwm else L298N
+    return cls(config, gpios)
+
+
+class MotorDriver:
+    """
+    Base class: speed tables shared by all drivers
+
+    Used as is, it accepts every call and drives no pin (`pins` are
+    NullPWM stand-ins). Subclasses set `period` (duty steps) and
+    `stop_high` before calling build_lut(), open their pins and override
+    apply(), stop() and tick(). build_lut() sets `speed_shift`, the table
+    step sized to `period`.
+    """
+
+    period = SOFTWARE_PWM_PERIOD
+    stop_high = False
+    hardware_pwm = False
+
+    def __init__(self, config, gpios):
+        self.config = config
+        self.gpios = gpios
+        self.lut1_1 = self.lut1_2 = self.lut2_1 = self.lut2_2 = None
+        self.speed_shift = SPEED_SHIFT
+        self._speed_zero = 2048 >> SPEED_SHIFT
+        self._speed_top = 4096 >> SPEED_SHIFT
+        self.pins = [NullPWM() for _ in gpios]
+
+    def build_lut(self, motor, forward, reverse):
+        """
+        Precomputes the calibrated duties of a motor for every table speed
+
+        Args:
+            motor (int): 1 or 2
+            forward (int): Forward gain in 1/10000 (10000 = unchanged)
+            reverse (int): Reverse gain in 1/10000
+        """
+        period = self.period
+        stop_high = self.stop_high
+        shift = speed_shift(period)
+        top = 4096 >> shift
+        self.speed_shift = shift
+        self._speed_zero = top >> 1
+        self._speed_top = top
+        lut1 = array('H', bytes(2 * (top + 1)))
+        lut2 = array('H', bytes(2 * (top + 1)))
+        for k in range(top + 1):
+            speed = (k << shift) - 2048
+            if speed > 0:
+                speed = min(2048, speed * forward // 10000)
+            elif speed < 0:
+                speed = -min(2048, -speed * reverse // 10000)
+            lut1[k], lut2[k] = motor_duties(speed, period, stop_high)
+        if motor == 1:
+            self.lut1_1 = lut1
+            self.lut1_2 = lut2
+        else:
+            self.lut2_1 = lut1
+            self.lut2_2 = lut2
+
+    def apply(self, motor, speed):
+        """Drive a motor at a speed (-2048..2048); False for a bad index"""
+        return motor == 1 or motor == 2
+
+    def stop(self, motor):
+        """Stop a motor; False for a bad index"""
+        return motor == 1 or motor == 2
+
+    def tick(self):
+        """One software PWM step (no-op when not needed)"""
+        pass
+
+    def needs_tick(self):
+        """True if the control loop has to call tick()"""
+        return False
+
+
+class SoftPWMDriver(MotorDriver):
+    """
+    H-bridge on plain digital pins with a software PWM carrier
+    """
+
+    def __init__(self, config, gpios):
+        super().__init__(config, gpios)
+        self.period = config.get('pwm_period', SOFTWARE_PWM_PERIOD)
+        self.pins = [Pin(gpio, Pin.OUT) for gpio in gpios]
+        for pin in self.pins:
+            pin.value(1 if self.stop_high else 0)
+        print("[motors] Initialized digital pins")
+
+        # Software PWM carrier, stepped by a hardware timer if possible
+        carrier = config.get('pwm_carrier_hz', SOFTWARE_PWM_CARRIER_HZ)
+        idle = self.period if self.stop_high else 0
+        self.soft_pwm = SoftPWM(self.pins, self.period, carrier, [idle] * 4,
+                                gpios=list(gpios), gpio_base=SOFTWARE_PWM_GPIO_BASE)
+        if SOFTWARE_PWM_USE_TIMER and self.soft_pwm.start(SOFTWARE_PWM_TIMER_ID):
+            print(f"[motors] Software PWM: {carrier} Hz carrier on timer {SOFTWARE_PWM_TIMER_ID}")
+        else:
+            print("[motors] Software PWM: stepped by control loop")
+        self._set_duties = self.soft_pwm.set_duties
+        self._stop = motor_duties(0, self.period, self.stop_high)
+
+    def apply(self, motor, speed):
+        if speed >= 0:
+            k = self._speed_zero + (speed >> self.speed_shift)
+            if k > self._speed_top:
+                k = self._speed_top
+        else:
+            k = self._speed_zero - (-speed >> self.speed_shift)
+            if k < 0:
+                k = 0
+        if motor == 1:
+            self._set_duties(0, self.lut1_1[k], self.lut1_2[k])
+        elif motor == 2:
+            self._set_duties(2, self.lut2_1[k], self.lut2_2[k])
+        else:
+            return False
+        return True
+
+    def stop(self, motor):
+        if motor == 1:
+            self._set_duties(0, *self._stop)
+        elif motor == 2:
+            self._set_duties(2, *self._stop)
+        else:
+            return False
+        return True
+
+    def tick(self):
+        # Only when no hardware timer steps the carrier
+        if not self.soft_pwm.running():
+            self.soft_pwm.tick()
+
+    def needs_tick(self):
+        return not self.soft_pwm.running()
+
+
+class L298N(SoftPWMDriver):
+    """L298N: both inputs high brakes the motor"""
+    stop_high = True
+
+
+class TB6612(SoftPWMDriver):
+    """TB6612FNG: both inputs high brakes the motor"""
+    stop_high = True
+
+
+class L9110S(SoftPWMDriver):
+    """L9110S with software PWM: both inputs low coasts the motor"""
+    stop_high = False
+
+
+class HardwarePWMDriver(MotorDriver):
+    """
+    H-bridge on four LEDC hardware PWM channels (duty 0-1023)
+    """
+
+    period = HW_PWM_DUTY_MAX
+    hardware_pwm = True
+
+    def __init__(self, config, gpios):
+        super().__init__(config, gpios)
+        freq = config.get('pwm_freq', 1000)
+        self.pins = [PWM(Pin(gpio), freq=freq) for gpio in gpios]
+        stop = HW_PWM_DUTY_MAX if self.stop_high else 0
+        for pwm in self.pins:
+            pwm.duty(stop)
+        self.m1_a, self.m1_b, self.m2_a, self.m2_b = self.pins
+        self._stop = stop
+        print("[motors] Initialized hardware PWM")
+
+    def apply(self, motor, speed):
+        if speed >= 0:
+            k = self._speed_zero + (speed >> self.speed_shift)
+            if k > self._speed_top:
+                k = self._speed_top
+        else:
+            k = self._speed_zero - (-speed >> self.speed_shift)
+            if k < 0:
+                k = 0
+        if motor == 1:
+            self.m1_a.duty(self.lut1_1[k])
+            self.m1_b.duty(self.lut1_2[k])
+        elif motor == 2:
+            self.m2_a.duty(self.lut2_1[k])
+            self.m2_b.duty(self.lut2_2[k])
+        else:
+            return False
+        return True
+
+    def stop(self, motor):
+        if motor == 1:
+            self.m1_a.duty(self._stop)
+            self.m1_b.duty(self._stop)
+        elif motor == 2:
+            self.m2_a.duty(self._stop)
+            self.m2_b.duty(self._stop)
+        else:
+            return False
+        return True
+
+
+class L9110SHardware(HardwarePWMDriver):
+    """L9110S on hardware PWM: IA=PWM, IB=0 forward; IA=0, IB=PWM reverse"""
+    stop_high = False
+
+
+class L298NHardware(HardwarePWMDriver):
+    """L298N on hardware PWM: both inputs high brakes the motor"""
+    stop_high = True
+
+
+class TB6612Hardware(HardwarePWMDriver):
+    """TB6612FNG on hardware PWM: both inputs high brakes the motor"""
+    stop_high = True
+
+
+register_driver('L298N', L298N)
+register_driver('L298N', L298NHardware, hardware_pwm=True)
+register_driver('TB6612', TB6612)
+register_driver('TB6612', TB6612Hardware, hardware_pwm=True)
+register_driver('L9110S', L9110S)
+register_driver('L9110S', L9110SHardware, hardware_pwm=True)
@@ -1,7 +1,10 @@
 # -*-coding:utf-8-*-
-from machine import Pin, PWM
+from machine import Pin
 import utime
 import os
+from bbl.log import get_logger
+from bbl.motor_drivers import create_driver, MotorDriver
+from bbl import resources
 
 # Import configuration
 try:
@@ -9,9 +12,7 @@ try:
         MOTOR_DRIVER_TYPE,
         MOTOR_DRIVER_CONFIG,
         AUTO_DETECT_ENABLED,
-        DETECTED_DRIVER_FILE,
-        SOFTWARE_PWM_PERIOD,
-        L9110S_PWM_PERIOD
+        DETECTED_DRIVER_FILE
     )
 except ImportError:
     # Fallback to default if config not found
@@ -21,14 +22,14 @@ except ImportError:
     }
     AUTO_DETECT_ENABLED = False
     DETECTED_DRIVER_FILE = 'detected_driver.txt'
-    SOFTWARE_PWM_PERIOD = 20
-    L9110S_PWM_PERIOD = 100
 
 MOTOR1_CHANNEL1 = 4
 MOTOR1_CHANNEL2 = 5
 MOTOR2_CHANNEL1 = 6
 MOTOR2_CHANNEL2 = 7
 
+_log = get_logger('motors')
+
 # PERIOD will be set dynamically based on driver type
 
 
@@ -77,28 +78,38 @@ class MotorsController:
         print(f"[motors] Using driver: {self.driver_type}")
         print(f"[motors] Config: {self.driver_config['description']}")
 
-        # Set PWM period based on driver type
-        self.period = self.driver_config.get('pwm_period', SOFTWARE_PWM_PERIOD)
-        print(f"[motors] PWM period: {self.period} steps")
-
-        # Initialize motor control variables
-        self.motor1_1_duty = 0
-        self.motor1_2_duty = 0
-        self.motor2_1_duty = 0
-        self.motor2_2_duty = 0
-
         self.motor_params = {
             1: {'forward_speed': 100, 'reverse_speed': 100, 'offset': 0},
             2: {'forward_speed': 100, 'reverse_speed': 100, 'offset': 0}
         }
 
-        self.period_cnt = 0
-
-        # Initialize pins based on driver type
-        if self.driver_config['use_hardware_pwm']:
-            self._init_hardware_pwm()
+        # Hardware PWM only with four free LEDC channels (bbl.resources);
+        # the boot plan may grant them even if the config asks for software
+        gpios = (MOTOR1_CHANNEL1, MOTOR1_CHANNEL2, MOTOR2_CHANNEL1, MOTOR2_CHANNEL2)
+        grant = resources.acquire('motors', gpios,
+                                  pwm=self.driver_config.get('use_hardware_pwm', False),
+                                  fallback=True)
+
+        # Driver strategy (see bbl.motor_drivers): owns the pins, chosen
+        # once here so set_speed/stop only call its bound methods. Without
+        # the pins the base driver keeps the API working and drives nothing
+        if grant == resources.DENIED:
+            _log.error("Motor pins are assigned to another device, see ?RES")
+            self.driver = MotorDriver(self.driver_config, gpios)
         else:
-            self._init_digital_pins()
+            self.driver = create_driver(self.driver_type, self.driver_config, gpios,
+                                        hardware_pwm=grant == resources.PWM)
+        self._apply = self.driver.apply
+        self._stop = self.driver.stop
+        self.period = self.driver.period
+        self.stop_high = self.driver.stop_high
+        self.soft_pwm = getattr(self.driver, 'soft_pwm', None)
+        self.motor1_1, self.motor1_2, self.motor2_1, self.motor2_2 = self.driver.pins
+        print(f"[motors] PWM period: {self.period} steps")
+
+        # Calibrated (duty1, duty2) per speed, rebuilt when a rate changes
+        self._build_speed_lut(1)
+        self._build_speed_lut(2)
 
     def _get_driver_type(self):
         """
@@ -145,6 +156,11 @@ class MotorsController:
         
         Returns 'L9110S' or 'L298N'
         """
+        # The pins belong to another device in the boot plan: keep off them
+        if resources.grants().get('motors') == 'denied':
+            print("[motors] Pins not granted, skipping detection: L9110S")
+            return 'L9110S'
+
         # Create test pins
         test_pin1 = Pin(MOTOR1_CHANNEL1, Pin.OUT)
         test_pin2 = Pin(MOTOR1_CHANNEL2, Pin.OUT)
@@ -178,93 +194,19 @@ class MotorsController:
         print("[motors] Detected: L9110S (default for AUTO mode)")
         return 'L9110S'
 
-    def _init_hardware_pwm(self):
-        """
-        Initialize motor pins with hardware PWM (for L9110S).
-        """
-        freq = self.driver_config['pwm_freq']
-        
-        self.motor1_1 = PWM(Pin(MOTOR1_CHANNEL1), freq=freq)
-        self.motor1_2 = PWM(Pin(MOTOR1_CHANNEL2), freq=freq)
-        self.motor2_1 = PWM(Pin(MOTOR2_CHANNEL1), freq=freq)
-        self.motor2_2 = PWM(Pin(MOTOR2_CHANNEL2), freq=freq)
-        
-        # Set to stop state (0% duty = LOW for L9110S)
-        self.motor1_1.duty(0)
-        self.motor1_2.duty(0)
-        self.motor2_1.duty(0)
-        self.motor2_2.duty(0)
-        
-        print("[motors] Initialized hardware PWM")
-
-    def _init_digital_pins(self):
-        """
-        Initialize motor pins as digital outputs (for L298N/TB6612).
-        """
-        self.motor1_1 = Pin(MOTOR1_CHANNEL1, Pin.OUT)
-        self.motor1_2 = Pin(MOTOR1_CHANNEL2, Pin.OUT)
-        self.motor2_1 = Pin(MOTOR2_CHANNEL1, Pin.OUT)
-        self.motor2_2 = Pin(MOTOR2_CHANNEL2, Pin.OUT)
-        
-        # Set to stop state (HIGH for L298N/TB6612)
-        if self.driver_config['stop_state'] == 'high':
-            self.motor1_1.on()
-            self.motor1_2.on()
-            self.motor2_1.on()
-            self.motor2_2.on()
-        else:
-            self.motor1_1.off()
-            self.motor1_2.off()
-            self.motor2_1.off()
-            self.motor2_2.off()
-        
-        print("[motors] Initialized digital pins")
-
     def motors_period_cb(self):
         """
-        Updates the duty cycles of the motors based on the current motor duty.
-        This method simulates PWM by turning the motors on and off in intervals.
+        Advances the software PWM by one step when no hardware timer drives it.
         
-        Only used for software PWM mode (L298N/TB6612).
-        For hardware PWM mode (L9110S), this method does nothing.
+        Only used for software PWM mode (L298N/TB6612/L9110S) when the
+        timer could not be started; otherwise the timer steps the PWM and
+        this method does nothing. For hardware PWM mode it does nothing.
 
         This method should be called periodically to update motor speed.
         Example:
             >>> motors.motors_period_cb()  # Periodically update motor speed
         """
-        # Skip if using hardware PWM
-        if self.driver_config['use_hardware_pwm']:
-            return
-        
-        self.period_cnt = (self.period_cnt + 1) % self.period
-
-        if self.motor1_1_duty == 0 and self.motor1_2_duty == 0:
-            self.motor1_1.on()
-            self.motor1_2.on()
-        else:
-            if self.period_cnt >= self.motor1_1_duty:
-                self.motor1_1.off()
-            else:
-                self.motor1_1.on()
-
-            if self.period_cnt >= self.motor1_2_duty:
-                self.motor1_2.off()
-            else:
-                self.motor1_2.on()
-
-        if self.motor2_1_duty == 0 and self.motor2_2_duty == 0:
-            self.motor2_1.on()
-            self.motor2_1.on()
-        else:
-            if self.period_cnt >= self.motor2_1_duty:
-                self.motor2_1.off()
-            else:
-                self.motor2_1.on()
-
-            if self.period_cnt >= self.motor2_2_duty:
-                self.motor2_2.off()
-            else:
-                self.motor2_2.on()
+        self.driver.tick()
 
     def set_speed(self, motor_idx, speed):
         """
@@ -290,24 +232,10 @@ class MotorsController:
             >>> # Set motor 2 to move reverse at a quarter speed
             >>> motors.set_speed(2, -512)
         """
-        if motor_idx == 1:
-            duty1, duty2 = self._speed_handler(speed)
-            if self.driver_config['use_hardware_pwm']:
-                self.motor1_1.duty(duty1)
-                self.motor1_2.duty(duty2)
-            else:
-                self.motor1_1_duty = duty1
-                self.motor1_2_duty = duty2
-        elif motor_idx == 2:
-            duty1, duty2 = self._speed_handler(speed)
-            if self.driver_config['use_hardware_pwm']:
-                self.motor2_1.duty(duty1)
-                self.motor2_2.duty(duty2)
-            else:
-                self.motor2_1_duty = duty1
-                self.motor2_2_duty = duty2
-        else:
-            print("[motors]Invalid motor index. Must be between 1 and 2.")
+        # Calibrated duties from the driver's speed tables (forward/reverse
+        # rate and offset already applied, see _build_speed_lut)
+        if not self._apply(motor_idx, speed):
+            _log.warn("Invalid motor index. Must be between 1 and 2.")
 
     def set_tank_mode(self, throttle_pwm, steering_pwm):
         """
@@ -328,11 +256,13 @@ class MotorsController:
             >>> # Turn right while moving: throttle=1800, steering=1800
             >>> motors.set_tank_mode(1800, 1800)
         """
-        # Convert PWM values (0-2000) to -1024 to +1024 range
-        # 1500 is neutral (center) - FIXED from 1000!
+        # Convert PWM values (0-2000) to -2048 to +2048 range
+        # 1500 is neutral (center); integer division truncates like int()
         NEUTRAL = 1500
-        throttle = int((throttle_pwm - NEUTRAL) * 2048 / 1000)
-        steering = int((steering_pwm - NEUTRAL) * 2048 / 1000)
+        throttle = throttle_pwm - NEUTRAL
+        steering = steering_pwm - NEUTRAL
+        throttle = throttle * 2048 // 1000 if throttle >= 0 else -(-throttle * 2048 // 1000)
+        steering = steering * 2048 // 1000 if steering >= 0 else -(-steering * 2048 // 1000)
         
         # Clamp to valid range
         throttle = max(-2048, min(2048, throttle))
@@ -365,33 +295,7 @@ class MotorsController:
             >>> motors.stop(1)  # Stop motor 1
             >>> motors.stop(2)  # Stop motor 2
         """
-        if motor_idx == 1:
-            if self.driver_config['use_hardware_pwm']:
-                self.motor1_1.duty(0)
-                self.motor1_2.duty(0)
-            else:
-                self.motor1_1_duty = 0
-                self.motor1_2_duty = 0
-                if self.driver_config['stop_state'] == 'high':
-                    self.motor1_1.on()
-                    self.motor1_2.on()
-                else:
-                    self.motor1_1.off()
-                    self.motor1_2.off()
-        elif motor_idx == 2:
-            if self.driver_config['use_hardware_pwm']:
-                self.motor2_1.duty(0)
-                self.motor2_2.duty(0)
-            else:
-                self.motor2_1_duty = 0
-                self.motor2_2_duty = 0
-                if self.driver_config['stop_state'] == 'high':
-                    self.motor2_1.on()
-                    self.motor2_2.on()
-                else:
-                    self.motor2_1.off()
-                    self.motor2_2.off()
-        else:
+        if not self._stop(motor_idx):
             raise ValueError(
                 "[motors]Invalid motor index. Must be between 1 and 2.")
 
@@ -414,10 +318,11 @@ class MotorsController:
         if motor_idx in self.motor_params:
             if 0 <= val <= 100:
                 self.motor_params[motor_idx]['forward_speed'] = val
+                self._build_speed_lut(motor_idx)
             else:
-                print("[motors]Parameter value out of range (0-100).")
+                _log.warn("Parameter value out of range (0-100).")
         else:
-            print("[motors]Invalid motor index or parameter.")
+            _log.warn("Invalid motor index or parameter.")
 
     def set_reverse_rate(self, motor_idx, val):
         """
@@ -436,15 +341,19 @@ class MotorsController:
         if motor_idx in self.motor_params:
             if 0 <= val <= 100:
                 self.motor_params[motor_idx]['reverse_speed'] = val
+                self._build_speed_lut(motor_idx)
             else:
-                print("[motors]Parameter value out of range (0-100).")
+                _log.warn("Parameter value out of range (0-100).")
         else:
-            print("[motors]Invalid motor index or parameter.")
+            _log.warn("Invalid motor index or parameter.")
 
     def set_offset(self, motor_idx, val):
         """
         Sets the offset for the specified motor.
 
+        The offset balances two motors: every non-zero speed is scaled by
+        (100 + offset)%, on top of the forward/reverse rate.
+
         Args:
             motor_idx (int): Index of the motor (1 or 2).
             val (int): The offset value, in the range [-100, 100].
@@ -457,10 +366,11 @@ class MotorsController:
         if motor_idx in self.motor_params:
             if -100 <= val <= 100:
                 self.motor_params[motor_idx]['offset'] = val
+                self._build_speed_lut(motor_idx)
             else:
-                print("[motors]Parameter value out of range (-100-100).")
+                _log.warn("Parameter value out of range (-100-100).")
         else:
-            print("[motors]Invalid motor index or parameter.")
+            _log.warn("Invalid motor index or parameter.")
 
     # Getter methods for motor parameters
 
@@ -483,7 +393,7 @@ class MotorsController:
         if motor_idx in self.motor_params:
             return self.motor_params[motor_idx]['forward_speed']
         else:
-            print("[motors] Invalid motor index.")
+            _log.warn("Invalid motor index.")
             return None
 
     def get_reverse_rate(self, motor_idx):
@@ -505,7 +415,7 @@ class MotorsController:
         if motor_idx in self.motor_params:
             return self.motor_params[motor_idx]['reverse_speed']
         else:
-            print("[motors] Invalid motor index.")
+            _log.warn("Invalid motor index.")
             return None
 
     def get_offset(self, motor_idx):
@@ -526,42 +436,21 @@ class MotorsController:
         if motor_idx in self.motor_params:
             return self.motor_params[motor_idx]['offset']
         else:
-            print("[motors] Invalid motor index.")
+            _log.warn("Invalid motor index.")
             return None
 
-    def _speed_handler(self, speed):
+    def _build_speed_lut(self, motor_idx):
         """
-        Converts a speed value to duty cycle values for two motor channels.
-        Handles both software PWM (L298N/TB6612/L9110S) and hardware PWM.
+        Precomputes the calibrated duties of a motor for every table speed.
+
+        The forward/reverse rate and the offset are applied here, so
+        set_speed() only indexes the tables. Called at init and whenever
+        a rate or the offset of the motor changes.
 
         Args:
-            speed (int): Speed value to convert (-2048 to 2048).
-        Returns:
-            tuple: A tuple containing the duty cycle values for
-                the two motor channels.
+            motor_idx (int): Index of the motor (1 or 2).
         """
-        if self.driver_config['use_hardware_pwm']:
-            # Hardware PWM: duty range 0-1023
-            # L9110S: IA=PWM, IB=0 for forward; IA=0, IB=PWM for reverse
-            if speed > 0:
-                pwm1 = int(speed * 1023 / 2048)
-                pwm2 = 0
-            elif speed < 0:
-                pwm1 = 0
-                pwm2 = int(-speed * 1023 / 2048)
-            else:
-                pwm1 = 0
-                pwm2 = 0
-        else:
-            # Software PWM: duty range 0-PERIOD
-            # L298N/TB6612/L9110S: digital switching with software PWM
-            if speed > 0:
-                pwm1 = int(speed * self.period / 2048)
-                pwm2 = 0
-            elif speed < 0:
-                pwm1 = 0
-                pwm2 = int(-speed * self.period / 2048)
-            else:
-                pwm1 = 0
-                pwm2 = 0
-        return pwm1, pwm2
+        params = self.motor_params[motor_idx]
+        self.driver.build_lut(motor_idx,
+                              params['forward_speed'] * (100 + params['offset']),
+                              params['reverse_speed'] * (100 + params['offset']))
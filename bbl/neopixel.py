@@ -1,8 +1,21 @@
 # NeoPixel driver for MicroPython
 # MIT license; Copyright (c) 2016 Damien P. George, 2021 Jim Mussared
+#
+# The one NeoPixel driver of the project (bbl.leds and the simulator's
+# neopixel module use it). On top of the MicroPython driver:
+# - RGB pixels go straight into the GRB buffer and fill_mask() sets every
+#   pixel of a bit mask in one pass
+# - write() only clocks the buffer out (a blocking bitstream) when a pixel
+#   changed since the last write; code that edits buf directly sets
+#   dirty = True
+# - pin None keeps a buffer without output (port given to another device)
 
 from machine import bitstream
 
+# Strip writes done and skipped (buffer unchanged), all strips
+counters = {'writes': 0, 'skipped': 0}
+
+
 class NeoPixel:
     # G R B W
     ORDER = (1, 0, 2, 3)
@@ -12,7 +25,8 @@ class NeoPixel:
         self.n = n
         self.bpp = bpp
         self.buf = bytearray(n * bpp)
-        self.pin.init(pin.OUT)
+        if pin is not None:
+            pin.init(pin.OUT)
         # Timing arg can either be 1 for 800kHz or 0 for 400kHz,
         # or a user-specified timing ns tuple (high_0, low_0, high_1, low_1).
         self.timing = (
@@ -20,30 +34,71 @@ class NeoPixel:
             if isinstance(timing, int)
             else timing
         )
+        # The strip state is unknown until the first write
+        self.dirty = True
 
     def __len__(self):
         return self.n
 
+    def _pixel(self, v):
+        # Color tuple -> pixel bytes in buffer order (ORDER is its own inverse)
+        if self.bpp == 3:
+            return bytes((v[1], v[0], v[2]))
+        return bytes(v[o] for o in self.ORDER[:self.bpp])
+
+    def _put(self, offset, px):
+        buf = self.buf
+        for k in range(self.bpp):
+            if buf[offset + k] != px[k]:
+                buf[offset + k] = px[k]
+                self.dirty = True
+
     def __setitem__(self, i, v):
         offset = i * self.bpp
-        for i in range(self.bpp):
-            self.buf[offset + self.ORDER[i]] = v[i]
+        buf = self.buf
+        if self.bpp == 3:
+            g = v[1]
+            r = v[0]
+            b = v[2]
+            if buf[offset] != g or buf[offset + 1] != r or buf[offset + 2] != b:
+                buf[offset] = g
+                buf[offset + 1] = r
+                buf[offset + 2] = b
+                self.dirty = True
+        else:
+            self._put(offset, self._pixel(v))
 
     def __getitem__(self, i):
         offset = i * self.bpp
         return tuple(self.buf[offset + self.ORDER[i]] for i in range(self.bpp))
 
     def fill(self, v):
-        b = self.buf
-        l = len(self.buf)
+        px = self._pixel(v)
+        for offset in range(0, len(self.buf), self.bpp):
+            self._put(offset, px)
+
+    def fill_mask(self, mask, v, other=None):
+        """
+        Sets the pixels whose bit is set in mask (bit 0 = pixel 0) to v and,
+        if given, all the other pixels to `other`
+        """
+        px = self._pixel(v)
+        off = None if other is None else self._pixel(other)
         bpp = self.bpp
-        for i in range(bpp):
-            c = v[i]
-            j = self.ORDER[i]
-            while j < l:
-                b[j] = c
-                j += bpp
+        for i in range(self.n):
+            if mask >> i & 1:
+                self._put(i * bpp, px)
+            elif off is not None:
+                self._put(i * bpp, off)
 
     def write(self):
-        # BITSTREAM_TYPE_HIGH_LOW = 0
-        bitstream(self.pin, 0, self.timing, self.buf)
+        """Sends the buffer if it changed; returns True if it was sent"""
+        if not self.dirty:
+            counters['skipped'] += 1
+            return False
+        self.dirty = False
+        if self.pin is not None:
+            counters['writes'] += 1
+            # BITSTREAM_TYPE_HIGH_LOW = 0
+            bitstream(self.pin, 0, self.timing, self.buf)
+        return True
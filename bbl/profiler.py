@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+"""
+Control Loop CPU Profiler
+CyberBrick V7RC Controller
+
+Times every scheduler task (servo stepping, LED effects, loop-stepped motor
+PWM, music, mailbox) and every V7RC command handler in microseconds:
+
+    min / avg / max     since enable() or the last reset
+    p99                 over the last WINDOW calls of each stage
+
+A tick is one scheduler pass. A tick that takes longer than the budget is
+counted and blamed on the stage that used most of it; the last few
+over-budget ticks are kept with their culprit. Stage times include nested
+calls (the mailbox includes its handlers), but blame goes by a stage's own
+time, so a slow handler is blamed rather than the mailbox calling it.
+
+All storage is preallocated in enable(). Disabled (the default) the
+profiler costs nothing: enable() swaps timing wrappers into the scheduler
+and command registry tables, disable() puts the plain functions back.
+
+Example:
+    >>> from bbl import profiler
+    >>> profiler.enable(scheduler, parser.registry, budget_us=2000)
+    >>> profiler.print_report()         # REPL
+    >>> # Remotely: send diag.query(b'PRF') over UDP or BLE
+"""
+
+import utime
+from array import array
+from bbl import diag
+from bbl.log import get_logger
+
+try:
+    from bbl.config import PROFILE_BUDGET_US
+except ImportError:
+    PROFILE_BUDGET_US = 2000
+
+WINDOW = 100    # Samples per stage for the rolling p99
+EVENTS = 8      # Over-budget ticks kept for the report
+
+_NO_STAGE = 0xFF
+
+_log = get_logger('prof')
+
+
+class Profiler:
+    """
+    Per-stage timing for one scheduler and command registry
+    """
+
+    def __init__(self, scheduler, registry=None, budget_us=PROFILE_BUDGET_US):
+        """
+        Args:
+            scheduler (Scheduler): Control loop whose tasks are timed
+            registry (CommandRegistry, optional): Command handlers to time
+            budget_us (int): Longest acceptable scheduler pass
+        """
+        self.scheduler = scheduler
+        self.registry = registry
+        self.budget_us = budget_us
+
+        # Stages: scheduler tasks first, then command handlers
+        self.names = list(scheduler.names)
+        self._handler_codes = []
+        if registry is not None:
+            for code in range(1, len(registry)):
+                if registry.handlers[code] is not None:
+                    self._handler_codes.append(code)
+                    self.names.append(registry.names[code])
+        n = len(self.names)
+
+        self.count = array('L', [0] * n)
+        self.sum_us = array('Q', [0] * n)
+        self.min_us = array('L', [0xFFFFFFFF] * n)
+        self.max_us = array('L', [0] * n)
+        self.window = array('L', [0] * (n * WINDOW))
+        self._wpos = bytearray(n)
+        self.blamed = array('L', [0] * n)
+
+        self.ticks = 0
+        self.over_budget = 0
+        # Ring of the last over-budget ticks: (ticks_ms, tick us, stage, stage us)
+        self._ev_ms = array('L', [0] * EVENTS)
+        self._ev_us = array('L', [0] * EVENTS)
+        self._ev_stage = bytearray([_NO_STAGE] * EVENTS)
+        self._ev_stage_us = array('L', [0] * EVENTS)
+        self._ev_pos = 0
+
+        # Current tick
+        self._inner_us = 0
+        self._worst = _NO_STAGE
+        self._worst_us = 0
+
+        self._orig_funcs = None
+        self._orig_handlers = None
+
+    def _record(self, idx, us):
+        self.count[idx] += 1
+        self.sum_us[idx] += us
+        if us < self.min_us[idx]:
+            self.min_us[idx] = us
+        if us > self.max_us[idx]:
+            self.max_us[idx] = us
+        pos = self._wpos[idx]
+        self.window[idx * WINDOW + pos] = us
+        self._wpos[idx] = pos + 1 if pos + 1 < WINDOW else 0
+
+    def _finish(self, idx, t0):
+        # Record a stage call; time spent in nested stages is not its own
+        us = utime.ticks_diff(utime.ticks_us(), t0)
+        self._record(idx, us)
+        own = us - self._inner_us
+        if own > self._worst_us:
+            self._worst_us = own
+            self._worst = idx
+        return us
+
+    def _wrap_task(self, idx, func):
+        def timed():
+            inner = self._inner_us
+            self._inner_us = 0
+            t0 = utime.ticks_us()
+            try:
+                func()
+            finally:
+                # Also on exceptions, or the caller's nested time is lost
+                self._inner_us = inner + self._finish(idx, t0)
+        return timed
+
+    def _wrap_handler(self, idx, func):
+        def timed(frame):
+            inner = self._inner_us
+            self._inner_us = 0
+            t0 = utime.ticks_us()
+            try:
+                func(frame)
+            finally:
+                self._inner_us = inner + self._finish(idx, t0)
+        return timed
+
+    def _run_once(self):
+        # Scheduler pass with per-tick budget accounting
+        self._worst = _NO_STAGE
+        self._worst_us = 0
+        t0 = utime.ticks_us()
+        wait = self._orig_run_once()
+        us = utime.ticks_diff(utime.ticks_us(), t0)
+        self.ticks += 1
+        if us > self.budget_us:
+            self._over_budget(us)
+        return wait
+
+    def _over_budget(self, us):
+        self.over_budget += 1
+        stage = self._worst
+        if stage != _NO_STAGE:
+            self.blamed[stage] += 1
+        pos = self._ev_pos
+        self._ev_ms[pos] = utime.ticks_ms()
+        self._ev_us[pos] = us
+        self._ev_stage[pos] = stage
+        self._ev_stage_us[pos] = self._worst_us
+        self._ev_pos = (pos + 1) % EVENTS
+        _log.warn("Tick %d us over %d us budget: %s %d us", us, self.budget_us,
+                  self._stage_name(stage), self._worst_us)
+
+    def _stage_name(self, stage):
+        return self.names[stage] if stage != _NO_STAGE else '-'
+
+    def attach(self):
+        """Install the timing wrappers"""
+        sched = self.scheduler
+        self._orig_funcs = list(sched.funcs)
+        for i in range(len(sched.funcs)):
+            sched.funcs[i] = self._wrap_task(i, sched.funcs[i])
+        self._orig_run_once = sched.run_once
+        sched.run_once = self._run_once
+
+        if self.registry is not None:
+            handlers = self.registry.handlers
+            self._orig_handlers = list(handlers)
+            idx = len(sched.names)
+            for code in self._handler_codes:
+                handlers[code] = self._wrap_handler(idx, handlers[code])
+                idx += 1
+
+    def detach(self):
+        """Remove the wrappers (back to the functions found by attach())"""
+        sched = self.scheduler
+        sched.funcs[:] = self._orig_funcs
+        sched.run_once = self._orig_run_once
+        if self.registry is not None:
+            self.registry.handlers[:] = self._orig_handlers
+
+    def reset(self):
+        """Clears all counters and samples"""
+        for a in (self.count, self.sum_us, self.max_us, self.window, self.blamed,
+                  self._ev_ms, self._ev_us, self._ev_stage_us):
+            for i in range(len(a)):
+                a[i] = 0
+        for i in range(len(self.min_us)):
+            self.min_us[i] = 0xFFFFFFFF
+        for i in range(len(self._wpos)):
+            self._wpos[i] = 0
+        for i in range(EVENTS):
+            self._ev_stage[i] = _NO_STAGE
+        self.ticks = 0
+        self.over_budget = 0
+        self._ev_pos = 0
+
+    def p99(self, idx):
+        """99th percentile (us) of the last WINDOW calls of a stage"""
+        n = self.count[idx]
+        if n > WINDOW:
+            n = WINDOW
+        if not n:
+            return 0
+        base = idx * WINDOW
+        samples = sorted(self.window[base:base + n])
+        return samples[(n * 99 + 99) // 100 - 1]
+
+    def stats(self):
+        """
+        Per-stage timing
+
+        Returns:
+            dict: stage name -> {'calls', 'min_us', 'avg_us', 'max_us',
+                'p99_us', 'blamed'}
+        """
+        result = {}
+        for i in range(len(self.names)):
+            n = self.count[i]
+            result[self.names[i]] = {
+                'calls': n,
+                'min_us': self.min_us[i] if n else 0,
+                'avg_us': self.sum_us[i] // n if n else 0,
+                'max_us': self.max_us[i],
+                'p99_us': self.p99(i),
+                'blamed': self.blamed[i],
+            }
+        return result
+
+    def report(self):
+        """
+        Text table of all stages and the last over-budget ticks
+
+        Returns:
+            str: Report text
+        """
+        lines = ["stage        calls   min   avg   p99   max  blamed  (us)"]
+        for name, s in self.stats().items():
+            if s['calls']:
+                lines.append("%-10s %7d %5d %5d %5d %5d %7d" % (
+                    name, s['calls'], s['min_us'], s['avg_us'], s['p99_us'],
+                    s['max_us'], s['blamed']))
+        lines.append("ticks %d, over %d us budget: %d" % (
+            self.ticks, self.budget_us, self.over_budget))
+        for k in range(EVENTS):
+            pos = (self._ev_pos + k) % EVENTS
+            if self._ev_us[pos]:
+                lines.append("  @%dms %d us: %s %d us" % (
+                    self._ev_ms[pos], self._ev_us[pos],
+                    self._stage_name(self._ev_stage[pos]), self._ev_stage_us[pos]))
+        return "\n".join(lines)
+
+
+# Active profiler, None while disabled
+profiler = None
+
+
+def enable(scheduler, registry=None, budget_us=PROFILE_BUDGET_US):
+    """
+    Start profiling (no-op if already enabled)
+
+    Returns:
+        Profiler: The active profiler
+    """
+    global profiler
+    if profiler is None:
+        profiler = Profiler(scheduler, registry, budget_us)
+        profiler.attach()
+    return profiler
+
+
+def disable():
+    """Stop profiling and remove all instrumentation"""
+    global profiler
+    if profiler is not None:
+        profiler.detach()
+        profiler = None
+
+
+def report():
+    """Returns the report text of the active profiler"""
+    if profiler is None:
+        return "profiler disabled"
+    return profiler.report()
+
+
+def print_report():
+    """Prints the report (REPL)"""
+    print(report())
+
+
+def _query(arg):
+    # ?PRF [R]: stage table, R also resets the counters
+    text = report()
+    if profiler is not None and arg[:1] in (b'R', b'r'):
+        profiler.reset()
+    return text
+
+
+diag.register_query(b'PRF', _query)
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+Pin and LEDC Channel Manager
+CyberBrick V7RC Controller
+
+The ESP32-C3 has six LEDC (hardware PWM) channels, and GPIO 21/20 are
+shared by the NeoPixel outputs (LED1/LED2) and the buzzers
+(BUZZER1/BUZZER2). Every device takes its pins and channels through this
+module, so allocation order no longer decides what fails at runtime.
+
+At boot, allocate() reserves the devices of RESOURCE_PRIORITY in order
+and reports every conflict before any output is touched:
+
+    servo1-4    one LEDC channel each
+    LED1, LED2  their GPIO as a plain output (NeoPixel bitstream)
+    motors      four LEDC channels if left (hardware PWM), otherwise the
+                four GPIOs as plain outputs (software PWM)
+    BUZZER1/2   one LEDC channel on GPIO 21/20
+
+The controllers then ask for their grant with acquire(). A device that
+was not part of the boot plan is served first come, first served from
+what is left. A denied device keeps working as a no-op (NullPWM) instead
+of raising.
+
+Example:
+    >>> resources.allocate(('servo1', 'servo2', 'LED1', 'motors', 'BUZZER1'))
+    ['BUZZER1: denied, GPIO 21 is used by LED1']
+    >>> resources.acquire('motors', (4, 5, 6, 7), pwm=False, fallback=True)
+    2   # PWM: the motors got the four channels the absent servos left
+"""
+
+DENIED = 0
+DIGITAL = 1     # Plain GPIO outputs
+PWM = 2         # LEDC channel per pin
+
+LEDC_CHANNELS = 6
+
+_MODES = ('denied', 'digital', 'PWM')
+
+_grants = {}        # Device name -> mode
+_pins = {}          # GPIO -> device name
+_channels = {}      # Device name -> LEDC channels held
+_notes = []         # Conflicts and fallbacks, for report()
+
+
+class NullPWM:
+    """Stand-in for a PWM output that was not granted (all calls ignored)"""
+
+    def freq(self, value=None):
+        return 0
+
+    def duty(self, value=None):
+        return 0
+
+    def init(self, *args, **kwargs):
+        pass
+
+    def deinit(self):
+        pass
+
+
+def devices():
+    """
+    Pins of every device on the board
+
+    Returns:
+        dict: Device name -> (GPIOs, wants PWM)
+    """
+    from bbl.servos import SERVO_CHANNEL1, SERVO_CHANNEL2, SERVO_CHANNEL3, SERVO_CHANNEL4
+    from bbl.motors import MOTOR1_CHANNEL1, MOTOR1_CHANNEL2, MOTOR2_CHANNEL1, MOTOR2_CHANNEL2
+    from bbl.leds import LED_CHANNEL1, LED_CHANNEL2
+    from bbl.buzzer import BUZZER_CHANNEL1, BUZZER_CHANNEL2
+    return {
+        'servo1': ((SERVO_CHANNEL1,), True),
+        'servo2': ((SERVO_CHANNEL2,), True),
+        'servo3': ((SERVO_CHANNEL3,), True),
+        'servo4': ((SERVO_CHANNEL4,), True),
+        'motors': ((MOTOR1_CHANNEL1, MOTOR1_CHANNEL2, MOTOR2_CHANNEL1, MOTOR2_CHANNEL2), True),
+        'LED1': ((LED_CHANNEL1,), False),
+        'LED2': ((LED_CHANNEL2,), False),
+        'BUZZER1': ((BUZZER_CHANNEL1,), True),
+        'BUZZER2': ((BUZZER_CHANNEL2,), True),
+    }
+
+
+def free_channels():
+    """LEDC channels not held by any device"""
+    return LEDC_CHANNELS - sum(_channels.values())
+
+
+def _take(owner, gpios, pwm, fallback):
+    # Grant the pins (and a channel per pin for PWM) if they are free
+    for gpio in gpios:
+        holder = _pins.get(gpio)
+        if holder is not None and holder != owner:
+            _notes.append("%s: denied, GPIO %d is used by %s" % (owner, gpio, holder))
+            return DENIED
+    mode = DIGITAL
+    if pwm:
+        held = _channels.get(owner, 0)
+        if free_channels() + held >= len(gpios):
+            mode = PWM
+        elif fallback:
+            _notes.append("%s: %d LEDC channels left, %d needed, using plain outputs"
+                          % (owner, free_channels(), len(gpios)))
+        else:
+            _notes.append("%s: denied, no LEDC channel left" % owner)
+            return DENIED
+    for gpio in gpios:
+        _pins[gpio] = owner
+    _channels[owner] = len(gpios) if mode == PWM else 0
+    return mode
+
+
+def allocate(order, motor_pwm=True):
+    """
+    Reserve pins and channels for the boot plan, in priority order
+
+    Args:
+        order (tuple): Device names (see devices()), highest priority first
+        motor_pwm (bool): Motors take LEDC channels when enough are left.
+            False leaves the motors out of the plan: their driver's
+            use_hardware_pwm decides at acquire(), from what is left
+
+    Returns:
+        list: Conflict and fallback messages (empty if everything fits)
+    """
+    board = devices()
+    for name in order:
+        if name not in board:
+            _notes.append("%s: unknown device" % name)
+            continue
+        gpios, pwm = board[name]
+        if name == 'motors':
+            if motor_pwm:
+                _grants[name] = _take(name, gpios, True, fallback=True)
+        else:
+            _grants[name] = _take(name, gpios, pwm, fallback=False)
+    return list(_notes)
+
+
+def acquire(owner, gpios, pwm=True, fallback=False):
+    """
+    Pins (and LEDC channels) for a device that is about to drive them
+
+    Args:
+        owner (str): Device name
+        gpios (tuple): GPIOs the device drives
+        pwm (bool): One LEDC channel per GPIO wanted
+        fallback (bool): Plain outputs are acceptable without channels
+
+    Returns:
+        int: PWM, DIGITAL or DENIED. A device that was granted (or denied)
+        before, in the boot plan or by an earlier call, gets the same
+        answer whatever it asks for.
+    """
+    mode = _grants.get(owner)
+    if mode is None:
+        mode = _grants[owner] = _take(owner, gpios, pwm, fallback)
+    return mode
+
+
+def release(owner):
+    """Give back the pins and channels of a device"""
+    for gpio in [g for g, o in _pins.items() if o == owner]:
+        del _pins[gpio]
+    _channels.pop(owner, None)
+    _grants.pop(owner, None)
+
+
+def grants():
+    """Device name -> 'PWM' | 'digital' | 'denied' for every device asked so far"""
+    return {name: _MODES[mode] for name, mode in _grants.items()}
+
+
+def report():
+    """Text summary: channel use, grants, conflicts"""
+    lines = ["LEDC %d/%d channels in use" % (LEDC_CHANNELS - free_channels(), LEDC_CHANNELS)]
+    for name, mode in grants().items():
+        gpios = sorted(g for g, o in _pins.items() if o == name)
+        lines.append("  %-8s %-7s GPIO %s" % (name, mode, ','.join(str(g) for g in gpios) or '-'))
+    for note in _notes:
+        lines.append("! " + note)
+    return '\n'.join(lines)
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+Multi-rate Deadline Scheduler
+CyberBrick V7RC Controller
+
+Runs the control-loop subsystems (mailbox, servos, LEDs, music, loop-stepped
+motor PWM) at their own rates from one asyncio task. Every periodic task
+has an absolute ticks_ms deadline that advances by exactly one period per
+run, so the work done in a pass does not stretch the period (no drift).
+A task that falls a whole period or more behind counts an overrun and is
+re-anchored to now instead of running a burst of catch-up calls.
+
+Tasks can report that they have nothing to do (idle predicate): at their
+deadline the call is skipped and only the deadline advances. Event-driven
+tasks (music) give their next deadline with a `due` function instead of a
+fixed period and are not scheduled at all while idle.
+
+A task that raises is logged and counted in its error counter; the other
+tasks and the control loop keep running.
+
+Example:
+    >>> sched = Scheduler()
+    >>> sched.add('servos', servos.timing_proc, period_ms=20, idle=servos.idle)
+    >>> sched.add('music', music.timing_proc, idle=music.idle,
+    ...           due=lambda: music.play_interval)
+    >>> uasyncio.run(sched.run())
+    >>> sched.stats()['servos']['overruns']
+"""
+
+import uasyncio
+import utime
+from array import array
+
+from bbl.log import get_logger
+
+_log = get_logger('sched')
+
+
+class Scheduler:
+    """
+    Deadline scheduler for a fixed set of tasks
+
+    Tasks are added before run() starts; counters are preallocated per task.
+    """
+
+    def __init__(self, max_sleep_ms=20):
+        """
+        Args:
+            max_sleep_ms (int): Longest sleep between passes, bounds how late
+                an idle task notices new work
+        """
+        self.max_sleep_ms = max_sleep_ms
+        self.names = []
+        self.funcs = []
+        self.idles = []
+        self.dues = []
+        self.periods = []
+        self.deadlines = []
+
+        self.runs = array('L')
+        self.skipped = array('L')
+        self.overruns = array('L')
+        self.max_late_ms = array('L')
+        self.errors = array('L')
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name, func, period_ms=0, idle=None, due=None):
+        """
+        Register a task
+
+        Args:
+            name (str): Name for stats() and reports
+            func (function): Called without arguments when the task is due
+            period_ms (int): Run every period_ms (absolute deadlines). For
+                `due` tasks, how late a run may be before it counts as an
+                overrun (0: 1 ms)
+            idle (function, optional): Returns True when there is nothing
+                to do; the call is skipped
+            due (function, optional): Returns the next ticks_ms deadline of
+                an event-driven task (e.g. the next note boundary)
+
+        Returns:
+            int: Task index
+        """
+        if due is None and period_ms <= 0:
+            raise ValueError("period_ms required without due")
+        self.names.append(name)
+        self.funcs.append(func)
+        self.idles.append(idle)
+        self.dues.append(due)
+        self.periods.append(period_ms)
+        self.deadlines.append(utime.ticks_ms())
+        for counters in (self.runs, self.skipped, self.overruns,
+                         self.max_late_ms, self.errors):
+            counters.append(0)
+        return len(self.names) - 1
+
+    def run_once(self):
+        """
+        Run every task whose deadline has passed
+
+        Returns:
+            int: Milliseconds until the next deadline (<= max_sleep_ms)
+        """
+        diff = utime.ticks_diff
+        now = utime.ticks_ms()
+        wait = self.max_sleep_ms
+        deadlines = self.deadlines
+        for i in range(len(self.funcs)):
+            idle = self.idles[i]
+            period = self.periods[i]
+            due = self.dues[i]
+
+            if due is not None:
+                # Event-driven: no deadline while there is nothing to do
+                if idle is not None and idle():
+                    continue
+                deadline = due()
+                late = diff(now, deadline)
+                if late >= 0:
+                    self._ran(i, late, period or 1)
+                    self._call(i)
+                    now = utime.ticks_ms()
+                    if idle is not None and idle():
+                        continue
+                    late = diff(now, due())
+                if -late < wait:
+                    wait = -late
+                continue
+
+            late = diff(now, deadlines[i])
+            if late >= 0:
+                if late >= period:
+                    # Missed at least one whole period: re-anchor to now
+                    self.overruns[i] += 1
+                    deadlines[i] = utime.ticks_add(now, period)
+                else:
+                    deadlines[i] = utime.ticks_add(deadlines[i], period)
+                if idle is not None and idle():
+                    self.skipped[i] += 1
+                else:
+                    self._ran(i, late, 0)
+                    self._call(i)
+                    now = utime.ticks_ms()
+            ahead = diff(deadlines[i], now)
+            if ahead < wait:
+                wait = ahead
+        return wait if wait > 0 else 0
+
+    def _call(self, i):
+        # One failing task must not end the control loop
+        try:
+            self.funcs[i]()
+        except Exception as e:
+            self.errors[i] += 1
+            _log.error("%s failed: %s", self.names[i], e)
+
+    def _ran(self, i, late, overrun_ms):
+        self.runs[i] += 1
+        if late > self.max_late_ms[i]:
+            self.max_late_ms[i] = late
+        if overrun_ms and late >= overrun_ms:
+            self.overruns[i] += 1
+
+    async def run(self):
+        """Scheduler task: run due tasks, sleep until the next deadline"""
+        now = utime.ticks_ms()
+        for i in range(len(self.deadlines)):
+            self.deadlines[i] = now
+        while True:
+            await uasyncio.sleep_ms(self.run_once())
+
+    def stats(self):
+        """
+        Per-task counters
+
+        Returns:
+            dict: name -> {'period_ms', 'runs', 'skipped', 'overruns',
+                'max_late_ms', 'errors'}
+        """
+        return {
+            self.names[i]: {
+                'period_ms': self.periods[i],
+                'runs': self.runs[i],
+                'skipped': self.skipped[i],
+                'overruns': self.overruns[i],
+                'max_late_ms': self.max_late_ms[i],
+                'errors': self.errors[i],
+            }
+            for i in range(len(self.names))
+        }
+
+    def reset_stats(self):
+        """Clears the per-task counters"""
+        for counters in (self.runs, self.skipped, self.overruns,
+                         self.max_late_ms, self.errors):
+            for i in range(len(counters)):
+                counters[i] = 0
+
+    def report(self):
+        """
+        Text table of the per-task counters
+
+        Returns:
+            str: One line per task
+        """
+        lines = ["task       period   runs  skipped  overruns  late<=  errors"]
+        for i in range(len(self.names)):
+            lines.append("%-10s %4dms %7d %8d %9d %5dms %7d" % (
+                self.names[i], self.periods[i], self.runs[i], self.skipped[i],
+                self.overruns[i], self.max_late_ms[i], self.errors[i]))
+        return "\n".join(lines)
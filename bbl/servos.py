@@ -1,11 +1,88 @@
 # -*-coding:utf-8-*-
 from machine import Pin, PWM
+from array import array
+from bbl.log import get_logger
+from bbl import resources
 
 SERVO_CHANNEL1 = 3
 SERVO_CHANNEL2 = 2
 SERVO_CHANNEL3 = 1
 SERVO_CHANNEL4 = 0
 
+# Fixed-point servo math: angles are kept in micro-degrees and converted
+# to duty with integer arithmetic only, so stepping allocates no floats.
+# Every intermediate stays below 2^30 (MicroPython small int).
+# Duty 25..127 covers 0..180 degrees (500..2500 us at 50 Hz).
+UDEG = 1000000
+DUTY_MIN = 25
+DUTY_SPAN = 102
+ANGLE_MAX_UDEG = 180 * UDEG
+PWM_MIN_US = 500
+PWM_SPAN_US = 2000
+STEP_SPEED_MAX = 180    # Stepping speed range 0..180 (100 = nominal rate)
+
+_log = get_logger('servo')
+
+
+def udeg_to_duty(udeg):
+    """Duty for an angle in micro-degrees (0..180000000)"""
+    return DUTY_MIN + (udeg // 1000) * DUTY_SPAN // 180000
+
+
+# Motion profiles: a move changes the duty monotonically, so it is stored
+# as the tick at which each successive duty step is reached (at most
+# DUTY_SPAN entries per servo, whatever the duration)
+PROFILE_TABLE = DUTY_SPAN + 1
+PROFILE_SUBSAMPLES = 8  # S-curve smoothing window samples per tick
+
+# Endpoint/center trims: every duty written for a servo goes through its
+# table (nominal duty -> calibrated duty), rebuilt by set_trim(). Duties
+# outside the table are written unchanged.
+TRIM_TABLE = DUTY_MIN + DUTY_SPAN + 1
+TRIM_MIN_US = 400
+TRIM_MAX_US = 2600
+
+
+def _trapezoid(distance, max_vel, accel):
+    # Returns (peak velocity, accel time, cruise time, duration)
+    if distance * accel < max_vel * max_vel:
+        peak = (distance * accel) ** 0.5  # Triangular: never reaches max_vel
+    else:
+        peak = max_vel
+    t_acc = peak / accel
+    t_cruise = (distance - peak * t_acc) / peak if peak else 0
+    return peak, t_acc, t_cruise, 2 * t_acc + t_cruise
+
+
+def _trapezoid_pos(t, distance, accel, peak, t_acc, t_cruise, duration):
+    # Distance covered t seconds into a trapezoidal move
+    if t <= 0:
+        return 0
+    if t >= duration:
+        return distance
+    if t < t_acc:
+        return 0.5 * accel * t * t
+    if t < t_acc + t_cruise:
+        return 0.5 * peak * t_acc + peak * (t - t_acc)
+    rest = duration - t
+    return distance - 0.5 * accel * rest * rest
+
+
+def profile_duration(distance, max_vel, accel, jerk=None):
+    """
+    Duration in seconds of a move of `distance` degrees
+
+    Args:
+        distance (float): Move length in degrees (>= 0)
+        max_vel (float): Velocity limit in degrees/s
+        accel (float): Acceleration limit in degrees/s^2
+        jerk (float, optional): Jerk limit in degrees/s^3 (S-curve)
+    """
+    duration = _trapezoid(distance, max_vel, accel)[3] if distance else 0
+    if jerk and distance:
+        duration += accel / jerk
+    return duration
+
 
 class ServosController:
     """
@@ -24,6 +101,8 @@ class ServosController:
         >>> servos.set_angle_stepping(2, 180, 10)
         >>> # Set the speed of servo 3 to 50%
         >>> servos.set_speed(3, 50)
+        >>> # Smooth S-curve move of servo 4 to 45 degrees
+        >>> servos.move(4, 45, 180, 360, jerk=2000)
     """
 
     def __init__(self):
@@ -45,14 +124,34 @@ class ServosController:
         self.servos_map = [
             None, None, None, None  # Will be initialized on first use
         ]
-        self.servos_info_map = [
-            {"c_ang": 0, "s_ang": 0, "rh_ang": 0, "vel": 0, "step_en": False},
-            {"c_ang": 0, "s_ang": 0, "rh_ang": 0, "vel": 0, "step_en": False},
-            {"c_ang": 0, "s_ang": 0, "rh_ang": 0, "vel": 0, "step_en": False},
-            {"c_ang": 0, "s_ang": 0, "rh_ang": 0, "vel": 0, "step_en": False},
-        ]
-        self.sensitity = 180
-        self.tim_call_freq = 100
+        # Per-servo state in preallocated columns (indexed 0-3), angles in
+        # micro-degrees: current, target and start of the current move,
+        # step speed and the precomputed micro-degrees per timing_proc call
+        self.c_ang = array('l', [0] * 4)
+        self.s_ang = array('l', [0] * 4)
+        self.rh_ang = array('l', [0] * 4)
+        self.vel = array('H', [0] * 4)
+        self.step = array('l', [0] * 4)
+        # Bit n set while servo n+1 is stepping
+        self.stepping = 0
+        # Motion profile moves (see move()): bit n set while servo n+1
+        # follows its table of duty-step ticks
+        self.moving = 0
+        self.move_table = array('H', [0] * (4 * PROFILE_TABLE))
+        self.move_len = bytearray(4)
+        self.move_pos = bytearray(4)
+        self.move_tick = array('L', [0] * 4)
+        self.move_end = array('L', [0] * 4)   # Tick the move completes at
+        self.move_duty = array('h', [0] * 4)  # Duty at the start of the move
+        self.move_dir = array('b', [0] * 4)
+        # Last duty written per servo (-1: unknown), skips redundant writes
+        self.duty_cache = array('h', [-1] * 4)
+        # Calibrated duty per nominal duty, identity until set_trim()
+        self.trim = bytearray(range(TRIM_TABLE)) * 4
+        self.trim_us = array('H', [PWM_MIN_US, PWM_MIN_US + PWM_SPAN_US // 2,
+                                   PWM_MIN_US + PWM_SPAN_US] * 4)
+        self.rad_per_sec = 4
+        self.set_call_freq(100)
         
         print("[servos] Initialized with lazy PWM allocation")
     
@@ -72,17 +171,29 @@ class ServosController:
         if self.servos_map[internal_idx] is None:
             # Create PWM object on first use
             channel_map = [SERVO_CHANNEL1, SERVO_CHANNEL2, SERVO_CHANNEL3, SERVO_CHANNEL4]
+            owner = 'servo%d' % servo_idx
+            if resources.acquire(owner, (channel_map[internal_idx],)) != resources.PWM:
+                _log.error("No PWM channel for servo %d, see ?RES", servo_idx)
+                return False
             try:
                 pwm = PWM(Pin(channel_map[internal_idx]), freq=50)
                 self.servos_map[internal_idx] = pwm
-                print(f"[servos] Allocated PWM for servo {servo_idx} on GPIO {channel_map[internal_idx]}")
+                _log.info("Allocated PWM for servo %d on GPIO %d", servo_idx, channel_map[internal_idx])
             except RuntimeError as e:
-                print(f"[servos] ERROR: Failed to allocate PWM for servo {servo_idx}: {e}")
-                print(f"[servos] Hint: ESP32-C3 has only 6 PWM channels. Check motor driver config.")
+                _log.error("Failed to allocate PWM for servo %d: %s", servo_idx, e)
+                _log.error("Hint: ESP32-C3 has only 6 PWM channels. Check motor driver config.")
                 return False
         
         return True
 
+    def _write_duty(self, internal_idx, duty):
+        # Trimmed duty, PWM.duty() only when the value changes
+        if duty < TRIM_TABLE:
+            duty = self.trim[internal_idx * TRIM_TABLE + duty]
+        if self.duty_cache[internal_idx] != duty:
+            self.duty_cache[internal_idx] = duty
+            self.servos_map[internal_idx].duty(duty)
+
     def set_angle(self, servo_idx, angle):
         """
         Sets the angle of a specified servo motor.
@@ -99,23 +210,19 @@ class ServosController:
             >>> servos.set_angle(1, 90)
         """
         if not 0 <= angle <= 180:
-            print("[servo]Invalid angle, Must be between 0 and 180.")
+            _log.warn("Invalid angle, Must be between 0 and 180.")
             return
 
         # Ensure PWM is allocated
         if not self._ensure_pwm(servo_idx):
             return
 
-        duty = (int)(angle * 102 / 180 + 25)
+        udeg = int(angle * UDEG)
+        duty = udeg_to_duty(udeg)
         internal_idx = servo_idx - 1
 
-        self.reset_info(servo_idx, angle)
-
-        if not 0 <= internal_idx < len(self.servos_map):
-            print("[servo]Invalid servo index. Must be between 1 and 4.")
-            return
-
-        self.servos_map[internal_idx].duty(duty)
+        self._reset_udeg(internal_idx, udeg)
+        self._write_duty(internal_idx, duty)
 
     def set_pwm(self, servo_idx, pwm_us):
         """
@@ -133,7 +240,7 @@ class ServosController:
             >>> servos.set_pwm(1, 1500)
         """
         if not 500 <= pwm_us <= 2500:
-            print("[servo]Invalid PWM value. Must be between 500 and 2500μs.")
+            _log.warn("Invalid PWM value. Must be between 500 and 2500μs.")
             return
 
         # Ensure PWM is allocated
@@ -141,19 +248,14 @@ class ServosController:
             return
 
         # Convert PWM microseconds to duty cycle
-        # 500μs = duty 25, 2500μs = duty 125
-        duty = int((pwm_us - 500) * 102 / 2000 + 25)
+        # 500μs = duty 25, 2500μs = duty 127
+        offset_us = pwm_us - PWM_MIN_US
+        duty = DUTY_MIN + offset_us * DUTY_SPAN // PWM_SPAN_US
         internal_idx = servo_idx - 1
 
-        # Calculate equivalent angle for info tracking
-        angle = int((pwm_us - 500) * 180 / 2000)
-        self.reset_info(servo_idx, angle)
-
-        if not 0 <= internal_idx < len(self.servos_map):
-            print("[servo]Invalid servo index. Must be between 1 and 4.")
-            return
-
-        self.servos_map[internal_idx].duty(duty)
+        # Equivalent angle (micro-degrees) for info tracking
+        self._reset_udeg(internal_idx, offset_us * (ANGLE_MAX_UDEG // PWM_SPAN_US))
+        self._write_duty(internal_idx, duty)
 
 
     def set_angle_stepping(self, servo_idx, angle, step_speed=None):
@@ -167,26 +269,33 @@ class ServosController:
             servo_idx (int): Index of the servo motor (1 to 4).
             angle (int): Target angle between 0 and 180 degrees.
             step_speed (int, optional): \
-                Speed of the movement (0-100). Higher values move faster.
+                Speed of the movement (0-180). Higher values move faster.
 
         Example:
             >>> # Set servo 2 to 180 degrees with a step speed of 10
             >>> servos.set_angle_stepping(2, 180, 10)
         """
         if not 0 <= angle <= 180:
-            print("[servo]Invalid angle, Must be between 0 and 180.")
+            _log.warn("Invalid angle, Must be between 0 and 180.")
+            return
+        if step_speed is not None and not self._valid_step(step_speed):
+            return
+
+        # Stepping drives the servo, so it needs its PWM
+        if not self._ensure_pwm(servo_idx):
             return
 
         internal_idx = servo_idx - 1
 
-        cur_angle = self.servos_info_map[internal_idx]["c_ang"]
-        self.servos_info_map[internal_idx]["rh_ang"] = cur_angle
-        self.servos_info_map[internal_idx]["s_ang"] = angle
+        self.moving &= ~(1 << internal_idx)
+        self.rh_ang[internal_idx] = self.c_ang[internal_idx]
+        self.s_ang[internal_idx] = int(angle * UDEG)
 
         if step_speed is not None:
-            self.servos_info_map[internal_idx]["vel"] = step_speed
+            self.vel[internal_idx] = step_speed
+            self.step[internal_idx] = self._step_udeg(step_speed)
 
-        self.servos_info_map[internal_idx]["step_en"] = True
+        self.stepping |= 1 << internal_idx
 
     def set_angle_step(self, servo_idx, step_speed=100):
         """
@@ -194,20 +303,207 @@ class ServosController:
 
         Args:
             servo_idx (int): Index of the servo motor (1 to 4).
-            step_speed (int): Speed of the stepping motion, from 0 to 100.
+            step_speed (int): Speed of the stepping motion, from 0 to 180.
 
         Example:
             >>> # Set the stepping speed of servo 3 to 50%
             >>> servos.set_angle_step(3, 50)
         """
-        if not 0 <= step_speed <= 180:
-            print("[servo]Invalid step, Must be between 0 and 100.")
+        if not self._valid_step(step_speed):
             return
 
         internal_idx = servo_idx - 1
-        self.servos_info_map[internal_idx]["vel"] = step_speed
+        if not 0 <= internal_idx < 4:
+            _log.warn("Invalid servo index. Must be between 1 and 4.")
+            return
+        self.vel[internal_idx] = step_speed
+        self.step[internal_idx] = self._step_udeg(step_speed)
+
+    def move(self, servo_idx, angle, max_vel, accel, jerk=None, duration_ms=None):
+        """
+        Moves a servo to the target angle along a motion profile.
+
+        The whole move is computed here, as the tick of every duty step,
+        so timing_proc only walks a table. Without jerk the profile is
+        trapezoidal (constant acceleration, cruise, constant deceleration);
+        with jerk the acceleration ramps up and down too (S-curve).
+
+        Args:
+            servo_idx (int): Index of the servo motor (1 to 4).
+            angle (int): Target angle between 0 and 180 degrees.
+            max_vel (float): Velocity limit in degrees per second.
+            accel (float): Acceleration limit in degrees per second².
+            jerk (float, optional): Jerk limit in degrees per second³.
+            duration_ms (int, optional): Stretch the move to take this long
+                (ignored if shorter than the limits allow).
 
-    def reset_info(self, servo_idx, angle, radPSec=4, call_freq=100):
+        Returns:
+            int: Duration of the move in milliseconds, or None if rejected.
+
+        Example:
+            >>> # Smooth 90° sweep on servo 1: at most 180°/s, 360°/s²
+            >>> servos.move(1, 180, 180, 360, jerk=2000)
+        """
+        if not 0 <= angle <= 180:
+            _log.warn("Invalid angle, Must be between 0 and 180.")
+            return None
+        if max_vel <= 0 or accel <= 0 or (jerk is not None and jerk <= 0):
+            _log.warn("Invalid profile, limits must be positive.")
+            return None
+        if not self._ensure_pwm(servo_idx):
+            return None
+
+        idx = servo_idx - 1
+        bit = 1 << idx
+        self.stepping &= ~bit
+        self.moving &= ~bit
+
+        start = self.c_ang[idx]
+        target = int(angle * UDEG)
+        duty0 = udeg_to_duty(start)
+        steps = udeg_to_duty(target) - duty0
+        self.rh_ang[idx] = start
+        self.s_ang[idx] = target
+
+        distance = abs(target - start) / UDEG
+        natural = profile_duration(distance, max_vel, accel, jerk)
+        duration = natural
+        if duration_ms is not None and duration_ms / 1000 > natural:
+            duration = duration_ms / 1000
+        if steps == 0:
+            self.c_ang[idx] = target
+            return int(duration * 1000)
+
+        # Limits of the base profile, time-scaled to the chosen duration
+        smooth = accel / jerk if jerk else 0
+        peak, t_acc, t_cruise, t_trap = _trapezoid(distance, max_vel, accel)
+        scale = natural / duration
+
+        # Complete once the profile ends, so synchronised moves arrive
+        # together even if their last duty step comes earlier
+        freq = self.tim_call_freq
+        end = int(duration * freq)
+        if end < duration * freq:
+            end += 1
+
+        # Tick at which each duty step is reached
+        direction = 1 if steps > 0 else -1
+        steps = abs(steps)
+        table = self.move_table
+        base = idx * PROFILE_TABLE
+        n = 0
+        tick = 0
+        while n < steps:
+            tick += 1
+            t = tick / freq * scale
+            if t >= natural or tick >= end:
+                # Profile over: land on the integer target, converting the
+                # float position back could stop one duty step short
+                reached = steps
+            else:
+                if smooth:
+                    # S-curve: trapezoid position averaged over the jerk window
+                    pos = 0
+                    for k in range(PROFILE_SUBSAMPLES):
+                        tk = t - smooth * (k + 0.5) / PROFILE_SUBSAMPLES
+                        pos += _trapezoid_pos(tk, distance, accel, peak, t_acc,
+                                              t_cruise, t_trap)
+                    pos /= PROFILE_SUBSAMPLES
+                else:
+                    pos = _trapezoid_pos(t, distance, accel, peak, t_acc,
+                                         t_cruise, t_trap)
+                duty = udeg_to_duty(start + direction * int(pos * UDEG))
+                reached = (duty - duty0) * direction
+            while n < reached and n < steps:
+                table[base + n] = tick if tick < 0xFFFF else 0xFFFF
+                n += 1
+
+        self.move_len[idx] = steps
+        self.move_pos[idx] = 0
+        self.move_tick[idx] = 0
+        self.move_end[idx] = end if end > tick else tick
+        self.move_duty[idx] = duty0
+        self.move_dir[idx] = direction
+        self.moving |= bit
+        return int(duration * 1000)
+
+    def move_sync(self, targets, max_vel, accel, jerk=None):
+        """
+        Moves several servos so they start and arrive together.
+
+        Every servo gets the duration of the longest move, so the shorter
+        moves run on the same profile shape, just slower.
+
+        Args:
+            targets (dict): servo_idx -> target angle.
+            max_vel (float): Velocity limit in degrees per second.
+            accel (float): Acceleration limit in degrees per second².
+            jerk (float, optional): Jerk limit in degrees per second³.
+
+        Returns:
+            int: Duration of the moves in milliseconds.
+
+        Example:
+            >>> servos.move_sync({1: 30, 2: 150}, 180, 360)
+        """
+        longest = 0
+        for servo_idx, angle in targets.items():
+            if 1 <= servo_idx <= 4:
+                distance = abs(int(angle * UDEG) - self.c_ang[servo_idx - 1]) / UDEG
+                longest = max(longest, profile_duration(distance, max_vel, accel, jerk))
+        duration_ms = int(longest * 1000 + 0.5)
+        for servo_idx, angle in targets.items():
+            self.move(servo_idx, angle, max_vel, accel, jerk, duration_ms)
+        return duration_ms
+
+    def _valid_step(self, step_speed):
+        # Step speeds go into the unsigned vel array: reject what it cannot hold
+        if not 0 <= step_speed <= STEP_SPEED_MAX:
+            _log.warn("Invalid step, Must be between 0 and %d.", STEP_SPEED_MAX)
+            return False
+        return True
+
+    def _step_udeg(self, velocity):
+        # Micro-degrees per timing_proc call; at least 1 so a slow servo
+        # still moves
+        if velocity == 0:
+            return 0
+        step = velocity * self.sensitivity // 100
+        return step if step > 0 else 1
+
+    def _update_steps(self):
+        # Recompute every servo's per-call step after a rate change
+        for i in range(4):
+            self.step[i] = self._step_udeg(self.vel[i])
+
+    def set_call_freq(self, call_freq):
+        """
+        Sets how often timing_proc is called, so stepping keeps its speed
+        in degrees per second whatever the control loop rate.
+
+        Args:
+            call_freq (int): timing_proc calls per second.
+
+        Example:
+            >>> # The scheduler steps the servos at 50 Hz
+            >>> servos.set_call_freq(50)
+        """
+        self.tim_call_freq = call_freq
+        # Micro-degrees per call at full step speed (velocity 100)
+        self.sensitivity = 57300000 * self.rad_per_sec // call_freq
+        self._update_steps()
+
+    def idle(self):
+        """
+        Returns True when no servo is stepping (timing_proc has nothing to do).
+
+        Example:
+            >>> if not servos.idle():
+            ...     servos.timing_proc()
+        """
+        return not (self.stepping or self.moving)
+
+    def reset_info(self, servo_idx, angle, radPSec=4, call_freq=None):
         """
         Resets the information for a servo motor, \
             including its current angle and step configuration.
@@ -218,29 +514,94 @@ class ServosController:
             radPSec (int, optional): \
                 The rotational speed in radians per second (default 4).
             call_freq (int, optional): \
-                Frequency at which the timing function is called (default 100).
+                Frequency at which the timing function is called \
+                    (default: the last one set, initially 100).
 
         Example:
             >>> # Reset servo 1 to 90 degrees with default settings
             >>> servos.reset_info(1, 90)
         """
         if not 0 <= angle <= 180:
-            print("[servo]Invalid angle, Must be between 0 and 180.")
+            _log.warn("Invalid angle, Must be between 0 and 180.")
             return
 
         internal_idx = servo_idx - 1
 
-        if not 0 <= internal_idx < len(self.servos_info_map):
-            print("[servo]Invalid servo index. Must be between 1 and 4.")
+        if not 0 <= internal_idx < 4:
+            _log.warn("Invalid servo index. Must be between 1 and 4.")
             return
 
-        self.tim_call_freq = call_freq
-        self.sensitivity = (57.3 * radPSec) / self.tim_call_freq
+        if radPSec != self.rad_per_sec or (
+                call_freq is not None and call_freq != self.tim_call_freq):
+            self.rad_per_sec = radPSec
+            self.set_call_freq(call_freq or self.tim_call_freq)
+
+        self._reset_udeg(internal_idx, int(angle * UDEG))
+
+    def _reset_udeg(self, internal_idx, udeg):
+        # Stop stepping and hold the servo at an angle in micro-degrees
+        self.stepping &= ~(1 << internal_idx)
+        self.moving &= ~(1 << internal_idx)
+        self.c_ang[internal_idx] = udeg
+        self.rh_ang[internal_idx] = udeg
+        self.s_ang[internal_idx] = udeg
+
+    def set_trim(self, servo_idx, min_us=500, center_us=1500, max_us=2500):
+        """
+        Calibrates the endpoints and center of a servo.
 
-        self.servos_info_map[internal_idx]["step_en"] = False
-        self.servos_info_map[internal_idx]["c_ang"] = angle
-        self.servos_info_map[internal_idx]["rh_ang"] = angle
-        self.servos_info_map[internal_idx]["s_ang"] = angle
+        The nominal 500/1500/2500μs positions (0/90/180 degrees) are moved
+        to the given pulse widths, linearly in between. The mapping is
+        precomputed into the servo's duty table, so every later write
+        (angles, PWM values, stepping and profile moves) is trimmed at
+        no cost. The trims apply from the next write.
+
+        Args:
+            servo_idx (int): Index of the servo motor (1 to 4).
+            min_us (int): Pulse width for 0 degrees / 500μs.
+            center_us (int): Pulse width for 90 degrees / 1500μs.
+            max_us (int): Pulse width for 180 degrees / 2500μs.
+
+        Example:
+            >>> # Servo 2 centers at 1540μs and must not go past 2300μs
+            >>> servos.set_trim(2, 520, 1540, 2300)
+        """
+        internal_idx = servo_idx - 1
+        if not 0 <= internal_idx < 4:
+            _log.warn("Invalid servo index. Must be between 1 and 4.")
+            return
+        if not TRIM_MIN_US <= min_us < center_us < max_us <= TRIM_MAX_US:
+            _log.warn("Invalid trim, need %d <= min < center < max <= %d.",
+                      TRIM_MIN_US, TRIM_MAX_US)
+            return
+
+        # Offsets from 500μs scaled by DUTY_SPAN, so the default trims give
+        # back exactly the nominal duty
+        half = PWM_SPAN_US // 2 * DUTY_SPAN
+        base = internal_idx * TRIM_TABLE
+        for duty in range(DUTY_MIN, TRIM_TABLE):
+            x = (duty - DUTY_MIN) * PWM_SPAN_US
+            if x <= half:
+                t = (min_us - PWM_MIN_US) * DUTY_SPAN + x * (center_us - min_us) // (PWM_SPAN_US // 2)
+            else:
+                t = (center_us - PWM_MIN_US) * DUTY_SPAN + (x - half) * (max_us - center_us) // (PWM_SPAN_US // 2)
+            self.trim[base + duty] = DUTY_MIN + t // PWM_SPAN_US
+        self.trim_us[internal_idx * 3] = min_us
+        self.trim_us[internal_idx * 3 + 1] = center_us
+        self.trim_us[internal_idx * 3 + 2] = max_us
+
+    def get_trim(self, servo_idx):
+        """
+        Gets the endpoint/center trims of a servo.
+
+        Args:
+            servo_idx (int): Index of the servo motor (1 to 4).
+
+        Returns:
+            tuple: (min_us, center_us, max_us)
+        """
+        i = (servo_idx - 1) * 3
+        return self.trim_us[i], self.trim_us[i + 1], self.trim_us[i + 2]
 
     def set_speed(self, servo_idx, speed_percentage):
         """
@@ -260,21 +621,22 @@ class ServosController:
             >>> servos.set_speed(2, 50)
         """
         if not -100 <= speed_percentage <= 100:
-            print("[servo]Invalid speed, Must be between -100 and 100.")
+            _log.warn("Invalid speed, Must be between -100 and 100.")
             return
 
         # Ensure PWM is allocated
         if not self._ensure_pwm(servo_idx):
             return
 
-        duty = round(speed_percentage * 51.2 / 100 + 76.8)
+        # 76.8 ± 51.2 duty for ±100%, rounded to nearest
+        duty = (speed_percentage * 512 + 76800 + 500) // 1000
         internal_idx = servo_idx - 1
 
         if not 0 <= internal_idx < len(self.servos_map):
-            print("[servo]Invalid servo index. Must be between 1 and 4.")
+            _log.warn("Invalid servo index. Must be between 1 and 4.")
             return
 
-        self.servos_map[internal_idx].duty(duty)
+        self._write_duty(internal_idx, duty)
 
     def set_duty(self, servo_idx, duty):
         """
@@ -303,7 +665,7 @@ class ServosController:
         internal_idx = servo_idx - 1
 
         if 0 <= internal_idx < len(self.servos_map):
-            self.servos_map[internal_idx].duty(duty)
+            self._write_duty(internal_idx, duty)
         else:
             raise ValueError(
                 "[servo]Invalid servo index. Must be between 1 and 4.")
@@ -314,43 +676,74 @@ class ServosController:
 
         This method is called by a timer or main loop to \
             update the servo positions gradually.
-        It calculates the next angle based on the velocity and \
-            sensitivity settings, and applies the PWM duty cycle.
+        It advances the angle by the servo's precomputed step and \
+            applies the PWM duty cycle, in integer micro-degrees only.
+        Only servos in the stepping bitmask are visited, and the duty is
+        written only when it changes.
 
         Example:
             >>> # Call timing_proc in the main loop to update servo positions.
             >>> servos.timing_proc()
         """
-        for servo_idx in range(4):
-            # Skip if PWM not allocated yet (lazy allocation)
-            if self.servos_map[servo_idx] is None:
-                continue
-            
-            if self.servos_info_map[servo_idx]["step_en"] is False:
-                continue
-
-            c_ang = self.servos_info_map[servo_idx]["c_ang"]
-            s_ang = self.servos_info_map[servo_idx]["s_ang"]
-            velocity = self.servos_info_map[servo_idx]["vel"]
-            interval = s_ang - c_ang
-
-            if interval != 0 and velocity != 0:
-                angle = 0
-                if interval > 0:
-                    angle = c_ang + (velocity / 100 * self.sensitivity)
-                    angle = angle if angle <= s_ang else s_ang
-                elif interval < 0:
-                    angle = c_ang - (velocity / 100 * self.sensitivity)
-                    angle = angle if angle >= s_ang else s_ang
-                else:
-                    self.servos_info_map[servo_idx]["rh_ang"] = s_ang
-                    self.servos_info_map[servo_idx]["step_en"] = False
-                    continue
-
-                self.servos_info_map[servo_idx]["c_ang"] = angle
-
-                duty = (int)(angle * 102 / 180 + 25)
-                self.servos_map[servo_idx].duty(duty)
+        active = self.stepping
+        servo_idx = 0
+        while active:
+            if active & 1:
+                c_ang = self.c_ang[servo_idx]
+                s_ang = self.s_ang[servo_idx]
+                step = self.step[servo_idx]
+
+                if step != 0:
+                    if s_ang > c_ang:
+                        angle = c_ang + step
+                        angle = angle if angle <= s_ang else s_ang
+                    else:
+                        angle = c_ang - step
+                        angle = angle if angle >= s_ang else s_ang
+                    self.c_ang[servo_idx] = angle
+
+                    duty = DUTY_MIN + (angle // 1000) * DUTY_SPAN // 180000
+                    duty = self.trim[servo_idx * TRIM_TABLE + duty]
+                    if self.duty_cache[servo_idx] != duty:
+                        self.duty_cache[servo_idx] = duty
+                        self.servos_map[servo_idx].duty(duty)
+
+                    if angle == s_ang:
+                        # Target reached, stop stepping
+                        self.rh_ang[servo_idx] = s_ang
+                        self.stepping &= ~(1 << servo_idx)
+            active >>= 1
+            servo_idx += 1
+
+        # Motion profile moves: walk the precomputed duty-step ticks
+        active = self.moving
+        servo_idx = 0
+        table = self.move_table
+        while active:
+            if active & 1:
+                tick = self.move_tick[servo_idx] + 1
+                self.move_tick[servo_idx] = tick
+                pos = self.move_pos[servo_idx]
+                end = self.move_len[servo_idx]
+                base = servo_idx * PROFILE_TABLE
+                while pos < end and table[base + pos] <= tick:
+                    pos += 1
+                if pos != self.move_pos[servo_idx]:
+                    self.move_pos[servo_idx] = pos
+                    duty = self.move_duty[servo_idx] + self.move_dir[servo_idx] * pos
+                    out = self.trim[servo_idx * TRIM_TABLE + duty]
+                    if self.duty_cache[servo_idx] != out:
+                        self.duty_cache[servo_idx] = out
+                        self.servos_map[servo_idx].duty(out)
+                    # Angle of the duty step, for moves issued mid-way
+                    self.c_ang[servo_idx] = ((duty - DUTY_MIN) * 180000
+                                             + DUTY_SPAN - 1) // DUTY_SPAN * 1000
+                if tick >= self.move_end[servo_idx]:
+                    # Move complete
+                    self.c_ang[servo_idx] = self.s_ang[servo_idx]
+                    self.moving &= ~(1 << servo_idx)
+            active >>= 1
+            servo_idx += 1
 
     def stop(self, servo_idx):
         """
@@ -366,7 +759,7 @@ class ServosController:
         if 0 <= internal_idx < len(self.servos_map):
             # Only stop if PWM was allocated
             if self.servos_map[internal_idx] is not None:
-                self.servos_map[internal_idx].duty(0)
+                self._write_duty(internal_idx, 0)
         else:
             raise ValueError(
                 "[servo]Invalid servo index. Must be between 1 and 4.")
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Servo Input Smoothing
+CyberBrick V7RC Controller
+
+Phone apps send SRV/SS8 frames at 10-30 Hz, so jumping the servo to every
+new value gives a stair-stepped output, and one lost packet doubles the
+step. The smoother sits between the command handlers and the
+ServosController: each new value becomes the target of a linear ramp
+from the current output, spread over the measured packet interval of
+that channel, and the control loop advances the ramps every tick.
+
+The lag this adds is bounded by max_lag_ms. After a ramp ends the output
+can optionally keep its slope for a short horizon (extrapolate_ms) to
+bridge a late or lost packet. All arithmetic is integer.
+
+Channels not in the mask go straight to ServosController.set_pwm().
+
+Example:
+    >>> smoother = InputSmoother(servos, mask=0b0011)   # Servos 1 and 2
+    >>> smoother.target(1, 1800)        # From a command handler
+    >>> smoother.tick()                 # Every control tick
+"""
+
+import utime
+from array import array
+
+try:
+    from bbl.config import SMOOTH_MAX_LAG_MS, SMOOTH_EXTRAPOLATE_MS
+except ImportError:
+    SMOOTH_MAX_LAG_MS = 100
+    SMOOTH_EXTRAPOLATE_MS = 0
+
+CHANNELS = 4
+PWM_MIN_US = 500
+PWM_MAX_US = 2500
+
+
+class InputSmoother:
+    """
+    Per-channel linear interpolation of servo PWM targets
+    """
+
+    def __init__(self, servos, mask=0b1111, max_lag_ms=SMOOTH_MAX_LAG_MS,
+                 extrapolate_ms=SMOOTH_EXTRAPOLATE_MS):
+        """
+        Args:
+            servos (ServosController): Output
+            mask (int): Bit n smooths servo n+1
+            max_lag_ms (int): Longest ramp (and longest packet interval
+                estimate); bounds the added lag
+            extrapolate_ms (int): Keep the slope this long after a ramp
+                ends (0: hold the target)
+        """
+        self.servos = servos
+        self.mask = mask
+        self.max_lag_ms = max_lag_ms
+        self.extrapolate_ms = extrapolate_ms
+
+        self.out = array('h', [0] * CHANNELS)         # Last output (us, 0 = none)
+        self.start = array('h', [0] * CHANNELS)       # Ramp start value
+        self.goal = array('h', [0] * CHANNELS)        # Newest target
+        self.ramp_t0 = array('l', [0] * CHANNELS)     # ticks_ms of the ramp start
+        self.ramp_ms = array('H', [0] * CHANNELS)     # Ramp duration
+        self.last_rx = array('l', [0] * CHANNELS)     # ticks_ms of the last target
+        self.interval = array('H', [max_lag_ms] * CHANNELS)  # Inter-arrival estimate
+        self.active = 0     # Bit n set while channel n is ramping
+        self.settling = 0   # Bit n: extrapolation expired, ramping back
+
+    def idle(self):
+        """Returns True when no channel is ramping (tick() has nothing to do)"""
+        return not self.active
+
+    def set_mask(self, mask):
+        """
+        Choose the smoothed channels
+
+        Args:
+            mask (int): Bit n smooths servo n+1; others pass straight through
+        """
+        self.mask = mask
+        self.active &= mask
+
+    def target(self, servo_idx, pwm_us):
+        """
+        New PWM target for a servo (same arguments as set_pwm)
+
+        Args:
+            servo_idx (int): Servo 1-4
+            pwm_us (int): Pulse width in microseconds (500-2500)
+        """
+        ch = servo_idx - 1
+        if not 0 <= ch < CHANNELS or not self.mask & (1 << ch) or \
+                not PWM_MIN_US <= pwm_us <= PWM_MAX_US:
+            self.servos.set_pwm(servo_idx, pwm_us)
+            return
+
+        now = utime.ticks_ms()
+        if not self.out[ch]:
+            # First value: nothing to ramp from
+            self.last_rx[ch] = now
+            self.out[ch] = pwm_us
+            self.goal[ch] = pwm_us
+            self.servos.set_pwm(servo_idx, pwm_us)
+            return
+
+        # Inter-arrival estimate: 3/4 old + 1/4 new, bounded by max_lag_ms
+        gap = utime.ticks_diff(now, self.last_rx[ch])
+        self.last_rx[ch] = now
+        if gap > self.max_lag_ms:
+            gap = self.max_lag_ms
+        est = (3 * self.interval[ch] + gap) >> 2
+        self.interval[ch] = est if est > 0 else 1
+
+        if pwm_us == self.goal[ch] and not self.active & (1 << ch):
+            return
+        self.start[ch] = self.out[ch]
+        self.goal[ch] = pwm_us
+        self.ramp_t0[ch] = now
+        self.ramp_ms[ch] = self.interval[ch]
+        self.active |= 1 << ch
+        self.settling &= ~(1 << ch)
+
+    def tick(self):
+        """Advance every ramp to the current time and write the outputs"""
+        now = utime.ticks_ms()
+        active = self.active
+        ch = 0
+        while active:
+            if active & 1:
+                bit = 1 << ch
+                elapsed = utime.ticks_diff(now, self.ramp_t0[ch])
+                duration = self.ramp_ms[ch]
+                start = self.start[ch]
+                goal = self.goal[ch]
+                extra = 0 if self.settling & bit else self.extrapolate_ms
+                if elapsed < duration:
+                    value = start + (goal - start) * elapsed // duration
+                elif elapsed < duration + extra:
+                    # Keep the slope until the next packet is due
+                    value = start + (goal - start) * elapsed // duration
+                    if value < PWM_MIN_US:
+                        value = PWM_MIN_US
+                    elif value > PWM_MAX_US:
+                        value = PWM_MAX_US
+                elif extra and self.out[ch] != goal:
+                    # No packet within the horizon: ramp back to the target
+                    self.start[ch] = self.out[ch]
+                    self.ramp_t0[ch] = now
+                    self.settling |= bit
+                    value = self.out[ch]
+                else:
+                    value = goal
+                    self.active &= ~bit
+                    self.settling &= ~bit
+                if value != self.out[ch]:
+                    self.out[ch] = value
+                    self.servos.set_pwm(ch + 1, value)
+            active >>= 1
+            ch += 1
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+Software PWM Engine
+CyberBrick V7RC Controller
+
+Generates a PWM carrier on plain digital pins for the motor drivers that
+do not get a hardware PWM channel (L298N, TB6612, L9110S in software mode).
+
+The engine is stepped by a machine.Timer callback at carrier_hz * period
+ticks per second, so the carrier frequency no longer depends on how often
+the asyncio control loop runs. If no timer is available, tick() can be
+called from the control loop instead (the previous behaviour).
+
+Whenever a duty changes, the engine precomputes an edge schedule: for
+every step of the period, a bitmask of the channels to switch on and a
+bitmask of the channels to switch off. A step is then two table lookups
+and, only on steps where something changes, one batched port write; no
+per-pin comparisons. With a GPIO base address configured the masks go
+straight to the W1TS/W1TC registers (all pins in one store); otherwise
+they are applied through the Pin objects.
+
+Duty updates are IRQ-safe: the new duties and schedule are built in a
+second buffer that is swapped in with a single assignment, so the timer
+callback never sees a half-updated pair of channels. A changed duty
+takes effect from the next period start at the latest, where the full
+state of every channel is rewritten.
+
+Example:
+    >>> pwm = SoftPWM([Pin(4, Pin.OUT), Pin(5, Pin.OUT)], period=100, carrier_hz=50)
+    >>> pwm.start()
+    >>> pwm.set_duties(0, 25, 0)   # 25% on channel 0, channel 1 low
+"""
+
+from array import array
+
+try:
+    from machine import Timer
+except ImportError:
+    Timer = None
+
+try:
+    from machine import mem32
+except ImportError:
+    mem32 = None
+
+_W1TS = 0x08    # GPIO_OUT_W1TS_REG offset: write 1s to set pins
+_W1TC = 0x0C    # GPIO_OUT_W1TC_REG offset: write 1s to clear pins
+
+
+class _PinPort:
+    # Applies channel bitmasks through Pin objects (portable fallback)
+
+    def __init__(self, pins):
+        self.pins = pins
+
+    def write(self, set_mask, clr_mask):
+        pins = self.pins
+        ch = 0
+        while clr_mask:
+            if clr_mask & 1:
+                pins[ch].value(0)
+            clr_mask >>= 1
+            ch += 1
+        ch = 0
+        while set_mask:
+            if set_mask & 1:
+                pins[ch].value(1)
+            set_mask >>= 1
+            ch += 1
+
+
+class _Mem32Port:
+    # Applies channel bitmasks with one store per GPIO set/clear register
+
+    def __init__(self, base, gpios):
+        self._w1ts = base + _W1TS
+        self._w1tc = base + _W1TC
+        # Channel mask -> GPIO mask for every combination of channels
+        n = len(gpios)
+        self._map = array('L', [0] * (1 << n))
+        for m in range(1 << n):
+            for ch in range(n):
+                if m & (1 << ch):
+                    self._map[m] |= 1 << gpios[ch]
+
+    def write(self, set_mask, clr_mask):
+        if clr_mask:
+            mem32[self._w1tc] = self._map[clr_mask]
+        if set_mask:
+            mem32[self._w1ts] = self._map[set_mask]
+
+
+def motor_duties(speed, period, stop_high):
+    """
+    Converts a motor speed to the duty steps of its two channels
+
+    Args:
+        speed (int): Speed value (-2048 to 2048)
+        period (int): PWM steps per carrier period
+        stop_high (bool): Drive both channels high when stopped (L298N,
+            TB6612 brake); otherwise both low (L9110S coast)
+
+    Returns:
+        tuple: (duty1, duty2) in steps, 0 = always low, period = always high
+    """
+    if speed > 0:
+        duty1 = speed * period // 2048
+        duty2 = 0
+    elif speed < 0:
+        duty1 = 0
+        duty2 = -speed * period // 2048
+    else:
+        duty1 = duty2 = 0
+    if duty1 == 0 and duty2 == 0 and stop_high:
+        return period, period
+    return duty1, duty2
+
+
+class SoftPWM:
+    """
+    Timer-driven software PWM for a group of digital output pins.
+
+    A channel with duty d is high for the first d of every `period` steps.
+    """
+
+    def __init__(self, pins, period, carrier_hz, duties=None, gpios=None,
+                 gpio_base=None):
+        """
+        Initialize the engine (the timer is not started yet)
+
+        Args:
+            pins (list): Output pins, one per channel
+            period (int): Steps per carrier period (duty resolution)
+            carrier_hz (int): Carrier frequency in Hz
+            duties (list, optional): Initial duty per channel (default 0)
+            gpios (list, optional): GPIO numbers of the pins, enables
+                register writes together with gpio_base
+            gpio_base (int, optional): GPIO peripheral base address
+                (0x60004000 on ESP32-C3); None writes through the pins
+        """
+        self.pins = pins
+        self.period = period
+        self.carrier_hz = carrier_hz
+        self.tick_hz = carrier_hz * period
+
+        if gpios is not None and gpio_base is not None and mem32 is not None:
+            self._port = _Mem32Port(gpio_base, gpios)
+        else:
+            self._port = _PinPort(pins)
+
+        n = len(pins)
+        initial = duties if duties is not None else [0] * n
+        self._duties = (array('H', initial), array('H', initial))
+        # Per-step on/off channel masks, double-buffered with the duties
+        self._on = (array('H', [0] * period), array('H', [0] * period))
+        self._off = (array('H', [0] * period), array('H', [0] * period))
+        self._zero = array('H', [0] * period)
+        self._build(0)
+        self._active = 0
+        self._cnt = 0
+        self._timer = None
+
+    def start(self, timer_id=0):
+        """
+        Start stepping from a hardware timer
+
+        Args:
+            timer_id (int): machine.Timer id to use
+
+        Returns:
+            bool: True if the timer runs, False if tick() must be called
+                from the control loop instead
+        """
+        if Timer is None:
+            return False
+        try:
+            timer = Timer(timer_id)
+            timer.init(freq=self.tick_hz, mode=Timer.PERIODIC, callback=self.tick)
+        except Exception:
+            return False
+        self._timer = timer
+        return True
+
+    def stop(self):
+        """Stop the hardware timer (tick() may still be called manually)"""
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+
+    def running(self):
+        """Returns True if a hardware timer is stepping the engine"""
+        return self._timer is not None
+
+    def set_duties(self, first, *duties):
+        """
+        Set the duty of consecutive channels atomically
+
+        Args:
+            first (int): Index of the first channel to update
+            *duties (int): Duty steps (0..period) for channels first, first+1, ...
+        """
+        active = self._active
+        back = self._duties[1 - active]
+        back[:] = self._duties[active]
+        for i, duty in enumerate(duties):
+            back[first + i] = duty
+        self._build(1 - active)
+        self._active = 1 - active
+
+    def _build(self, buf):
+        # Compute the edge schedule of duty buffer `buf`
+        on = self._on[buf]
+        off = self._off[buf]
+        on[:] = self._zero
+        off[:] = self._zero
+        period = self.period
+        high = 0
+        low = 0
+        for ch, duty in enumerate(self._duties[buf]):
+            bit = 1 << ch
+            if duty > 0:
+                high |= bit
+                if duty < period:
+                    off[duty] |= bit
+            else:
+                low |= bit
+        # Period start rewrites every channel, so a new duty is exact
+        # from the next period on
+        on[0] = high
+        off[0] = low
+
+    def duty(self, channel):
+        """Returns the current duty of a channel in steps"""
+        return self._duties[self._active][channel]
+
+    def tick(self, _timer=None):
+        """Advance one PWM step (timer callback or control-loop fallback)"""
+        cnt = self._cnt + 1
+        if cnt >= self.period:
+            cnt = 0
+        self._cnt = cnt
+        active = self._active
+        on = self._on[active][cnt]
+        off = self._off[active][cnt]
+        if on or off:
+            self._port.write(on, off)
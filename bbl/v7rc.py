@@ -1,6 +1,13 @@
 import network
 import uasyncio
 from bbl.dgram import UDPServer
+from bbl.log import get_logger
+
+_log = get_logger('v7rc')
+
+# UDPServer created by init_ap (for measurement reports from the REPL
+# and latency instrumentation)
+udp_server = None
 
 # Default built-in LED function (used when not provided by user)
 def _default_set_color(r, g, b):
@@ -11,14 +18,14 @@ def _default_set_color(r, g, b):
         np[0] = (r, g, b)
         np.write()
     except:
-        print("[v7rc] LED control failed (NeoPixel not available)")
+        _log.warn("LED control failed (NeoPixel not available)")
 
 # Default callback for UDP messages (used if cb is not provided)
 def _default_cb(msg, addr):
-    print("[v7rc] UDP received:", msg, "from", addr)
+    _log.info("UDP received: %s from %s", msg, addr)
 
 # Initialize AP and optionally start LED and UDP server
-def init_ap(essid, password, cb=None, use_default_led=True, set_color=None, udp_ip='192.168.4.1', udp_port=6188):
+def init_ap(essid, password, cb=None, use_default_led=True, set_color=None, udp_ip='192.168.4.1', udp_port=6188, measure_udp=False):
     wlan = network.WLAN(network.AP_IF)
     wlan.config(essid=essid, password=password, authmode=network.AUTH_WPA_WPA2_PSK)
     wlan.active(True)
@@ -36,6 +43,10 @@ def init_ap(essid, password, cb=None, use_default_led=True, set_color=None, udp_
     if cb is None:
         cb = _default_cb
 
+    # Created now so it can be instrumented before start() runs
+    global udp_server
+    udp_server = UDPServer(measure=measure_udp)
+
     # Monitor if any station is connected and change LED color accordingly
     async def monitor_sta():
         while True:
@@ -51,8 +62,7 @@ def init_ap(essid, password, cb=None, use_default_led=True, set_color=None, udp_
     async def start():
         tasks = []
         if cb:
-            s = UDPServer()
-            tasks.append(s.serve(cb, udp_ip, udp_port))
+            tasks.append(udp_server.serve(cb, udp_ip, udp_port))
         tasks.append(monitor_sta())
         await uasyncio.gather(*tasks)
 
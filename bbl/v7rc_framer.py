@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+V7RC Stream Framer
+CyberBrick V7RC Controller
+
+Cuts an arbitrary byte stream into 20-byte V7RC frames. BLE clients that
+negotiate a larger MTU may pack several frames into one GATT write, and
+frames may be split across two writes; the framer accepts both and hands
+complete frames to a callback.
+
+A candidate frame must start with a known 3-byte command prefix, contain
+no '#' before its last byte and end with '#'. When a byte breaks that
+rule the buffered bytes are rescanned for the next possible frame start,
+so a lost or corrupted fragment costs at most the frames it touched.
+
+Whole frames that are aligned in the input are passed through as slices
+of the input without copying; only fragments go through the preallocated
+reassembly buffer.
+
+Example:
+    >>> framer = V7RCFramer(parser.registry.prefixes(), on_frame)
+    >>> framer.feed(b'SRV1500150015001500#SRV15')
+    >>> framer.feed(b'00150015001500#')
+"""
+
+FRAME_LEN = 20
+_END = 0x23  # '#'
+
+
+class V7RCFramer:
+    """
+    Streaming V7RC frame reassembler with resynchronization.
+
+    Args:
+        prefixes (iterable): Packed 3-byte command prefixes to accept
+            (see CommandRegistry.prefixes() / pack_prefix())
+        emit (function): Callback(frame) for every complete frame; frame is
+            a 20-byte bytes/memoryview only valid until the callback returns
+    """
+
+    def __init__(self, prefixes, emit):
+        self.emit = emit
+        self._buf = bytearray(FRAME_LEN)
+        self._mv = memoryview(self._buf)
+        self._n = 0
+
+        # Prefix lookup for partial (1, 2 byte) and full matches
+        self._first = bytearray(256)
+        self._pairs = set()
+        self._prefixes = set()
+        for p in prefixes:
+            self._first[p >> 16] = 1
+            self._pairs.add(p >> 8)
+            self._prefixes.add(p)
+
+        self.frames = 0
+        self.dropped = 0    # Bytes discarded while resynchronizing
+        self.resyncs = 0
+
+    def reset(self):
+        """Discards a partially assembled frame (e.g. on disconnect)"""
+        self.dropped += self._n
+        self._n = 0
+
+    def _is_prefix(self, buf, start, end):
+        # True if buf[start:end] may begin a frame
+        n = end - start
+        if n <= 0:
+            return True
+        if not self._first[buf[start]]:
+            return False
+        if n == 1:
+            return True
+        if ((buf[start] << 8) | buf[start + 1]) not in self._pairs:
+            return False
+        if n == 2:
+            return True
+        if ((buf[start] << 16) | (buf[start + 1] << 8) | buf[start + 2]) not in self._prefixes:
+            return False
+        for i in range(start + 3, end):
+            if buf[i] == _END:
+                return False
+        return True
+
+    def _resync(self, k):
+        # buf[:k] is not a valid frame start; keep the longest valid tail
+        buf = self._buf
+        s = 1
+        while not self._is_prefix(buf, s, k):
+            s += 1
+        for i in range(k - s):
+            buf[i] = buf[s + i]
+        self._n = k - s
+        self.dropped += s
+        self.resyncs += 1
+
+    def _push(self, b):
+        buf = self._buf
+        k = self._n
+        buf[k] = b
+        k += 1
+        if k < 3:
+            ok = self._is_prefix(buf, 0, k)
+        elif k == 3:
+            ok = ((buf[0] << 16) | (buf[1] << 8) | b) in self._prefixes
+        elif k < FRAME_LEN:
+            ok = b != _END
+        else:
+            ok = b == _END
+
+        if not ok:
+            self._resync(k)
+        elif k == FRAME_LEN:
+            self._n = 0
+            self.frames += 1
+            self.emit(self._mv)
+        else:
+            self._n = k
+
+    def feed(self, data):
+        """
+        Feed received bytes
+
+        Args:
+            data (bytes): Any number of bytes from the stream
+        """
+        n = len(data)
+        i = 0
+        prefixes = self._prefixes
+        mv = memoryview(data)
+        while i < n:
+            # Fast path: an aligned whole frame straight from the input
+            if (self._n == 0 and n - i >= FRAME_LEN
+                    and data[i + FRAME_LEN - 1] == _END
+                    and ((data[i] << 16) | (data[i + 1] << 8) | data[i + 2]) in prefixes
+                    and data.find(b'#', i, i + FRAME_LEN - 1) < 0):
+                self.frames += 1
+                self.emit(mv[i:i + FRAME_LEN])
+                i += FRAME_LEN
+                continue
+
+            self._push(data[i])
+            i += 1
@@ -10,189 +10,270 @@ Supported Commands (all 20 bytes with '#' terminator):
 - SRT: Tank mode PWM (same format as SRV, but CH1/CH2 used for tank control)
 - LED: 4 LED control with RGBM format (4 LEDs × 4 chars)
 - LE2: Second LED group (same format as LED)
+
+Two decoding modes are provided:
+- parse_into(buf, out): decodes straight from the raw bytes/memoryview into a
+  caller-owned array('H') frame and returns a small command code. Nothing is
+  allocated on the success path, so it is safe to call at full packet rate.
+- parse(msg): compatibility wrapper returning the original nested dict.
+
+Commands are routed through a CommandRegistry keyed on the packed 3-byte
+prefix; new commands are added with register_command() and applications
+bind their handlers with registry.set_handler().
+
+Frame layout written by parse_into (see new_frame()):
+- SRV/SR2/SRT: out[0..3] = PWM values
+- SS8:         out[0..7] = PWM values (hex × 10)
+- LED/LE2:     out[i*4 + 0..2] = R, G, B (0-255), out[i*4 + 3] = mode nibble
+               (0 = off, 1-9 = blink M×100ms, A-F = solid)
 """
 
+from array import array
 
-class V7RCParser:
-    """Parser for V7RC protocol commands"""
+# Command codes returned by parse_into (0 means "no valid frame")
+CMD_NONE = 0
+CMD_SRV = 1
+CMD_SR2 = 2
+CMD_SS8 = 3
+CMD_SRT = 4
+CMD_LED = 5
+CMD_LE2 = 6
 
-    def __init__(self, log_func=print):
-        """
-        Initialize V7RC parser
-        
-        Args:
-            log_func: Function to use for logging (default: print)
-        """
-        self.log = log_func
+CMD_NAMES = (None, 'SRV', 'SR2', 'SS8', 'SRT', 'LED', 'LE2')
 
-    def parse(self, msg):
-        """
-        Parse V7RC command and return structured data
-        
-        Args:
-            msg (bytes): Raw UDP message
-            
-        Returns:
-            dict: {
-                'type': 'SRV'|'SR2'|'SS8'|'SRT'|'LED'|'LE2'|None,
-                'data': {...}  # Command-specific data
-            }
-            Returns None if parsing fails
-        """
-        if not msg or len(msg) != 20:
-            self.log(f"[v7rc_parser] Invalid length: {len(msg) if msg else 0}, expected 20")
-            return None
+FRAME_LEN = 20       # Every V7RC frame is exactly 20 bytes
+FRAME_SLOTS = 16     # Decoded values per frame (4 LEDs × RGBM is the largest)
 
-        # Check terminator
-        if not msg.endswith(b'#'):
-            self.log(f"[v7rc_parser] Missing '#' terminator")
-            return None
+_TERMINATOR = 0x23   # '#'
+_INVALID = 0xFF
 
-        try:
-            # Extract command type (first 3 bytes)
-            cmd_type = msg[:3].decode('ascii')
-            # Extract data (bytes 3-19, excluding '#')
-            data_str = msg[3:19].decode('ascii')
-
-            # Route to appropriate parser
-            if cmd_type == 'SRV':
-                return {'type': 'SRV', 'data': self._parse_srv(data_str)}
-            elif cmd_type == 'SR2':
-                return {'type': 'SR2', 'data': self._parse_sr2(data_str)}
-            elif cmd_type == 'SS8':
-                return {'type': 'SS8', 'data': self._parse_ss8(data_str)}
-            elif cmd_type == 'SRT':
-                return {'type': 'SRT', 'data': self._parse_srt(data_str)}
-            elif cmd_type == 'LED':
-                return {'type': 'LED', 'data': self._parse_led(data_str)}
-            elif cmd_type == 'LE2':
-                return {'type': 'LE2', 'data': self._parse_le2(data_str)}
-            else:
-                self.log(f"[v7rc_parser] Unknown command type: {cmd_type}")
-                return None
 
-        except Exception as e:
-            self.log(f"[v7rc_parser] Parse error: {e}")
-            return None
+def _build_table(ranges):
+    table = bytearray(b'\xff' * 256)
+    for chars, first_value in ranges:
+        for i, c in enumerate(chars):
+            table[c] = first_value + i
+    return table
 
-    def _parse_srv(self, data):
-        """
-        Parse SRV command: 4 PWM values (0000-2000)
-        Format: SRV1500150015001500#
-        
-        Args:
-            data (str): 16-character data string
-            
-        Returns:
-            dict: {'pwm': [ch1, ch2, ch3, ch4]} where values are 0-2000
-        """
-        if len(data) != 16:
-            raise ValueError(f"SRV data length {len(data)}, expected 16")
 
-        pwm_values = []
-        for i in range(4):
-            pwm_str = data[i*4:(i+1)*4]
-            pwm_val = int(pwm_str)
-            if not 0 <= pwm_val <= 2000:
-                self.log(f"[v7rc_parser] SRV CH{i+1} out of range: {pwm_val}")
-            pwm_values.append(pwm_val)
+# Lookup tables indexed by raw byte value (0xFF marks an invalid character)
+_DIGIT = _build_table(((b'0123456789', 0),))
+_NIBBLE = _build_table(((b'0123456789', 0), (b'ABCDEF', 10), (b'abcdef', 10)))
+
+
+def pack_prefix(buf):
+    """
+    Packs the 3-byte command prefix of a frame into a 24-bit int
+
+    Args:
+        buf (bytes|bytearray|memoryview): Frame or prefix (at least 3 bytes)
+
+    Returns:
+        int: (b0 << 16) | (b1 << 8) | b2
+    """
+    return (buf[0] << 16) | (buf[1] << 8) | buf[2]
+
+
+def new_frame():
+    """
+    Allocates a frame buffer for parse_into
+
+    Returns:
+        array: array('H') with FRAME_SLOTS zeroed entries
+    """
+    return array('H', [0] * FRAME_SLOTS)
+
+
+def _decode_pwm4(buf, out, log):
+    # 4 channels × 4 decimal digits starting at byte 3
+    digit = _DIGIT
+    pos = 3
+    for ch in range(4):
+        d0 = digit[buf[pos]]
+        d1 = digit[buf[pos + 1]]
+        d2 = digit[buf[pos + 2]]
+        d3 = digit[buf[pos + 3]]
+        if d0 == _INVALID or d1 == _INVALID or d2 == _INVALID or d3 == _INVALID:
+            return False
+        val = ((d0 * 10 + d1) * 10 + d2) * 10 + d3
+        if val > 2000:
+            log(f"[v7rc_parser] SRV CH{ch+1} out of range: {val}")
+        out[ch] = val
+        pos += 4
+    return True
+
 
-        return {'pwm': pwm_values}
+def _decode_ss8(buf, out, log):
+    # 8 channels × 2 hex digits, value × 10 per protocol
+    nibble = _NIBBLE
+    pos = 3
+    for ch in range(8):
+        hi = nibble[buf[pos]]
+        lo = nibble[buf[pos + 1]]
+        if hi == _INVALID or lo == _INVALID:
+            return False
+        out[ch] = ((hi << 4) | lo) * 10
+        pos += 2
+    return True
 
-    def _parse_sr2(self, data):
+
+def _decode_rgbm(buf, out, log):
+    # 4 LEDs × RGBM hex nibbles; colors scaled 0-F → 0-255 (× 17)
+    nibble = _NIBBLE
+    for i in range(16):
+        v = nibble[buf[3 + i]]
+        if v == _INVALID:
+            return False
+        # Every 4th nibble (M) is stored raw, R/G/B are scaled
+        out[i] = v if (i & 3) == 3 else v * 17
+    return True
+
+
+class CommandRegistry:
+    """
+    Table-driven V7RC command registry
+
+    Maps the packed 3-byte prefix of a frame to a small command code, and
+    each code to a (decoder, handler) pair, so a frame is routed with one
+    dict lookup and no string decoding.
+
+    - decoder(buf, out, log) -> bool: fills `out` from the raw frame
+    - handler(frame): applies a decoded frame (bound by the application)
+
+    Example:
+        >>> registry = CommandRegistry()
+        >>> code = registry.register_command(b'SRV', decode_srv, apply_srv)
+        >>> registry.dispatch(code, frame)
+    """
+
+    def __init__(self):
+        self._codes = {}        # Packed prefix -> command code
+        self.names = [None]     # Indexed by command code (0 = CMD_NONE)
+        self.decoders = [None]
+        self.handlers = [None]
+
+    def __len__(self):
+        """Number of code slots, including CMD_NONE"""
+        return len(self.names)
+
+    def register_command(self, prefix, decoder, handler=None):
         """
-        Parse SR2 command: 4 PWM values for C5-C8 (same format as SRV)
-        Format: SR21500100018002000#
-        
+        Register (or replace) a command
+
         Args:
-            data (str): 16-character data string
-            
+            prefix (bytes): 3-byte command prefix, e.g. b'SRV'
+            decoder (function): decoder(buf, out, log) -> bool
+            handler (function, optional): handler(frame)
+
         Returns:
-            dict: {'pwm': [ch5, ch6, ch7, ch8]} where values are 0-2000
+            int: Command code assigned to the prefix
         """
-        # Same format as SRV, but for channels 5-8
-        result = self._parse_srv(data)
-        return result
+        if len(prefix) != 3:
+            raise ValueError("Command prefix must be 3 bytes")
+
+        key = pack_prefix(prefix)
+        code = self._codes.get(key)
+        if code is None:
+            code = len(self.names)
+            self._codes[key] = code
+            self.names.append(bytes(prefix).decode())
+            self.decoders.append(decoder)
+            self.handlers.append(handler)
+        else:
+            self.decoders[code] = decoder
+            self.handlers[code] = handler
+        return code
 
-    def _parse_ss8(self, data):
+    def set_handler(self, prefix, handler):
         """
-        Parse SS8 command: 8 hex values (00-FF) × 10 = PWM value
-        Format: SS896969696969696#
-        
+        Bind a handler to an already registered command
+
         Args:
-            data (str): 16-character data string (8 channels × 2 hex digits)
-            
+            prefix (bytes): 3-byte command prefix
+            handler (function): handler(frame), or None to unbind
+
         Returns:
-            dict: {'pwm': [ch1, ch2, ..., ch8]} where values are 0-2550
+            int: Command code of the prefix
         """
-        if len(data) != 16:
-            raise ValueError(f"SS8 data length {len(data)}, expected 16")
-
-        pwm_values = []
-        for i in range(8):
-            hex_str = data[i*2:(i+1)*2]
-            hex_val = int(hex_str, 16)  # Convert hex to decimal
-            pwm_val = hex_val * 10  # Multiply by 10 per protocol
-            pwm_values.append(pwm_val)
-
-        return {'pwm': pwm_values}
+        code = self._codes.get(pack_prefix(prefix))
+        if code is None:
+            raise ValueError(f"Unknown command prefix: {prefix}")
+        self.handlers[code] = handler
+        return code
 
-    def _parse_srt(self, data):
+    def lookup(self, buf):
         """
-        Parse SRT command: Tank mode PWM (same format as SRV)
-        Format: SRT1500150015001500#
-        CH1 = throttle, CH2 = steering (converted to tank control)
-        
-        Args:
-            data (str): 16-character data string
-            
-        Returns:
-            dict: {
-                'throttle': int,  # CH1 value (0-2000)
-                'steering': int,  # CH2 value (0-2000)
-                'pwm': [ch1, ch2, ch3, ch4]  # Raw PWM values
-            }
+        Returns the command code for the frame prefix (CMD_NONE if unknown)
         """
-        result = self._parse_srv(data)
-        # Extract throttle and steering from first two channels
-        result['throttle'] = result['pwm'][0]
-        result['steering'] = result['pwm'][1]
-        return result
+        return self._codes.get(pack_prefix(buf), CMD_NONE)
 
-    def _parse_led(self, data):
+    def prefixes(self):
+        """Returns the packed prefixes of all registered commands"""
+        return list(self._codes.keys())
+
+    def dispatch(self, code, frame):
         """
-        Parse LED command: 4 LEDs with RGBM format
-        Format: LEDF00AF00AF00AF00A#
-        Each LED: 4 chars (R, G, B, M)
-        - R/G/B: 0-F hex (brightness)
-        - M: 0-9 = blink (M×100ms on per second), A-F = solid
-        
+        Call the handler bound to a command code
+
         Args:
-            data (str): 16-character data string (4 LEDs × 4 chars)
-            
+            code (int): Code returned by V7RCParser.parse_into
+            frame (array): Decoded frame
+
         Returns:
-            dict: {'leds': [
-                {'r': 0-255, 'g': 0-255, 'b': 0-255, 'mode': 'solid'|'blink', 'blink_ms': int},
-                ...
-            ]}
+            bool: True if a handler was called
         """
-        if len(data) != 16:
-            raise ValueError(f"LED data length {len(data)}, expected 16")
+        handler = self.handlers[code]
+        if handler is None:
+            return False
+        handler(frame)
+        return True
+
 
+# Default registry with the built-in commands (codes match CMD_* above)
+registry = CommandRegistry()
+registry.register_command(b'SRV', _decode_pwm4)
+registry.register_command(b'SR2', _decode_pwm4)
+registry.register_command(b'SS8', _decode_ss8)
+registry.register_command(b'SRT', _decode_pwm4)
+registry.register_command(b'LED', _decode_rgbm)
+registry.register_command(b'LE2', _decode_rgbm)
+
+
+def register_command(prefix, decoder, handler=None):
+    """
+    Register a command on the default registry
+
+    Example:
+        >>> def decode_xyz(buf, out, log):
+        ...     out[0] = buf[3]
+        ...     return True
+        >>> code = register_command(b'XYZ', decode_xyz, my_handler)
+    """
+    return registry.register_command(prefix, decoder, handler)
+
+
+def frame_to_dict(name, frame):
+    """
+    Converts a decoded frame into the dict format returned by parse()
+
+    The shape follows the command name, not its code: codes are handed
+    out in registration order, so they only match CMD_* in the default
+    registry.
+
+    Args:
+        name (str): Registered command name, e.g. registry.names[code]
+        frame (array): Frame filled by parse_into
+
+    Returns:
+        dict: Command-specific data (see V7RCParser.parse)
+    """
+    if name == 'SS8':
+        return {'pwm': list(frame[:8])}
+
+    if name == 'LED' or name == 'LE2':
         leds = []
-        for i in range(4):
-            rgbm = data[i*4:(i+1)*4]
-            r_hex = int(rgbm[0], 16)
-            g_hex = int(rgbm[1], 16)
-            b_hex = int(rgbm[2], 16)
-            m_hex = int(rgbm[3], 16)
-
-            # Convert 0-F to 0-255 (multiply by 17)
-            r = r_hex * 17
-            g = g_hex * 17
-            b = b_hex * 17
-
-            # Parse mode: 0-9 = blink, A-F (10-15) = solid
+        for i in range(0, 16, 4):
+            m_hex = frame[i + 3]
             if m_hex == 0:
                 mode = 'off'
                 blink_ms = 0
@@ -202,29 +283,100 @@ class V7RCParser:
             else:
                 mode = 'solid'
                 blink_ms = 0
-
             leds.append({
-                'r': r,
-                'g': g,
-                'b': b,
+                'r': frame[i],
+                'g': frame[i + 1],
+                'b': frame[i + 2],
                 'mode': mode,
                 'blink_ms': blink_ms
             })
-
         return {'leds': leds}
 
-    def _parse_le2(self, data):
+    if name == 'SRV' or name == 'SR2' or name == 'SRT':
+        data = {'pwm': list(frame[:4])}
+        if name == 'SRT':
+            # CH1 = throttle, CH2 = steering
+            data['throttle'] = frame[0]
+            data['steering'] = frame[1]
+        return data
+
+    # Commands added through register_command(): raw frame values
+    return {'values': list(frame)}
+
+
+class V7RCParser:
+    """Parser for V7RC protocol commands"""
+
+    def __init__(self, log_func=print, commands=None):
+        """
+        Initialize V7RC parser
+        
+        Args:
+            log_func: Function to use for logging (default: print)
+            commands (CommandRegistry, optional): Command table to decode
+                with (default: the module-level registry)
+        """
+        self.log = log_func
+        self.registry = commands if commands is not None else registry
+        self._frame = new_frame()  # Scratch frame used by parse()
+
+    def parse_into(self, buf, out):
+        """
+        Decode a V7RC frame without allocating
+        
+        Works directly on the raw bytes using digit/hex lookup tables and
+        writes the decoded values into a caller-owned frame.
+        
+        Args:
+            buf (bytes|bytearray|memoryview): Raw 20-byte message
+            out (array): Frame from new_frame() (array('H'), FRAME_SLOTS long)
+            
+        Returns:
+            int: Command code (CMD_SRV ... CMD_LE2), or CMD_NONE if the
+                frame is invalid. `out` is only meaningful for a non-zero code.
+        """
+        n = len(buf) if buf else 0
+        if n != FRAME_LEN:
+            self.log(f"[v7rc_parser] Invalid length: {n}, expected 20")
+            return CMD_NONE
+
+        # Check terminator
+        if buf[19] != _TERMINATOR:
+            self.log(f"[v7rc_parser] Missing '#' terminator")
+            return CMD_NONE
+
+        commands = self.registry
+        code = commands.lookup(buf)
+        if code == CMD_NONE:
+            self.log(f"[v7rc_parser] Unknown command type: {bytes(buf[:3])}")
+            return CMD_NONE
+
+        if not commands.decoders[code](buf, out, self.log):
+            self.log(f"[v7rc_parser] Parse error: invalid {commands.names[code]} data {bytes(buf[3:19])}")
+            return CMD_NONE
+        return code
+
+    def parse(self, msg):
         """
-        Parse LE2 command: Second LED group (same format as LED)
-        Format: LE20111100000111110000022222#
+        Parse V7RC command and return structured data
+        
+        Compatibility wrapper around parse_into(); allocates the result dict.
         
         Args:
-            data (str): 16-character data string
+            msg (bytes): Raw UDP message
             
         Returns:
-            dict: Same as _parse_led
+            dict: {
+                'type': 'SRV'|'SR2'|'SS8'|'SRT'|'LED'|'LE2'|None,
+                'data': {...}  # Command-specific data
+            }
+            Returns None if parsing fails
         """
-        return self._parse_led(data)
+        code = self.parse_into(msg, self._frame)
+        if code == CMD_NONE:
+            return None
+        name = self.registry.names[code]
+        return {'type': name, 'data': frame_to_dict(name, self._frame)}
 
 
 # Test code
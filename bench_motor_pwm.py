@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Motor Software PWM Micro-benchmark (run on the device)
+
+Compares the cost of one software PWM step of the previous per-pin
+implementation (four comparisons and four Pin.on()/off() calls per
+step) with the precomputed edge schedule of bbl.softpwm, through Pin
+objects and through the GPIO set/clear registers.
+
+Run with the motors disconnected or unpowered:
+    mpremote run bench_motor_pwm.py
+"""
+
+import utime
+from machine import Pin
+from bbl.softpwm import SoftPWM
+
+try:
+    from bbl.config import SOFTWARE_PWM_GPIO_BASE
+except ImportError:
+    SOFTWARE_PWM_GPIO_BASE = None
+
+GPIOS = [4, 5, 6, 7]
+PERIOD = 100
+STEPS = 5000
+DUTIES = (60, 0, 0, 25)   # Motor 1 forward 60%, motor 2 reverse 25%
+
+
+class LegacyPWM:
+    """Per-step logic of the original MotorsController.motors_period_cb"""
+
+    def __init__(self, pins, period, duties):
+        self.motor1_1, self.motor1_2, self.motor2_1, self.motor2_2 = pins
+        self.period = period
+        (self.motor1_1_duty, self.motor1_2_duty,
+         self.motor2_1_duty, self.motor2_2_duty) = duties
+        self.period_cnt = 0
+
+    def tick(self):
+        self.period_cnt = (self.period_cnt + 1) % self.period
+
+        if self.motor1_1_duty == 0 and self.motor1_2_duty == 0:
+            self.motor1_1.on()
+            self.motor1_2.on()
+        else:
+            if self.period_cnt >= self.motor1_1_duty:
+                self.motor1_1.off()
+            else:
+                self.motor1_1.on()
+
+            if self.period_cnt >= self.motor1_2_duty:
+                self.motor1_2.off()
+            else:
+                self.motor1_2.on()
+
+        if self.motor2_1_duty == 0 and self.motor2_2_duty == 0:
+            self.motor2_1.on()
+            self.motor2_2.on()
+        else:
+            if self.period_cnt >= self.motor2_1_duty:
+                self.motor2_1.off()
+            else:
+                self.motor2_1.on()
+
+            if self.period_cnt >= self.motor2_2_duty:
+                self.motor2_2.off()
+            else:
+                self.motor2_2.on()
+
+
+def measure(tick, steps=STEPS):
+    """Returns the mean time of tick() in microseconds"""
+    t0 = utime.ticks_us()
+    for _ in range(steps):
+        tick()
+    return utime.ticks_diff(utime.ticks_us(), t0) / steps
+
+
+def run():
+    pins = [Pin(g, Pin.OUT) for g in GPIOS]
+
+    # Loop overhead, subtracted from every result
+    base = measure(lambda: None)
+
+    legacy = LegacyPWM(pins, PERIOD, DUTIES)
+    results = [('legacy per-pin', measure(legacy.tick) - base)]
+
+    pwm = SoftPWM(pins, PERIOD, 50)
+    pwm.set_duties(0, *DUTIES)
+    results.append(('schedule, Pin', measure(pwm.tick) - base))
+
+    if SOFTWARE_PWM_GPIO_BASE is not None:
+        pwm = SoftPWM(pins, PERIOD, 50, gpios=GPIOS, gpio_base=SOFTWARE_PWM_GPIO_BASE)
+        pwm.set_duties(0, *DUTIES)
+        results.append(('schedule, registers', measure(pwm.tick) - base))
+
+    for pin in pins:
+        pin.off()
+
+    print("Software PWM step cost (%d steps, period %d)" % (STEPS, PERIOD))
+    for name, us in results:
+        print("  %-20s %6.2f us/tick" % (name, us))
+
+
+run()
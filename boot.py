@@ -5,6 +5,15 @@ import gc
 _PRODUCT_NAME = "RC"
 _PRODUCT_VERSION = "01.00.00.13"
 
+# Production build: compile with optimisation level 1 so `if __debug__:`
+# blocks (per-packet debug logging) and asserts are removed entirely
+_STRIP_DEBUG_LOGS = False
+
+if _STRIP_DEBUG_LOGS:
+    import micropython
+    micropython.opt_level(1)
+    del micropython
+
 bbl_product.set_app_name(_PRODUCT_NAME)
 bbl_product.set_app_version(_PRODUCT_VERSION)
 del bbl_product
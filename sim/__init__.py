@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+Host-side Hardware Simulator
+CyberBrick V7RC Controller
+
+Drop-in CPython stand-ins for the MicroPython modules the firmware
+imports, so boot.py and app/main.py run unmodified on a Linux box:
+
+    machine      Pin/PWM/Timer/bitstream/mem32, every change recorded
+                 in sim.machine.trace with a timestamp
+    network      WLAN access point without a radio
+    usocket      host UDP sockets on the loopback interface
+    uselect      host select.poll
+    bluetooth    GATT server; tests inject connects and writes
+    uasyncio     CPython asyncio plus the uasyncio extras (sleep_ms,
+                 ThreadSafeFlag, core._io_queue)
+    utime        MicroPython ticks (2^30 wrap) on a pluggable clock
+                 (host time, or sim.vclock.VirtualClock for instant,
+                 deterministic runs)
+    micropython  const(), opt_level(), schedule()
+    neopixel     the firmware NeoPixel driver on sim.machine.bitstream
+
+Command line (from the repository root):
+
+    python -m sim                      # boot.py, runs until Ctrl-C
+    python -m sim app/main.py -t 5     # main.py for 5 seconds
+
+From a test:
+
+    >>> import sim
+    >>> async def scenario():
+    ...     sim.bluetooth.BLE().inject_write(b'SRV1500150015001500#')
+    >>> sim.run('app/main.py', duration_s=1, scenario=scenario)
+    >>> sim.machine.trace
+
+    >>> clock = sim.VirtualClock()
+    >>> sim.run('app/main.py', duration_s=3600, clock=clock)  # seconds
+
+    >>> sim.reset(BLE_ENABLED=True)     # bbl.config overrides
+    >>> servos = sim.servos()           # Fresh controllers for unit tests
+    >>> motors = sim.motors('L9110S', hardware=True)
+
+Files the firmware saves (the motor driver detection cache) go to the
+fs directory given to run(), otherwise to scratch_dir(), never into the
+repository.
+"""
+
+import os
+import sys
+from sim.vclock import VirtualClock, VirtualTimeLoop
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# MicroPython module name -> simulator module
+MODULES = ('utime', 'micropython', 'machine', 'network', 'usocket',
+           'uselect', 'bluetooth', 'uasyncio', 'uasyncio.core', 'neopixel')
+
+_installed = False
+_scratch = None
+
+
+def install():
+    """
+    Register the stand-ins in sys.modules (idempotent)
+
+    Returns the simulator package, whose submodules are the stand-ins.
+    """
+    global _installed
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    if not _installed:
+        import importlib
+        for name in MODULES:
+            if name == 'neopixel':
+                continue  # Needs machine in place first, imported below
+            sys.modules[name] = importlib.import_module('sim.' + name)
+        sys.modules['neopixel'] = importlib.import_module('sim.neopixel')
+        _installed = True
+        _redirect_files()
+    return sys.modules[__name__]
+
+
+def scratch_dir():
+    """
+    Temporary device filesystem for firmware files when run() has no fs
+    (created on first use, removed when the interpreter exits)
+    """
+    global _scratch
+    if _scratch is None:
+        import atexit
+        import shutil
+        import tempfile
+        _scratch = tempfile.mkdtemp(prefix='cyberbrick-sim-')
+        atexit.register(shutil.rmtree, _scratch, True)
+    return _scratch
+
+
+def _redirect_files(fs=None):
+    # The firmware writes its files relative to the working directory,
+    # which is the repository for tests and run() without fs
+    import bbl.config
+    path = os.path.join(os.path.abspath(fs) if fs else scratch_dir(), 'detected_driver.txt')
+    bbl.config.DETECTED_DRIVER_FILE = path
+    motors = sys.modules.get('bbl.motors')
+    if motors is not None:
+        motors.DETECTED_DRIVER_FILE = path
+
+
+def reset(**config):
+    """
+    Power-cycle the simulated device
+
+    Clears pins, timers and traces, forgets the WLAN/BLE state and unloads
+    the firmware modules so controller singletons are created again.
+    Keyword arguments override bbl.config values; the firmware modules are
+    loaded again after that, so values bound at import see them too.
+    """
+    from sim import machine, network, bluetooth, usocket
+    import importlib
+    machine.reset_state()
+    network._interfaces.clear()
+    bluetooth.BLE._instance = None
+    del usocket.bound[:]
+    for name in list(sys.modules):
+        if name == 'bbl' or name.startswith('bbl.') or name == 'bbl_product':
+            del sys.modules[name]
+    if config:
+        import bbl.config
+        cfg = bbl.config
+        for name, value in config.items():
+            setattr(cfg, name, value)
+        # Everything but the config loads again, from a fresh package
+        for name in list(sys.modules):
+            if (name == 'bbl' or name.startswith('bbl.')) and name != 'bbl.config':
+                del sys.modules[name]
+        importlib.import_module('bbl').config = cfg
+    # neopixel re-exports bbl.neopixel, reload it with the firmware
+    sys.modules.pop('sim.neopixel', None)
+    sys.modules['neopixel'] = importlib.import_module('sim.neopixel')
+    _redirect_files()
+
+
+def servos(freq=None):
+    """
+    Reset the device and create a ServosController
+
+    Args:
+        freq (int, optional): Stepping call rate for set_call_freq()
+    """
+    reset()
+    from bbl.servos import ServosController
+    servos = ServosController()
+    if freq is not None:
+        servos.set_call_freq(freq)
+    return servos
+
+
+def motors(driver='L298N', hardware=False, config=None):
+    """
+    Reset the device and create a MotorsController for a fixed driver
+
+    The software PWM carrier is stepped by the control loop (no Timer).
+
+    Args:
+        driver (str): MOTOR_DRIVER_TYPE
+        hardware (bool): The driver's use_hardware_pwm
+        config (dict, optional): Replaces the driver's MOTOR_DRIVER_CONFIG
+            entry
+    """
+    reset(MOTOR_DRIVER_TYPE=driver, SOFTWARE_PWM_USE_TIMER=False)
+    import bbl.config
+    if config is not None:
+        bbl.config.MOTOR_DRIVER_CONFIG[driver] = config
+    bbl.config.MOTOR_DRIVER_CONFIG[driver]['use_hardware_pwm'] = hardware
+    from bbl.motors import MotorsController
+    return MotorsController()
+
+
+def use_clock(clock=None):
+    """
+    Run utime and uasyncio on a VirtualClock (None: host time again)
+    """
+    install()
+    from sim import utime, uasyncio
+    import asyncio
+    if clock is None:
+        utime.reset_clock()
+        uasyncio.loop_factory = asyncio.new_event_loop
+    else:
+        utime.set_clock(clock.now_us, clock.sleep_us)
+        uasyncio.loop_factory = lambda: VirtualTimeLoop(clock)
+
+
+def run(path='boot.py', duration_s=None, scenario=None, fs=None, port_map=None,
+        clock=None):
+    """
+    Execute a firmware script in the simulator
+
+    Args:
+        path (str): Script, relative to the repository root
+        duration_s (float, optional): Stop uasyncio.run() after this long
+        scenario (function, optional): Coroutine function started next to
+            the firmware's main coroutine (inject traffic, sample state)
+        fs (str, optional): Working directory standing in for the device
+            filesystem (default: repository root, with the files the
+            firmware writes in scratch_dir())
+        port_map (dict, optional): Firmware port -> host port for
+            usocket, e.g. {6188: 0}
+        clock (VirtualClock, optional): Run on simulated time; the
+            duration is then simulated seconds
+
+    Returns:
+        dict: The script's globals
+    """
+    install()
+    from sim import uasyncio, usocket
+    uasyncio.run_limit_s = duration_s
+    uasyncio.background = [scenario] if scenario is not None else []
+    usocket.PORT_MAP = dict(port_map or {})
+    if clock is not None:
+        use_clock(clock)
+    _redirect_files(fs)
+
+    path = os.path.join(ROOT, path)
+    with open(path) as f:
+        source = f.read()
+    scope = {'__name__': '__main__', '__file__': path}
+
+    cwd = os.getcwd()
+    os.chdir(fs or ROOT)
+    try:
+        exec(compile(source, path, 'exec'), scope)
+    finally:
+        os.chdir(cwd)
+        if clock is not None:
+            use_clock(None)
+        uasyncio.run_limit_s = None
+        uasyncio.background = []
+    return scope
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Run firmware scripts on the host: python -m sim [script] [-t seconds]
+"""
+
+import argparse
+import sys
+
+import sim
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m sim',
+                                     description='Run CyberBrick firmware on the host')
+    parser.add_argument('script', nargs='?', default='boot.py',
+                        help='script relative to the repository root (default: boot.py)')
+    parser.add_argument('-t', '--duration', type=float, default=None,
+                        help='stop after this many seconds')
+    parser.add_argument('--fs', default=None,
+                        help='directory used as the device filesystem '
+                             '(default: repository, firmware writes to a temporary directory)')
+    parser.add_argument('-v', '--virtual', action='store_true',
+                        help='run on a virtual clock (as fast as possible)')
+    parser.add_argument('--wrap-in', type=float, default=None, metavar='SECONDS',
+                        help='virtual clock: ticks_ms() wraps after this long')
+    parser.add_argument('-p', '--port', action='append', default=[],
+                        metavar='DEVICE:HOST', help='remap a UDP port, e.g. 6188:16188')
+    parser.add_argument('--replay', default=None, metavar='TRACE',
+                        help='deliver the frames of a recorded input trace (see sim.traces)')
+    parser.add_argument('--transport', choices=('ble', 'udp'), default='ble',
+                        help='how --replay delivers frames (default: ble)')
+    parser.add_argument('--start', type=float, default=1.0, metavar='SECONDS',
+                        help='--replay: delay before the first frame (default: 1)')
+    args = parser.parse_args()
+
+    port_map = {}
+    for item in args.port:
+        device, host = item.split(':')
+        port_map[int(device)] = int(host)
+
+    clock = None
+    if args.wrap_in is not None:
+        clock = sim.VirtualClock.before_wrap(int(args.wrap_in * 1000))
+    elif args.virtual:
+        clock = sim.VirtualClock()
+
+    scenario = None
+    if args.replay:
+        from sim import traces
+        if args.transport == 'ble':
+            import bbl.config
+            bbl.config.BLE_ENABLED = True
+        scenario = traces.replay(traces.load(args.replay), args.transport,
+                                 start_ms=int(args.start * 1000))
+
+    try:
+        sim.run(args.script, duration_s=args.duration, scenario=scenario, fs=args.fs,
+                port_map=port_map, clock=clock)
+    except KeyboardInterrupt:
+        pass
+    print("[sim] %d trace entries" % len(sim.machine.trace))
+    neopixel = sys.modules.get('bbl.neopixel')
+    if neopixel is not None and args.duration:
+        # Strip writes the dirty check turned away (unchanged buffer)
+        print("[sim] NeoPixel: %.1f bitstream calls/s, %.1f/s avoided"
+              % (neopixel.counters['writes'] / args.duration,
+                 neopixel.counters['skipped'] / args.duration))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+bluetooth for the host simulator
+
+A GATT server without a radio. Tests play the central through the
+injection helpers of the BLE object:
+
+    >>> ble = bluetooth.BLE()
+    >>> ble.inject_connect()
+    >>> ble.inject_write(b'SRV1500150015001500#')
+    >>> ble.notifications      # what the firmware sent back
+
+Writes are truncated to the attribute buffer size like the stack does
+(20 bytes unless gatts_set_buffer() raised it).
+"""
+
+FLAG_BROADCAST = 0x0001
+FLAG_READ = 0x0002
+FLAG_WRITE_NO_RESPONSE = 0x0004
+FLAG_WRITE = 0x0008
+FLAG_NOTIFY = 0x0010
+FLAG_INDICATE = 0x0020
+
+_IRQ_CENTRAL_CONNECT = 1
+_IRQ_CENTRAL_DISCONNECT = 2
+_IRQ_GATTS_WRITE = 3
+
+_DEFAULT_BUFFER = 20
+
+
+class UUID:
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return isinstance(other, UUID) and self.value == other.value
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __repr__(self):
+        return "UUID(%r)" % (self.value,)
+
+
+class BLE:
+    _instance = None
+
+    def __new__(cls):
+        # Singleton, like the firmware
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._reset()
+        return cls._instance
+
+    def _reset(self):
+        self._active = False
+        self._irq = None
+        self._config = {'mtu': 23, 'gap_name': 'MPY'}
+        self._values = {}       # handle -> bytes
+        self._buffers = {}      # handle -> max write length
+        self._writable = []     # handles that accept writes
+        self._next_handle = 1
+        self.advertising = None
+        self.conn_handle = None
+        self.notifications = []  # (conn_handle, value_handle, bytes)
+
+    def active(self, state=None):
+        if state is None:
+            return self._active
+        self._active = bool(state)
+
+    def config(self, *args, **kwargs):
+        if args:
+            return self._config[args[0]]
+        self._config.update(kwargs)
+
+    def irq(self, handler):
+        self._irq = handler
+
+    def gap_advertise(self, interval_us, adv_data=None, resp_data=None, connectable=True):
+        self.advertising = None if interval_us is None else (interval_us, bytes(adv_data or b''))
+
+    def gap_disconnect(self, conn_handle):
+        if conn_handle == self.conn_handle:
+            self.inject_disconnect()
+            return True
+        return False
+
+    def gatts_register_services(self, services):
+        handles = []
+        for _uuid, characteristics in services:
+            service_handles = []
+            self._next_handle += 1  # Service declaration
+            for char in characteristics:
+                uuid, flags = char[0], char[1]
+                self._next_handle += 1  # Characteristic declaration
+                handle = self._next_handle
+                self._next_handle += 1
+                self._values[handle] = b''
+                self._buffers[handle] = _DEFAULT_BUFFER
+                if flags & (FLAG_WRITE | FLAG_WRITE_NO_RESPONSE):
+                    self._writable.append(handle)
+                service_handles.append(handle)
+                for _desc in (char[2] if len(char) > 2 else ()):
+                    self._next_handle += 1
+            handles.append(tuple(service_handles))
+        return tuple(handles)
+
+    def gatts_read(self, value_handle):
+        return self._values[value_handle]
+
+    def gatts_write(self, value_handle, data, send_update=False):
+        self._values[value_handle] = bytes(data)
+
+    def gatts_set_buffer(self, value_handle, length, append=False):
+        self._buffers[value_handle] = length
+
+    def gatts_notify(self, conn_handle, value_handle, data=None):
+        if conn_handle != self.conn_handle:
+            raise OSError(128, 'ENOTCONN')
+        if data is None:
+            data = self._values[value_handle]
+        self.notifications.append((conn_handle, value_handle, bytes(data)))
+
+    # Central side (test helpers)
+
+    def _fire(self, event, data):
+        if self._irq is not None:
+            self._irq(event, data)
+
+    def inject_connect(self, conn_handle=1, addr=b'\x02\x00\x00\x00\x00\x02'):
+        """Simulate a central connecting"""
+        self.conn_handle = conn_handle
+        self._fire(_IRQ_CENTRAL_CONNECT, (conn_handle, 0, memoryview(addr)))
+
+    def inject_disconnect(self, addr=b'\x02\x00\x00\x00\x00\x02'):
+        """Simulate the central disconnecting"""
+        conn_handle = self.conn_handle
+        self.conn_handle = None
+        self._fire(_IRQ_CENTRAL_DISCONNECT, (conn_handle, 0, memoryview(addr)))
+
+    def inject_write(self, data, value_handle=None):
+        """
+        Simulate the central writing to a characteristic
+
+        Args:
+            data (bytes): Value written (truncated to the buffer size)
+            value_handle (int, optional): Target, default the first
+                writable characteristic
+        """
+        if self.conn_handle is None:
+            self.inject_connect()
+        if value_handle is None:
+            value_handle = self._writable[0]
+        self._values[value_handle] = bytes(data[:self._buffers[value_handle]])
+        self._fire(_IRQ_GATTS_WRITE, (self.conn_handle, value_handle))
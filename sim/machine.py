@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+machine for the host simulator
+
+Pin, PWM, Timer, bitstream and mem32 stand-ins. Every output change is
+appended to `trace` as (time_us, kind, pin, value) so tests and
+benchmarks can check what the firmware did to the hardware:
+
+    ('pin', 4, 1)            GPIO 4 driven high
+    ('pwm_duty', 0, 77)      PWM on GPIO 0 set to duty 77 (0-1023)
+    ('pwm_freq', 20, 440)    PWM on GPIO 20 set to 440 Hz
+    ('bitstream', 21, b'..') bytes clocked out on GPIO 21
+
+reset() raises SystemExit like a reboot ends the script; reset_state()
+clears the simulated hardware.
+
+Timers do not run by themselves: service_timers() fires every callback
+that is due, and the simulated uasyncio.run() calls it from a pump task.
+"""
+
+from sim import utime
+
+# (time_us, kind, pin, value) for every output change
+trace = []
+tracing = True
+
+# Shared GPIO state: pin number -> level, so several Pin objects for the
+# same GPIO agree like on the device
+_levels = {}
+_timers = []
+_ledc = set()       # GPIOs holding one of the ESP32-C3's LEDC channels
+LEDC_CHANNELS = 6
+_stamp_us = None  # Timestamp of the timer tick being fired, if any
+
+counters = {'pin_writes': 0, 'pwm_writes': 0, 'bitstream_calls': 0,
+            'bitstream_bytes': 0, 'timer_callbacks': 0}
+
+
+def now_us():
+    """Timestamp for trace entries"""
+    return _stamp_us if _stamp_us is not None else utime.now_us()
+
+
+def record(kind, pin, value):
+    if tracing:
+        trace.append((now_us(), kind, pin, value))
+
+
+def reset_trace():
+    """Clears the trace and the counters"""
+    del trace[:]
+    for key in counters:
+        counters[key] = 0
+
+
+def reset_state():
+    """Forget all pins, timers and trace entries (fresh device)"""
+    _levels.clear()
+    _ledc.clear()
+    del _timers[:]
+    reset_trace()
+
+
+def level(pin):
+    """Current level of a GPIO (0 if never driven)"""
+    return _levels.get(pin, 0)
+
+
+def _pin_id(pin):
+    return pin.id if isinstance(pin, Pin) else pin
+
+
+def _drive(pin_id, v):
+    counters['pin_writes'] += 1
+    if _levels.get(pin_id) != v:
+        _levels[pin_id] = v
+        record('pin', pin_id, v)
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 1
+    IRQ_RISING = 2
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        self._irq = None
+        self.init(mode, pull, value)
+
+    def init(self, mode=-1, pull=-1, value=None):
+        if mode != -1:
+            self.mode = mode
+        if value is not None:
+            self.value(value)
+
+    def value(self, v=None):
+        if v is None:
+            return _levels.get(self.id, 0)
+        _drive(self.id, 1 if v else 0)
+
+    __call__ = value
+
+    def on(self):
+        _drive(self.id, 1)
+
+    def off(self):
+        _drive(self.id, 0)
+
+    high = on
+    low = off
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING):
+        self._irq = handler
+
+    def __repr__(self):
+        return "Pin(%d)" % self.id
+
+
+class PWM:
+    def __init__(self, dest, freq=None, duty=None, duty_u16=None):
+        self.pin = _pin_id(dest)
+        if self.pin not in _ledc:
+            if len(_ledc) >= LEDC_CHANNELS:
+                raise RuntimeError("out of PWM channels")
+            _ledc.add(self.pin)
+        self._freq = 5000
+        self._duty = 0
+        self.active = True
+        if freq is not None:
+            self.freq(freq)
+        if duty is not None:
+            self.duty(duty)
+        if duty_u16 is not None:
+            self.duty_u16(duty_u16)
+
+    def init(self, freq=None, duty=None, duty_u16=None):
+        if self.pin not in _ledc:
+            if len(_ledc) >= LEDC_CHANNELS:
+                raise RuntimeError("out of PWM channels")
+            _ledc.add(self.pin)
+        self.active = True
+        if freq is not None:
+            self.freq(freq)
+        if duty is not None:
+            self.duty(duty)
+        if duty_u16 is not None:
+            self.duty_u16(duty_u16)
+
+    def freq(self, value=None):
+        if value is None:
+            return self._freq
+        counters['pwm_writes'] += 1
+        if value != self._freq:
+            self._freq = value
+            record('pwm_freq', self.pin, value)
+
+    def duty(self, value=None):
+        if value is None:
+            return self._duty
+        counters['pwm_writes'] += 1
+        value = max(0, min(1023, int(value)))
+        if value != self._duty:
+            self._duty = value
+            record('pwm_duty', self.pin, value)
+
+    def duty_u16(self, value=None):
+        if value is None:
+            return self._duty * 65535 // 1023
+        self.duty(value * 1023 // 65535)
+
+    def deinit(self):
+        self.active = False
+        _ledc.discard(self.pin)
+        record('pwm_duty', self.pin, None)
+
+    def __repr__(self):
+        return "PWM(Pin(%d), freq=%d, duty=%d)" % (self.pin, self._freq, self._duty)
+
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=0, **kwargs):
+        self.id = id
+        self.callback = None
+        self.period_us = 0
+        self.deadline_us = 0
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, mode=PERIODIC, period=-1, freq=-1, callback=None):
+        self.deinit()
+        if freq > 0:
+            self.period_us = 1e6 / freq
+        elif period > 0:
+            self.period_us = period * 1000.0
+        else:
+            raise ValueError("period or freq required")
+        self.mode = mode
+        self.callback = callback
+        self.deadline_us = utime.now_us() + self.period_us
+        _timers.append(self)
+
+    def deinit(self):
+        if self in _timers:
+            _timers.remove(self)
+
+    def value(self):
+        return int(self.deadline_us - utime.now_us()) // 1000
+
+
+def next_deadline():
+    """Earliest timer deadline in microseconds, or None"""
+    if not _timers:
+        return None
+    return min(t.deadline_us for t in _timers)
+
+
+def service_timers(limit=100000):
+    """
+    Fire every timer callback that is due
+
+    Trace entries written by a callback carry the tick's scheduled time,
+    so late servicing does not distort recorded waveforms.
+
+    Returns:
+        int: Callbacks fired
+    """
+    global _stamp_us
+    fired = 0
+    now = utime.now_us()
+    while fired < limit:
+        due = None
+        for t in _timers:
+            if t.deadline_us <= now and (due is None or t.deadline_us < due.deadline_us):
+                due = t
+        if due is None:
+            break
+        _stamp_us = int(due.deadline_us)
+        if due.mode == Timer.PERIODIC:
+            due.deadline_us += due.period_us
+        else:
+            due.deinit()
+        try:
+            if due.callback is not None:
+                due.callback(due)
+        finally:
+            _stamp_us = None
+        counters['timer_callbacks'] += 1
+        fired += 1
+    return fired
+
+
+def bitstream(pin, encoding, timing, buf):
+    counters['bitstream_calls'] += 1
+    counters['bitstream_bytes'] += len(buf)
+    record('bitstream', _pin_id(pin), bytes(buf))
+
+
+class _Mem32:
+    """
+    Register access; GPIO_OUT_W1TS/W1TC at GPIO_BASE drive the pins
+    """
+
+    GPIO_BASE = 0x60004000  # ESP32-C3
+
+    def __init__(self):
+        self._regs = {}
+
+    def __getitem__(self, addr):
+        if addr == self.GPIO_BASE + 0x04:
+            return sum(1 << p for p, v in _levels.items() if v)
+        return self._regs.get(addr, 0)
+
+    def __setitem__(self, addr, value):
+        if addr in (self.GPIO_BASE + 0x08, self.GPIO_BASE + 0x0C):
+            v = 1 if addr == self.GPIO_BASE + 0x08 else 0
+            for pin in range(32):
+                if value & (1 << pin):
+                    _drive(pin, v)
+        else:
+            self._regs[addr] = value
+
+
+mem32 = _Mem32()
+
+
+def freq(hz=None):
+    return 160000000
+
+
+def unique_id():
+    return b'\x53\x49\x4d\x00\x00\x01'
+
+
+def idle():
+    pass
+
+
+def disable_irq():
+    return 0
+
+
+def enable_irq(state=0):
+    pass
+
+
+def reset():
+    raise SystemExit("machine.reset()")
+
+
+def soft_reset():
+    raise SystemExit("machine.soft_reset()")
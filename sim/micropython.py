@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+micropython module for the host simulator
+"""
+
+
+def const(value):
+    return value
+
+
+_opt_level = 0
+
+
+def opt_level(level=None):
+    """
+    Records the level; CPython keeps `if __debug__:` blocks regardless
+    (run with python -O to strip them)
+    """
+    global _opt_level
+    if level is None:
+        return _opt_level
+    _opt_level = level
+
+
+def schedule(func, arg):
+    # No hard IRQs on the host: run the callback right away
+    func(arg)
+
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+
+def mem_info(verbose=None):
+    print("mem: (not available in the simulator)")
+
+
+def qstr_info(verbose=None):
+    pass
+
+
+def native(func):
+    return func
+
+
+def viper(func):
+    return func
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""
+neopixel for the host simulator (the firmware's frozen module is the
+same driver as bbl/neopixel.py, writing through sim.machine.bitstream)
+"""
+
+from bbl.neopixel import NeoPixel
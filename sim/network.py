@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+network for the host simulator
+
+WLAN keeps its configuration in memory and never touches the host's
+interfaces; UDP traffic goes through sim.usocket on the loopback
+interface. Set `stations` on the AP object to simulate connected clients.
+"""
+
+STA_IF = 0
+AP_IF = 1
+
+AUTH_OPEN = 0
+AUTH_WEP = 1
+AUTH_WPA_PSK = 2
+AUTH_WPA2_PSK = 3
+AUTH_WPA_WPA2_PSK = 4
+
+STAT_IDLE = 1000
+STAT_CONNECTING = 1001
+STAT_GOT_IP = 1010
+
+_interfaces = {}
+
+
+class WLAN:
+    def __new__(cls, interface_id=STA_IF):
+        # One object per interface, like the firmware
+        if interface_id not in _interfaces:
+            wlan = super().__new__(cls)
+            wlan._init(interface_id)
+            _interfaces[interface_id] = wlan
+        return _interfaces[interface_id]
+
+    def _init(self, interface_id):
+        self.interface_id = interface_id
+        self._active = False
+        self._config = {'essid': '', 'password': '', 'authmode': AUTH_OPEN,
+                        'channel': 1, 'mac': b'\x02\x00\x00\x00\x00\x01'}
+        if interface_id == AP_IF:
+            self._ifconfig = ('192.168.4.1', '255.255.255.0', '192.168.4.1', '0.0.0.0')
+        else:
+            self._ifconfig = ('0.0.0.0', '0.0.0.0', '0.0.0.0', '0.0.0.0')
+        self.stations = []
+
+    def active(self, state=None):
+        if state is None:
+            return self._active
+        self._active = bool(state)
+
+    def config(self, *args, **kwargs):
+        if args:
+            return self._config[args[0]]
+        self._config.update(kwargs)
+
+    def ifconfig(self, config=None):
+        if config is None:
+            return self._ifconfig
+        self._ifconfig = tuple(config)
+
+    def status(self, param=None):
+        if param == 'stations':
+            return list(self.stations)
+        if param is not None:
+            return None
+        return STAT_GOT_IP if self._active else STAT_IDLE
+
+    def isconnected(self):
+        if self.interface_id == AP_IF:
+            return bool(self.stations)
+        return self._active
+
+    def connect(self, ssid=None, key=None, **kwargs):
+        self._active = True
+
+    def disconnect(self):
+        pass
+
+    def scan(self):
+        return []
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Recorded V7RC input traces for the host simulator
+
+A trace is a text file with one received frame per line: the arrival time
+in milliseconds since the start of the recording and the 20-byte frame.
+Blank lines and lines starting with ';' are ignored.
+
+    ; phone app, SRV at ~20 Hz over Wi-Fi
+    0 SRV1500150015001500#
+    52 SRV1512150015001500#
+
+replay() turns a trace into a scenario for sim.run(), and
+pulse_series() samples what the firmware made of it on a servo pin, so
+output smoothness and lag can be compared against the input:
+
+    >>> frames = traces.load('capture.txt')
+    >>> sim.run('app/main.py', duration_s=10, clock=VirtualClock(),
+    ...         scenario=traces.replay(frames, transport='ble'))
+    >>> out = traces.pulse_series(3, 0, 10000000, 20000)
+"""
+
+import asyncio
+
+from sim import machine
+
+# 50 Hz servo PWM: duty 0..1023 over a 20 ms period
+_SERVO_PERIOD_US = 20000
+
+
+def load(path):
+    """
+    Read a trace file
+
+    Returns:
+        list: (t_ms, frame bytes) in arrival order
+    """
+    frames = []
+    with open(path, 'rb') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith(b';'):
+                continue
+            t_ms, frame = line.split(None, 1)
+            frames.append((int(t_ms), frame))
+    return frames
+
+
+def save(path, frames, comment=None):
+    """Write (t_ms, frame) pairs as a trace file"""
+    with open(path, 'wb') as f:
+        if comment:
+            f.write(b'; %s\n' % comment.encode())
+        for t_ms, frame in frames:
+            f.write(b'%d %s\n' % (t_ms, bytes(frame)))
+
+
+def replay(frames, transport='ble', start_ms=0):
+    """
+    Scenario that delivers the frames at their recorded times
+
+    Args:
+        frames (list): (t_ms, frame) pairs
+        transport (str): 'ble' (injected GATT writes) or 'udp' (loopback
+            datagrams to the firmware's server)
+        start_ms (int): Delay before the first frame (boot time)
+
+    Returns:
+        function: Coroutine function for sim.run(scenario=...)
+    """
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        send = _sender(transport)
+        t0 = loop.time() + start_ms / 1000
+        for t_ms, frame in frames:
+            delay = t0 + t_ms / 1000 - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            send(frame)
+    return scenario
+
+
+def _sender(transport):
+    if transport == 'ble':
+        from sim import bluetooth
+        ble = bluetooth.BLE()
+        if ble.conn_handle is None:
+            ble.inject_connect()
+        return ble.inject_write
+    if transport == 'udp':
+        import socket
+        from sim import usocket
+        addr = [actual for requested, actual in usocket.bound][0]
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        return lambda frame: sock.sendto(frame, addr)
+    raise ValueError("transport must be 'ble' or 'udp'")
+
+
+def pulse_series(pin, t0_us, t1_us, period_us):
+    """
+    Servo pulse width on a pin, sampled from the machine trace
+
+    Args:
+        pin (int): GPIO of the servo PWM
+        t0_us, t1_us (int): Sampled interval (machine.now_us() time base)
+        period_us (int): Sample spacing
+
+    Returns:
+        list: Pulse width in microseconds at every sample (0 before the
+        first duty write)
+    """
+    writes = [(t, v) for t, kind, p, v in machine.trace
+              if kind == 'pwm_duty' and p == pin]
+    series = []
+    i = 0
+    duty = 0
+    t = t0_us
+    while t < t1_us:
+        while i < len(writes) and writes[i][0] <= t:
+            duty = writes[i][1]
+            i += 1
+        series.append(duty * _SERVO_PERIOD_US // 1024)
+        t += period_us
+    return series
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+uasyncio for the host simulator, mapped onto CPython asyncio
+
+run() additionally starts a pump task that fires due sim.machine timers,
+optionally stops the program after `run_limit_s` seconds and starts the
+coroutines listed in `background` (test scenarios) next to it.
+"""
+
+import asyncio as _asyncio
+import threading as _threading
+from asyncio import (CancelledError, TimeoutError, Event, Lock, Task,
+                     create_task, gather, sleep, wait_for, current_task,
+                     get_running_loop)
+from sim.uasyncio import core
+from sim import machine, utime
+
+# Set by sim.run(): stop after this many seconds (None: run forever)
+run_limit_s = None
+# Coroutine functions started together with the main coroutine
+background = []
+# Event loop factory (the virtual clock installs its own)
+loop_factory = _asyncio.new_event_loop
+
+_PUMP_IDLE_S = 0.01
+
+
+def sleep_ms(ms):
+    return _asyncio.sleep(ms / 1000)
+
+
+def wait_for_ms(aw, ms):
+    return _asyncio.wait_for(aw, ms / 1000)
+
+
+def get_event_loop():
+    try:
+        return _asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class ThreadSafeFlag:
+    """
+    Flag that can be set from an IRQ (or another thread) and awaited by
+    one task; created without a running loop like on the device.
+    """
+
+    def __init__(self):
+        self._flag = False
+        self._waiter = None
+        self._loop = None
+        self._thread = None
+
+    def set(self):
+        self._flag = True
+        waiter = self._waiter
+        if waiter is None:
+            return
+        if _threading.get_ident() == self._thread:
+            if not waiter.done():
+                waiter.set_result(None)
+        else:
+            self._loop.call_soon_threadsafe(self._wake, waiter)
+
+    @staticmethod
+    def _wake(waiter):
+        if not waiter.done():
+            waiter.set_result(None)
+
+    def clear(self):
+        self._flag = False
+
+    async def wait(self):
+        while not self._flag:
+            self._loop = _asyncio.get_running_loop()
+            self._thread = _threading.get_ident()
+            self._waiter = self._loop.create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        self._flag = False
+
+
+async def _timer_pump():
+    # Fire sim.machine timer callbacks at their deadlines
+    while True:
+        machine.service_timers()
+        deadline = machine.next_deadline()
+        if deadline is None:
+            delay = _PUMP_IDLE_S
+        else:
+            delay = min(_PUMP_IDLE_S, max(0, deadline - utime.now_us()) / 1e6)
+        await _asyncio.sleep(delay)
+
+
+async def _main(coro):
+    tasks = [create_task(_timer_pump())]
+    tasks += [create_task(fn()) for fn in background]
+    try:
+        if run_limit_s is None:
+            return await coro
+        try:
+            return await _asyncio.wait_for(coro, run_limit_s)
+        except _asyncio.TimeoutError:
+            return None
+    finally:
+        for task in tasks:
+            task.cancel()
+        await _asyncio.gather(*tasks, return_exceptions=True)
+
+
+def run(coro):
+    with _asyncio.Runner(loop_factory=loop_factory) as runner:
+        return runner.run(_main(coro))
+
+
+def new_event_loop():
+    loop = loop_factory()
+    _asyncio.set_event_loop(loop)
+    return loop
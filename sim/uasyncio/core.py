@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+uasyncio.core for the host simulator
+
+Only the parts the firmware uses: the exceptions and the I/O queue that
+bbl.dgram parks its socket on.
+"""
+
+import asyncio as _asyncio
+from asyncio import CancelledError, TimeoutError
+
+
+def _wait_fd(sock, add, remove):
+    # Future that completes when the socket is ready; yielding it from a
+    # generator-based awaitable suspends the task like uasyncio does
+    loop = _asyncio.get_running_loop()
+    fut = loop.create_future()
+    fd = sock.fileno()
+
+    def ready():
+        if not fut.done():
+            fut.set_result(None)
+
+    getattr(loop, add)(fd, ready)
+    fut.add_done_callback(lambda f: getattr(loop, remove)(fd))
+    fut._asyncio_future_blocking = True
+    return fut
+
+
+class _IOQueue:
+    def queue_read(self, sock):
+        return _wait_fd(sock, 'add_reader', 'remove_reader')
+
+    def queue_write(self, sock):
+        return _wait_fd(sock, 'add_writer', 'remove_writer')
+
+
+_io_queue = _IOQueue()
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+uselect for the host simulator (host select.poll)
+"""
+
+import select as _select
+
+POLLIN = _select.POLLIN
+POLLOUT = _select.POLLOUT
+POLLERR = _select.POLLERR
+POLLHUP = _select.POLLHUP
+
+
+class _Poll:
+    def __init__(self):
+        self._poll = _select.poll()
+        self._objs = {}
+
+    def register(self, obj, eventmask=POLLIN | POLLOUT):
+        self._objs[obj.fileno()] = obj
+        self._poll.register(obj.fileno(), eventmask)
+
+    def modify(self, obj, eventmask):
+        self._poll.modify(obj.fileno(), eventmask)
+
+    def unregister(self, obj):
+        self._objs.pop(obj.fileno(), None)
+        self._poll.unregister(obj.fileno())
+
+    def poll(self, timeout=-1):
+        return [(self._objs[fd], ev) for fd, ev in self._poll.poll(timeout)]
+
+    def ipoll(self, timeout=-1, flags=0):
+        return iter(self.poll(timeout))
+
+
+def poll():
+    return _Poll()
+
+
+def select(rlist, wlist, xlist, timeout=None):
+    return _select.select(rlist, wlist, xlist, timeout)
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+usocket for the host simulator
+
+Real host sockets, with addresses the firmware binds to (e.g. the AP
+address 192.168.4.1) redirected to the loopback interface. Set PORT_MAP
+to move a firmware port, e.g. {6188: 0} for an ephemeral port; the
+actual addresses are listed in `bound` after bind().
+"""
+
+import socket as _socket
+
+AF_INET = _socket.AF_INET
+SOCK_DGRAM = _socket.SOCK_DGRAM
+SOCK_STREAM = _socket.SOCK_STREAM
+SOL_SOCKET = _socket.SOL_SOCKET
+SO_REUSEADDR = _socket.SO_REUSEADDR
+
+LOOPBACK = '127.0.0.1'
+PORT_MAP = {}
+
+# (requested address, actual host address) of every bound socket
+bound = []
+
+
+def getaddrinfo(host, port, af=0, type=0, proto=0, flags=0):
+    port = PORT_MAP.get(port, port)
+    return [(AF_INET, type or SOCK_DGRAM, proto, '', (LOOPBACK, port))]
+
+
+class socket:
+    def __init__(self, af=AF_INET, type=SOCK_STREAM, proto=0):
+        self._sock = _socket.socket(af, type, proto)
+
+    def fileno(self):
+        return self._sock.fileno()
+
+    def setblocking(self, flag):
+        self._sock.setblocking(flag)
+
+    def settimeout(self, value):
+        self._sock.settimeout(value)
+
+    def setsockopt(self, level, opt, value):
+        self._sock.setsockopt(level, opt, value)
+
+    def bind(self, addr):
+        self._sock.bind(addr)
+        bound.append((addr, self._sock.getsockname()))
+
+    def getsockname(self):
+        return self._sock.getsockname()
+
+    def recvfrom(self, bufsize):
+        try:
+            return self._sock.recvfrom(bufsize)
+        except BlockingIOError:
+            raise OSError(11, 'EAGAIN')
+
+    def recv(self, bufsize):
+        try:
+            return self._sock.recv(bufsize)
+        except BlockingIOError:
+            raise OSError(11, 'EAGAIN')
+
+    def sendto(self, data, addr):
+        return self._sock.sendto(bytes(data), addr)
+
+    def send(self, data):
+        return self._sock.send(bytes(data))
+
+    def connect(self, addr):
+        self._sock.connect(addr)
+
+    def close(self):
+        self._sock.close()
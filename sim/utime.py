@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+utime for the host simulator
+
+MicroPython tick semantics on top of a pluggable microsecond clock:
+ticks_ms()/ticks_us() wrap at 2^30 like on the ESP32 port, so code that
+forgets ticks_diff() breaks here too. The default clock is the host
+monotonic clock; set_clock() swaps in another source.
+"""
+
+import time as _time
+
+TICKS_PERIOD = 1 << 30
+_TICKS_MAX = TICKS_PERIOD - 1
+_TICKS_HALF = TICKS_PERIOD // 2
+
+
+def _monotonic_us():
+    return _time.monotonic_ns() // 1000
+
+
+_clock = _monotonic_us
+_sleep_us = None  # None: real sleep
+
+
+def set_clock(now_us, sleep_us=None):
+    """
+    Replace the time source
+
+    Args:
+        now_us (function): Returns the current time in microseconds
+        sleep_us (function, optional): Blocks for a number of microseconds
+            (default: real sleep)
+    """
+    global _clock, _sleep_us
+    _clock = now_us
+    _sleep_us = sleep_us
+
+
+def reset_clock():
+    """Back to the host monotonic clock"""
+    set_clock(_monotonic_us)
+
+
+def now_us():
+    """Unwrapped simulator time in microseconds"""
+    return _clock()
+
+
+def ticks_us():
+    return _clock() & _TICKS_MAX
+
+
+def ticks_ms():
+    return (_clock() // 1000) & _TICKS_MAX
+
+
+def ticks_cpu():
+    return ticks_us()
+
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & _TICKS_MAX
+
+
+def ticks_diff(ticks1, ticks2):
+    return ((ticks1 - ticks2 + _TICKS_HALF) & _TICKS_MAX) - _TICKS_HALF
+
+
+def sleep_us(us):
+    if _sleep_us is not None:
+        _sleep_us(us)
+    elif us > 0:
+        _time.sleep(us / 1e6)
+
+
+def sleep_ms(ms):
+    sleep_us(ms * 1000)
+
+
+def sleep(seconds):
+    sleep_us(int(seconds * 1e6))
+
+
+def time():
+    return int(_time.time())
+
+
+def time_ns():
+    return _time.time_ns()
+
+
+def localtime(secs=None):
+    return _time.localtime(secs)[:8]
+
+
+def gmtime(secs=None):
+    return _time.gmtime(secs)[:8]
+
+
+def mktime(t):
+    return int(_time.mktime(tuple(t[:8]) + (-1,)))
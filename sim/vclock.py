@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Deterministic virtual clock for the host simulator
+
+Backs utime (ticks_ms/ticks_us/ticks_diff/sleep_ms) and the asyncio
+scheduler with simulated time. When no task is ready the event loop
+jumps straight to the next deadline instead of sleeping, so hours of
+control loop run in seconds, and two runs of the same scenario produce
+bit-identical traces.
+
+Blocking sleeps (utime.sleep_ms) advance the clock by the requested
+amount. Real sockets still work: the loop polls them without blocking
+before every jump, and only blocks in real time when nothing at all is
+scheduled.
+
+Wraparound injection: start the clock just before ticks_ms() rolls over
+at 2^30 to exercise the rollover paths:
+
+    >>> clock = VirtualClock.before_wrap(ms=5000)   # wraps 5 s into the run
+    >>> sim.run('app/main.py', duration_s=10, clock=clock)
+"""
+
+import asyncio
+import selectors
+
+TICKS_PERIOD = 1 << 30
+
+
+class VirtualClock:
+    """
+    Simulated monotonic time in integer microseconds
+    """
+
+    def __init__(self, start_us=0):
+        """
+        Args:
+            start_us (int): Initial time in microseconds
+        """
+        self.start_us = start_us
+        self.us = start_us
+
+    @classmethod
+    def before_wrap(cls, ms=1000):
+        """Clock whose ticks_ms() wraps after `ms` simulated milliseconds"""
+        return cls((TICKS_PERIOD - ms) * 1000)
+
+    @classmethod
+    def before_us_wrap(cls, us=1000):
+        """Clock whose ticks_us() wraps after `us` simulated microseconds"""
+        return cls(TICKS_PERIOD - us)
+
+    def now_us(self):
+        return self.us
+
+    def sleep_us(self, us):
+        if us > 0:
+            self.us += int(us)
+
+    def advance(self, seconds):
+        """Move time forward (rounded up to whole microseconds)"""
+        us = int(seconds * 1e6)
+        if us < seconds * 1e6:
+            us += 1
+        self.sleep_us(us)
+
+    def elapsed_us(self):
+        """Simulated time since the clock was created"""
+        return self.us - self.start_us
+
+    def time(self):
+        return self.us / 1e6
+
+
+class _VirtualSelector(selectors.DefaultSelector):
+    # Polls real file descriptors without blocking; waiting for a timer
+    # advances the virtual clock instead
+
+    def __init__(self, clock):
+        super().__init__()
+        self._clock = clock
+
+    def select(self, timeout=None):
+        events = super().select(0)
+        if events or timeout == 0:
+            return events
+        if timeout is None:
+            return super().select(None)
+        self._clock.advance(timeout)
+        return []
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    """asyncio event loop running on a VirtualClock"""
+
+    def __init__(self, clock):
+        super().__init__(_VirtualSelector(clock))
+        self.clock = clock
+
+    def time(self):
+        return self.clock.time()
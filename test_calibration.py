@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+Motor and Servo Calibration Test Script
+Forward/reverse rate and offset of the motors and the servo endpoint/center
+trims, all precomputed into lookup tables
+"""
+
+import sim
+
+sim.install()
+
+
+def _duties(motors, motor_idx, speed):
+    motors.set_speed(motor_idx, speed)
+    if motors.driver_config['use_hardware_pwm']:
+        pins = (motors.motor1_1, motors.motor1_2) if motor_idx == 1 else \
+            (motors.motor2_1, motors.motor2_2)
+        return pins[0].duty(), pins[1].duty()
+    ch = 0 if motor_idx == 1 else 2
+    return motors.soft_pwm.duty(ch), motors.soft_pwm.duty(ch + 1)
+
+
+def _nominal(speed, period, stop_high):
+    """The uncalibrated speed -> duty conversion before the tables"""
+    if speed > 0:
+        duties = (int(speed * period / 2048), 0)
+    elif speed < 0:
+        duties = (0, int(-speed * period / 2048))
+    else:
+        duties = (0, 0)
+    if duties == (0, 0) and stop_high:
+        return period, period
+    return duties
+
+
+def test_default_tables():
+    """Untrimmed tables give the nominal duties (speeds truncate to a step)"""
+    print("=" * 60)
+    print("Calibration Test")
+    print("=" * 60)
+    for driver, hardware, period, stop_high, step in (('L298N', False, 100, True, 8),
+                                                      ('L9110S', False, 100, False, 8),
+                                                      ('L9110S', True, 1023, False, 2)):
+        print(f"\n[calib] {driver}{' hardware PWM' if hardware else ''} defaults")
+        motors = sim.motors(driver, hardware)
+        assert 1 << motors.driver.speed_shift == step
+        for speed in range(-2048, 2049, step):
+            assert _duties(motors, 1, speed) == _nominal(speed, period, stop_high), speed
+        stop = _nominal(0, period, stop_high)
+        for speed in range(-2050, 2051, 3):
+            got = _duties(motors, 2, speed)
+            want = _nominal(speed, period, stop_high)
+            # At most one duty level weaker; the stop state counts as 0
+            got = (0, 0) if got == stop else got
+            want = (0, 0) if want == stop else want
+            assert 0 <= want[0] - got[0] <= 1, (speed, got, want)
+            assert 0 <= want[1] - got[1] <= 1, (speed, got, want)
+        # Every duty level of the driver is reachable
+        levels = {_duties(motors, 1, speed) for speed in range(0, 2049)}
+        levels = {duties[0] for duties in levels - {stop}} | {0}
+        assert len(levels) == period + 1, len(levels)
+        assert _duties(motors, 1, 9999) == _nominal(2048, period, stop_high)
+    print("✓ PASS")
+
+
+def test_motor_rates_and_offset():
+    """Trims take effect and only touch their motor"""
+    print("\n[calib] Forward/reverse rate and offset")
+    motors = sim.motors('L9110S', hardware=True)
+    motors.set_forward_rate(1, 50)
+    motors.set_reverse_rate(1, 25)
+    assert _duties(motors, 1, 2048) == (511, 0)
+    assert _duties(motors, 1, -2048) == (0, 255)
+    assert _duties(motors, 1, 1024) == (255, 0)
+    assert _duties(motors, 2, 2048) == (1023, 0)     # Motor 2 untouched
+
+    motors.set_offset(2, -10)      # Motor 2 is 10% weaker
+    assert _duties(motors, 2, 2048) == (920, 0)
+    assert _duties(motors, 2, -1024) == (0, 460)
+    motors.set_offset(2, 20)       # Clamped at full duty
+    assert _duties(motors, 2, 2048) == (1023, 0)
+    assert _duties(motors, 2, 1024) == (613, 0)
+
+    motors.set_forward_rate(1, 150)  # Rejected, table unchanged
+    assert motors.get_forward_rate(1) == 50
+    assert _duties(motors, 1, 2048) == (511, 0)
+    print("✓ PASS")
+
+
+def test_servo_trims():
+    """Endpoint/center trims apply to every way of driving a servo"""
+    print("\n[calib] Servo endpoint/center trims")
+    sim.reset()
+    from bbl.servos import ServosController, TRIM_TABLE
+    servos = ServosController()
+    servos.set_trim(2, 500, 1500, 2500)
+    assert bytes(servos.trim) == bytes(range(TRIM_TABLE)) * 4
+
+    def duty():
+        return servos.servos_map[1].duty()
+
+    def trimmed(us):
+        return 25 + (us - 500) * 102 // 2000
+
+    servos.set_trim(2, 600, 1540, 2300)
+    assert servos.get_trim(2) == (600, 1540, 2300)
+    for pwm_us, trimmed_us in ((500, 600), (1500, 1540), (2500, 2300)):
+        servos.set_pwm(2, pwm_us)
+        assert duty() == trimmed(trimmed_us), (pwm_us, duty())
+    servos.set_angle(2, 90)
+    assert duty() == trimmed(1540)
+
+    # Stepping and profile moves end on the trimmed endpoint
+    servos.set_angle_stepping(2, 180, 100)
+    while not servos.idle():
+        servos.timing_proc()
+    assert duty() == trimmed(2300)
+    servos.move(2, 0, 180, 360)
+    while not servos.idle():
+        servos.timing_proc()
+    assert duty() == trimmed(600)
+
+    servos.stop(2)
+    assert duty() == 0
+    servos.set_trim(2, 1600, 1500, 2500)     # Rejected
+    assert servos.get_trim(2) == (600, 1540, 2300)
+    servos.set_pwm(1, 2500)                  # Other servos untrimmed
+    assert servos.servos_map[0].duty() == 127
+    print("✓ PASS")
+
+
+if __name__ == '__main__':
+    test_default_tables()
+    test_motor_rates_and_offset()
+    test_servo_trims()
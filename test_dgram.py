@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+UDP Server Test Script
+Draining pending datagrams (newest per command type, stale counts per
+source, oversize drops) and the event-driven wake-up on the I/O queue
+"""
+
+import asyncio
+import socket
+
+import sim
+
+sim.install()
+
+A = ('192.168.4.2', 50000)
+B = ('192.168.4.3', 50000)
+
+
+class _Socket:
+    """Pending datagrams of one wake-up; OSError once drained like the port"""
+
+    def __init__(self, datagrams, into=True):
+        self.datagrams = list(datagrams)
+        self.sent = []
+        if not into:
+            self.recvfrom_into = None
+
+    def recvfrom_into(self, buf):
+        if not self.datagrams:
+            raise OSError(11)
+        data, addr = self.datagrams.pop(0)
+        n = min(len(data), len(buf))    # Longer datagrams are cut off
+        buf[:n] = data[:n]
+        return n, addr
+
+    def recvfrom(self, bufsize):
+        if not self.datagrams:
+            raise OSError(11)
+        data, addr = self.datagrams.pop(0)
+        return data[:bufsize], addr
+
+    def sendto(self, data, addr):
+        self.sent.append((bytes(data), addr))
+
+
+def _drain(datagrams, into=True, cb=None, **kwargs):
+    """Run one drain of UDPServer, returns (server, delivered, socket)"""
+    sim.reset()
+    from bbl.dgram import UDPServer
+    server = UDPServer(**kwargs)
+    server.close()
+    sock = _Socket(datagrams, into)
+    server.sock = sock
+    server._recv_into = sock.recvfrom_into
+    delivered = []
+
+    def record(msg, addr):
+        delivered.append((bytes(msg), addr))
+        if cb is not None:
+            return cb(msg, addr)
+        if msg[0] == ord('?'):
+            return b'reply'
+
+    server.received = server._drain(record)
+    return server, delivered, sock
+
+
+def test_newest_per_prefix():
+    """Latest frame of every prefix, in first-arrival order; stale per source"""
+    print("=" * 60)
+    print("UDP Server Test")
+    print("=" * 60)
+    print("\n[udp] Newest datagram per command type")
+    for into in (True, False):
+        server, delivered, sock = _drain([
+            (b'SRV1000100010001000#', A),
+            (b'LEDF00AF00AF00AF00A#', A),
+            (b'SRV1100110011001100#', B),
+            (b'SRV1200120012001200#', A),
+            (b'?SCH               #', B),
+        ], into)
+        assert server.received == 5
+        assert delivered == [(b'SRV1200120012001200#', A),
+                             (b'LEDF00AF00AF00AF00A#', A),
+                             (b'?SCH               #', B)], delivered
+        assert server.stale == 2 and server.stale_by_source == {A: 1, B: 1}
+        assert sock.sent == [(b'reply', B)]
+        assert server._n_free == server._slots     # Every slot given back
+    print("✓ PASS")
+
+
+def test_stale_sources_and_slots():
+    """Past 8 sources stale counts go to 'other'; full slots flush early"""
+    print("\n[udp] Stale sources and slot overflow")
+    sources = [('192.168.4.%d' % i, 1234) for i in range(10, 21)]
+    frames = [(b'SRV1500150015001500#', addr) for addr in sources]
+    server, delivered, _ = _drain(frames + [(b'SRV1600160016001600#', A)])
+    assert delivered == [(b'SRV1600160016001600#', A)]
+    assert server.stale == 11
+    assert len(server.stale_by_source) == 9 and server.stale_by_source['other'] == 3
+    assert all(server.stale_by_source[addr] == 1 for addr in sources[:8])
+
+    # More command types than drain slots: delivered in batches, none lost
+    prefixes = [b'SRV', b'SR2', b'SS8', b'SRT', b'LED']
+    frames = [(p + b'0000000000000000#', A) for p in prefixes]
+    server, delivered, _ = _drain(frames, drain_slots=2)
+    assert [msg[:3] for msg, _ in delivered] == prefixes and server.stale == 0
+    print("✓ PASS")
+
+
+def test_oversize_dropped():
+    """Datagrams over max_packet are counted and dropped, not cut off"""
+    print("\n[udp] Oversize datagrams")
+    for into in (True, False):
+        big = b'SRV' + b'1' * 100
+        server, delivered, _ = _drain([
+            (big, A),
+            (b'SRV1500150015001500#', B),
+            (b'X' * 21, A),
+        ], into, max_packet=20)
+        assert delivered == [(b'SRV1500150015001500#', B)], delivered
+        assert server.oversize == 2 and server.stale == 0
+        assert server.report()['oversize'] == 2
+        # A datagram of exactly max_packet bytes still passes
+        server, delivered, _ = _drain([(b'?' + b' ' * 19, A)], into, max_packet=20)
+        assert len(delivered) == 1 and server.oversize == 0
+    print("✓ PASS")
+
+
+def test_callback_error():
+    """A raising callback is logged; the other frames and the slots survive"""
+    print("\n[udp] Callback errors")
+
+    def cb(msg, addr):
+        if msg[:3] == b'SRV':
+            raise ValueError("broken handler")
+        return b'ok'
+
+    for into in (True, False):
+        server, delivered, sock = _drain([
+            (b'SRV1500150015001500#', A),
+            (b'LEDF00AF00AF00AF00A#', B),
+            (b'SS89696969696969696#', A),
+        ], into, cb=cb, drain_slots=2)
+        assert [msg[:3] for msg, _ in delivered] == [b'SRV', b'LED', b'SS8']
+        assert sock.sent == [(b'ok', B), (b'ok', A)]
+        assert server._n_free == server._slots
+        assert all(addr is None for addr in server._addrs)
+    print("✓ PASS")
+
+
+def test_datagram_wakes_server():
+    """serve() sleeps on the I/O queue: no wake-ups until a datagram arrives"""
+    print("\n[udp] Event-driven wake-up")
+    sim.reset()
+    from sim import usocket
+    from bbl.dgram import UDPServer
+    usocket.PORT_MAP[16188] = 0
+    server = UDPServer(measure=True)
+    loop_times = []
+
+    async def scenario():
+        arrived = asyncio.Event()
+
+        def cb(msg, addr):
+            loop_times.append(asyncio.get_running_loop().time())
+            arrived.set()
+
+        task = asyncio.ensure_future(server.serve(cb, '0.0.0.0', 16188))
+        await asyncio.sleep(0.3)
+        assert server.iterations == 0, server.iterations     # No polling
+        host_addr = usocket.bound[-1][1]
+        client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sent = asyncio.get_running_loop().time()
+        client.sendto(b'SRV1500150015001500#', host_addr)
+        await asyncio.wait_for(arrived.wait(), 1)
+        await asyncio.sleep(0.2)
+        client.close()
+        task.cancel()
+        return sent
+
+    try:
+        sent = asyncio.run(scenario())
+    finally:
+        del usocket.PORT_MAP[16188]
+    latency_ms = (loop_times[0] - sent) * 1000
+    print(f"  delivered {latency_ms:.2f} ms after sending, {server.iterations} wake-up(s)")
+    assert server.iterations == 1 and server.packets == 1
+    assert latency_ms < 50
+    print("✓ PASS")
+
+
+if __name__ == '__main__':
+    test_newest_per_prefix()
+    test_stale_sources_and_slots()
+    test_oversize_dropped()
+    test_callback_error()
+    test_datagram_wakes_server()
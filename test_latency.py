@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Latency Probe Test Script
+Runs app/main.py in the host simulator with LATENCY_PROBE enabled, drives
+it over UDP and BLE and reads the histograms back with '?LAT' queries
+"""
+
+import socket
+import tempfile
+import asyncio
+
+import sim
+
+sim.install()
+from sim import bluetooth, usocket
+
+
+def test_histograms_over_udp_and_ble():
+    """Frames are timed per command and transport, queries return the table"""
+    print("=" * 60)
+    print("Latency Probe Test")
+    print("=" * 60)
+    sim.reset()
+    import bbl.config
+    bbl.config.BLE_ENABLED = True
+    bbl.config.CONNECTION_MODE = 'BOTH'
+    bbl.config.LATENCY_PROBE = True
+    from bbl import diag
+    replies = {}
+
+    async def scenario():
+        await asyncio.sleep(0.1)
+        host_addr = [actual for requested, actual in usocket.bound][0]
+        client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        client.setblocking(False)
+        for i in range(5):
+            client.sendto(b'SRV%04d150015001500#' % (1500 + i * 50), host_addr)
+            await asyncio.sleep(0.05)
+
+        ble = bluetooth.BLE()
+        ble.inject_connect()
+        for i in range(3):
+            ble.inject_write(b'SRT%04d150000000000#' % (1600 + i * 100))
+            await asyncio.sleep(0.05)
+
+        client.sendto(diag.query(b'LAT'), host_addr)
+        await asyncio.sleep(0.05)
+        replies['udp'] = client.recv(2048)
+        client.close()
+
+        ble.notifications.clear()
+        ble.inject_write(diag.query(b'LAT', b'R'))
+        await asyncio.sleep(0.05)
+        replies['ble'] = b''.join(n[2] for n in ble.notifications)
+
+    with tempfile.TemporaryDirectory() as fs:
+        scope = sim.run('app/main.py', duration_s=1.0, scenario=scenario,
+                        fs=fs, port_map={6188: 0})
+
+    from bbl import latency
+    probe = latency.probe
+    assert probe is not None
+
+    print("\n[latency] UDP reply to ?LAT")
+    text = replies['udp'].decode()
+    print(text)
+    assert 'SRV/UDP total' in text and 'SRT/BLE total' in text, text
+    print("✓ SRV over UDP and SRT over BLE both measured")
+
+    print("\n[latency] BLE reply to ?LAT R resets the histograms")
+    assert replies['ble'].decode().startswith('cmd/tr'), replies['ble']
+    assert sum(probe.count) == 0
+    print(f"✓ {len(replies['ble'])} bytes in notifications")
+
+    # The query frames themselves never reached the mailbox
+    assert scope['mailbox'].invalid == 0
+    print("✓ PASS")
+
+
+def test_histogram_buckets():
+    """Samples land in the right bucket and percentiles follow them"""
+    print("\n[latency] Bucket arithmetic")
+    sim.reset()
+    from bbl import latency
+    from bbl.v7rc_parser import V7RCParser
+    from bbl.mailbox import CommandMailbox
+    mailbox = CommandMailbox(V7RCParser())
+    probe = latency.LatencyProbe(mailbox)
+    cell = probe._cell(1, latency.BLE, 3)
+    for us in (50, 150, 150, 900, 250000):
+        probe._add(cell, us)
+    base = cell * (len(latency.BOUNDS_US) + 1)
+    assert list(probe.hist[base:base + 4]) == [1, 2, 0, 1]
+    assert probe.hist[base + len(latency.BOUNDS_US)] == 1
+    assert probe.count[cell] == 5 and probe.max_us[cell] == 250000
+    assert probe.percentile(cell, 50) == 200
+    assert probe.percentile(cell, 99) == 250000
+    print("✓ PASS")
+
+
+def test_disabled_leaves_methods_untouched():
+    """enable()/disable() install and remove the wrappers"""
+    print("\n[latency] Zero overhead when disabled")
+    sim.reset()
+    from bbl import latency
+    from bbl.v7rc_parser import V7RCParser
+    from bbl.mailbox import CommandMailbox
+    mailbox = CommandMailbox(V7RCParser())
+    assert 'post' not in mailbox.__dict__
+    latency.enable(mailbox)
+    assert 'post' in mailbox.__dict__ and 'dispatch' in mailbox.registry.__dict__
+    latency.disable()
+    assert mailbox.post == mailbox.__class__.post.__get__(mailbox)
+    assert mailbox.registry.dispatch == mailbox.registry.__class__.dispatch.__get__(
+        mailbox.registry)
+
+    # A wrapper installed before enable() is put back, not removed
+    def traced(msg, addr=None):
+        return plain(msg, addr)
+    plain = mailbox.post
+    mailbox.post = traced
+    latency.enable(mailbox)
+    assert mailbox.post is not traced
+    latency.disable()
+    assert mailbox.post is traced
+    assert latency.report() == "latency probe disabled"
+    print("✓ PASS")
+
+
+if __name__ == '__main__':
+    test_histograms_over_udp_and_ble()
+    test_histogram_buckets()
+    test_disabled_leaves_methods_untouched()
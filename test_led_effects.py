@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Per-LED Effect Test Script
+Every LED of an LED/LE2 frame keeps its own mode; a tick renders all four
+into one buffer and writes the strip once
+"""
+
+import tempfile
+
+import sim
+
+sim.install()
+from sim import bluetooth, machine
+from sim.vclock import VirtualClock
+
+RED = bytes((0, 255, 0))
+GREEN = bytes((255, 0, 0))
+BLUE = bytes((0, 0, 255))
+BLACK = bytes(3)
+
+
+def test_effect_table():
+    """Pixels keep their effect and phase; finite repeats end off"""
+    print("=" * 60)
+    print("Per-LED Effect Test")
+    print("=" * 60)
+    print("\n[fx] Effect table")
+    sim.reset()
+    from sim import utime
+    from bbl.leds import LEDController
+    led = LEDController('LED2')
+    led.set_pixel_effect(0, 0, 0, 0xFF0000)
+    led.set_pixel_effect(1, 1, 200, 0x00FF00)
+    assert not led.idle()
+    led.timing_proc()
+    assert led.np[0] == (255, 0, 0) and led.np[1] == (0, 255, 0)
+
+    start = led.starts[1]
+    utime.sleep_ms(50)
+    led.set_pixel_effect(1, 1, 200, 0x00FF00)   # Same effect: phase kept
+    led.set_led_effect(0, 0, 0xFF, 0b0100, 0x0000FF)
+    assert led.starts[1] == start and led.np[0] == (255, 0, 0)
+    utime.sleep_ms(60)
+    led.timing_proc()
+    assert led.np[1] == (0, 0, 0) and led.np[2] == (0, 0, 255)
+
+    led.set_pixel_effect(1, 1, 100, 0x00FF00, repeat_count=2)
+    for _ in range(30):
+        utime.sleep_ms(10)
+        led.timing_proc()
+    assert led.np[1] == (0, 0, 0) and led.repeats[1] == 0
+
+    led.set_pixel_effect(1, 0, 0, 0x000000)
+    led.timing_proc()
+    assert led.idle()
+    led.set_pixel_effect(3, 2, 0, 0xFFFFFF)     # Rejected: no period
+    assert led.modes[3] == 0 and led.idle()
+    print("✓ PASS")
+
+
+def test_mixed_frame():
+    """One LED frame with solid, two blink rates and off"""
+    print("\n[fx] LED frame with four different modes")
+    sim.reset()
+    import bbl.config
+    bbl.config.BLE_ENABLED = True
+    import uasyncio
+
+    async def scenario():
+        ble = bluetooth.BLE()
+        ble.inject_connect()
+        for _ in range(40):     # 2 s of the same frame at 20 Hz
+            # Red solid, green blink 100 ms, blue blink 300 ms, off
+            ble.inject_write(b'LEDF00F0F0100F30000#')
+            await uasyncio.sleep(0.05)
+
+    with tempfile.TemporaryDirectory() as fs:
+        sim.run('app/main.py', duration_s=2, scenario=scenario, fs=fs,
+                port_map={6188: 0}, clock=VirtualClock())
+
+    frames = [(t, value) for t, kind, pin, value in machine.trace
+              if kind == 'bitstream' and pin == 21 and value != bytes(12)]
+    assert frames, "LED1 never lit"
+    states = {1: [], 2: []}
+    for t, buf in frames:
+        assert buf[0:3] == RED and buf[9:12] == BLACK, buf
+        assert buf[3:6] in (GREEN, BLACK) and buf[6:9] in (BLUE, BLACK), buf
+        states[1].append((t, buf[3:6] == GREEN))
+        states[2].append((t, buf[6:9] == BLUE))
+
+    def toggle_gaps(samples):
+        edges = [t for (t, on), (_, prev) in zip(samples[1:], samples) if on != prev]
+        return [(b - a) // 1000 for a, b in zip(edges, edges[1:])]
+
+    # Each LED blinks at its own rate, rendered at the 30 Hz LED tick
+    fast = toggle_gaps(states[1])
+    slow = toggle_gaps(states[2])
+    assert len(fast) >= 10 and all(66 <= gap <= 134 for gap in fast), fast
+    assert len(slow) >= 3 and all(266 <= gap <= 334 for gap in slow), slow
+    # Never more than one strip write per LED tick
+    times = [t for t, _ in frames]
+    assert all(b - a >= 30000 for a, b in zip(times, times[1:])), times
+    print(f"✓ {len(frames)} writes for 4 LEDs in 2 s")
+    print("✓ PASS")
+
+
+if __name__ == '__main__':
+    test_effect_table()
+    test_mixed_frame()
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Log Sink Test Script
+Level filtering, per-tag rate limiting, ring buffer overflow and
+wraparound, and the chunked drain task
+"""
+
+import asyncio
+import sys
+
+import sim
+
+sim.install()
+from sim import utime
+
+_now = [0]
+
+
+class _Console:
+    """sys.stdout stand-in recording every chunk the sink writes"""
+
+    def __init__(self):
+        self.buffer = self
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+
+    def text(self):
+        return b''.join(self.chunks).decode()
+
+
+def _sink(**kwargs):
+    """Buffered LogSink on a hand-set clock and a recording console"""
+    sim.reset()
+    utime.set_clock(lambda: _now[0] * 1000)
+    from bbl.log import LogSink
+    sink = LogSink(**kwargs)
+    sink.buffered = True
+    console = _Console()
+    return sink, console
+
+
+def _drain(sink, console, max_bytes):
+    stdout = sys.stdout
+    sys.stdout = console
+    try:
+        return sink.drain(max_bytes)
+    finally:
+        sys.stdout = stdout
+
+
+def test_level_filter():
+    """Messages under the level are rejected before formatting"""
+    print("=" * 60)
+    print("Log Sink Test")
+    print("=" * 60)
+    print("\n[log] Level filtering")
+    try:
+        from bbl import log
+        sink, console = _sink(level='WARN', rate_limit_ms=0)
+        assert not sink.log(log.DEBUG, 'a', "debug %d", (1,))
+        assert not sink.log(log.INFO, 'a', "info")
+        # Format arguments of a filtered message are never applied
+        assert not sink.log(log.INFO, 'a', "%d", ("not a number",))
+        assert sink.log(log.WARN, 'a', "warn %d", (2,))
+        assert sink.log(log.ERROR, 'b', "error", prefix=False)
+        logger = log.Logger('a', sink)
+        assert logger.enabled(log.WARN) and not logger.enabled(log.DEBUG)
+        sink.set_level(log.ERROR)
+        assert not sink.log(log.WARN, 'a', "warn")
+        assert not logger.enabled(log.WARN)
+        sink.set_level('OFF')
+        assert not sink.log(log.ERROR, 'a', "error")
+        _drain(sink, console, 1024)
+    finally:
+        utime.reset_clock()
+    assert console.text() == "[a] warn 2\nerror\n", console.text()
+    assert sink.suppressed == 0 and sink.dropped == 0
+    print("✓ PASS")
+
+
+def test_rate_limit():
+    """One message per tag and interval; the next one reports the others"""
+    print("\n[log] Per-tag rate limit")
+    try:
+        from bbl import log
+        sink, console = _sink(level='DEBUG', rate_limit_ms=100)
+        _now[0] = 1000
+        assert sink.log(log.INFO, 'servo', "first")
+        _now[0] = 1050
+        assert not sink.log(log.INFO, 'servo', "held 1")
+        assert not sink.log(log.WARN, 'servo', "held 2")
+        assert sink.log(log.INFO, 'motor', "other tag")     # Own interval
+        assert sink.log(log.ERROR, 'servo', "error")        # Never limited
+        _now[0] = 1099
+        assert not sink.log(log.INFO, 'servo', "held 3")
+        _now[0] = 1100
+        assert sink.log(log.INFO, 'servo', "second")
+        _now[0] = 1150
+        assert not sink.log(log.INFO, 'servo', "held 4")
+        assert sink.suppressed == 4
+        _drain(sink, console, 1024)
+    finally:
+        utime.reset_clock()
+    assert console.text() == ("[servo] first\n"
+                              "[motor] other tag\n"
+                              "[servo] error\n"
+                              "[servo] second (+3 suppressed)\n"), console.text()
+    print("✓ PASS")
+
+
+def test_overflow_and_wraparound():
+    """Full ring drops whole lines; lines split at the end come out intact"""
+    print("\n[log] Ring overflow and wraparound")
+    try:
+        sink, console = _sink(size=32, rate_limit_ms=0)
+        sink.write("0123456789")        # 11 bytes each with the newline
+        sink.write("abcdefghij")
+        sink.write("ABCDEFGHIJ")        # 33 bytes: does not fit
+        assert sink.dropped == 1 and sink._used == 22
+        assert _drain(sink, console, 11) == 11
+        sink.write("klmnopqrst")        # Bytes 22-31, then 0
+        assert sink._used == 22 and sink.dropped == 1
+        sink.write("uvwxyz")            # Exactly fills the rest
+        assert sink._used == 29
+        sink.write("!!!")               # 4 bytes, 3 free
+        assert sink.dropped == 2
+        # drain() stops at the end of the buffer, the next call wraps
+        assert _drain(sink, console, 64) == 21
+        assert _drain(sink, console, 64) == 8
+        assert _drain(sink, console, 64) == 0
+    finally:
+        utime.reset_clock()
+    assert console.chunks[1] == b"abcdefghij\nklmnopqrst"
+    assert console.chunks[2] == b"\nuvwxyz\n"
+    assert console.text() == "0123456789\nabcdefghij\nklmnopqrst\nuvwxyz\n"
+    print("✓ PASS")
+
+
+def test_drain_task_chunks():
+    """One chunk per wake-up, in order; stopping the task flushes the rest"""
+    print("\n[log] Drain task chunking")
+    sim.reset()
+    from bbl.log import LogSink
+    sink = LogSink(size=256, rate_limit_ms=0)
+    console = _Console()
+    lines = ["line %02d" % i for i in range(10)]    # 8 bytes each
+    sink.buffered = True
+    for line in lines:
+        sink.write(line)
+
+    async def scenario():
+        task = asyncio.ensure_future(sink.drain_task(interval_ms=1000, chunk=12))
+        await asyncio.sleep(0.05)
+        # The first wake-up wrote one chunk, the next is 1 s away
+        assert console.chunks == [b"line 00\nline"], console.chunks
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    stdout = sys.stdout
+    sys.stdout = console
+    try:
+        asyncio.run(scenario())
+    finally:
+        sys.stdout = stdout
+    assert not sink.buffered and sink._used == 0
+    assert console.text() == "".join(line + "\n" for line in lines)
+    print("✓ PASS")
+
+
+if __name__ == '__main__':
+    test_level_filter()
+    test_rate_limit()
+    test_overflow_and_wraparound()
+    test_drain_task_chunks()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Command Mailbox Test Script
+Latest frame of each command type wins, counters, scratch frame swap and
+handler errors that must not block the other command types
+"""
+
+import sim
+
+sim.install()
+
+
+def _mailbox():
+    """Fresh parser registry with recording handlers"""
+    sim.reset()
+    from bbl.v7rc_parser import V7RCParser
+    from bbl.mailbox import CommandMailbox
+    parser = V7RCParser(log_func=lambda msg: None)
+    seen = []
+    for name in (b'SRV', b'SS8', b'LED'):
+        parser.registry.set_handler(
+            name, lambda frame, name=name: seen.append((name, list(frame[:4]))))
+    return CommandMailbox(parser), seen
+
+
+def test_latest_wins():
+    """Several frames per code between ticks: only the newest is applied"""
+    print("=" * 60)
+    print("Command Mailbox Test")
+    print("=" * 60)
+    print("\n[mailbox] Latest frame per command type")
+    mailbox, seen = _mailbox()
+    assert not mailbox.pending() and mailbox.apply() == 0
+
+    mailbox.post(b'SRV1000100010001000#')
+    mailbox.post(b'LEDF00AF00AF00AF00A#')
+    mailbox.post(b'SRV1100110011001100#')
+    mailbox.post(b'SRV1200120012001200#')
+    assert mailbox.pending()
+    assert mailbox.apply() == 2 and not mailbox.pending()
+    # Dispatched in command code order, each once, with its newest frame
+    assert seen == [(b'SRV', [1200] * 4), (b'LED', [255, 0, 0, 10])], seen
+
+    del seen[:]
+    assert mailbox.apply() == 0 and seen == []
+    mailbox.post(b'SRV1300130013001300#')
+    mailbox.apply()
+    assert seen == [(b'SRV', [1300] * 4)]
+
+    stats = mailbox.stats()
+    assert stats['SRV'] == {'received': 4, 'superseded': 2, 'applied': 2}, stats
+    assert stats['LED'] == {'received': 1, 'superseded': 0, 'applied': 1}, stats
+    assert stats['SS8'] == {'received': 0, 'superseded': 0, 'applied': 0}
+    assert stats['invalid'] == 0
+    mailbox.reset_stats()
+    assert mailbox.stats()['SRV'] == {'received': 0, 'superseded': 0, 'applied': 0}
+    print("✓ PASS")
+
+
+def test_scratch_swap():
+    """A bad frame is decoded into scratch and never touches the pending slot"""
+    print("\n[mailbox] Scratch frame swap")
+    mailbox, seen = _mailbox()
+    from bbl.v7rc_parser import CMD_NONE
+    mailbox.post(b'SRV1400140014001400#')
+    pending = mailbox._frames[1]
+    # Channels 1-2 decode before the bad digits: only the scratch frame
+    # is written
+    assert mailbox.post(b'SRV1900190019XX1900#') == CMD_NONE
+    assert mailbox.post(b'SRV1500#') == CMD_NONE
+    assert mailbox._frames[1] is pending and list(pending[:4]) == [1400] * 4
+    assert mailbox.stats()['invalid'] == 2
+
+    # Posting swaps frames: the slot gets the new one, the old one is scratch
+    mailbox.post(b'SRV1600160016001600#')
+    assert mailbox._scratch is pending and mailbox._frames[1] is not pending
+    mailbox.apply()
+    assert seen == [(b'SRV', [1600] * 4)]
+    print("✓ PASS")
+
+
+def test_handler_error():
+    """An exception in one handler does not stop the other command types"""
+    print("\n[mailbox] Handler errors")
+    mailbox, seen = _mailbox()
+
+    def broken(frame):
+        raise ValueError("broken handler")
+
+    mailbox.registry.set_handler(b'SRV', broken)
+    mailbox.post(b'SRV1500150015001500#')
+    mailbox.post(b'SS89696969696969696#')
+    mailbox.post(b'LED0F050F050F050F05#')
+    assert mailbox.apply() == 3
+    assert [name for name, _ in seen] == [b'SS8', b'LED']
+    assert mailbox.stats()['SRV']['applied'] == 1 and not mailbox.pending()
+    print("✓ PASS")
+
+
+if __name__ == '__main__':
+    test_latest_wins()
+    test_scratch_swap()
+    test_handler_error()
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Channel Mixer Test Script
+The compiled SS8/SRT presets must give exactly the motor and servo outputs
+of the original float handlers for every input
+"""
+
+import sim
+
+sim.install()
+from bbl.mixer import Mixer, PRESETS, compile_mixes
+
+
+class _Outputs:
+    """Records the last value written to every output"""
+
+    def __init__(self):
+        self.motor = {}
+        self.servo = {}
+
+    def set_motor(self, idx, speed):
+        self.motor[idx] = speed
+
+    def set_servo(self, idx, pwm):
+        self.servo[idx] = pwm
+
+
+def _ss8_reference(frame):
+    """The SS8 motor math of app/main.py before the mixer"""
+    speeds = []
+    for ch in (4, 5):
+        speed = int((frame[ch] - 1275) * 2048 / 1275)
+        speed = max(-2048, min(2048, speed))
+        speeds.append(0 if abs(speed) < 380 else speed)
+    return speeds
+
+
+def _srt_reference(throttle_pwm, steering_pwm):
+    """The SRT neutral check and MotorsController.set_tank_mode before the mixer"""
+    if abs(throttle_pwm - 1500) < 50 and abs(steering_pwm - 1500) < 50:
+        return [0, 0]
+    throttle = max(-2048, min(2048, int((throttle_pwm - 1500) * 2048 / 1000)))
+    steering = max(-2048, min(2048, int((steering_pwm - 1500) * 2048 / 1000)))
+    return [max(-2048, min(2048, throttle + steering)),
+            max(-2048, min(2048, throttle - steering))]
+
+
+def test_ss8_preset_exact():
+    """Every SS8 byte value on both motor channels"""
+    print("=" * 60)
+    print("Channel Mixer Test")
+    print("=" * 60)
+    print("\n[mixer] SS8 preset vs float reference")
+    out = _Outputs()
+    mix = Mixer(PRESETS['SS8'], out.set_motor, out.set_servo)
+    for hi in range(256):
+        for lo in range(0, 256, 3):
+            frame = [1500, 0, 2550, 500, hi * 10, lo * 10, 0, 0]
+            mix.apply(frame)
+            assert [out.motor[1], out.motor[2]] == _ss8_reference(frame), frame
+    assert out.servo == {1: 1500, 3: 2550, 4: 500}   # Zero channel skipped
+    print("✓ 256 x 86 frames identical")
+    print("✓ PASS")
+
+
+def test_srt_preset_exact():
+    """Throttle/steering over the whole 4-digit range, neutral band included"""
+    print("\n[mixer] SRT preset vs float reference")
+    out = _Outputs()
+    mix = Mixer(PRESETS['SRT'], out.set_motor, out.set_servo)
+    values = sorted(set(range(0, 10000, 37)) | set(range(1400, 1600)))
+    for t in values:
+        for s in range(0, 3100, 11):
+            mix.apply([t, s, 0, 1700])
+            assert [out.motor[1], out.motor[2]] == _srt_reference(t, s), (t, s)
+    assert out.servo == {4: 1700}
+
+    # MotorsController.set_tank_mode is integer now, same results
+    sim.reset()
+    from bbl.motors import MotorsController
+    motors = MotorsController()
+    seen = []
+    motors.set_speed = lambda idx, speed: seen.append(speed)
+    for t, s in ((1800, 1500), (1530, 1620), (0, 2600), (1123, 1877)):
+        del seen[:]
+        motors.set_tank_mode(t, s)
+        assert seen == _srt_reference(t, s), (t, s, seen)
+    print(f"✓ {len(values)} x 282 frames identical")
+    print("✓ PASS")
+
+
+def test_custom_mix():
+    """Config mixes: expo, deadzone, fractional coefficients, servo outputs"""
+    print("\n[mixer] Custom mix from the config")
+    out = _Outputs()
+    mixes = compile_mixes({
+        'SRV': {
+            'inputs': ({'ch': 0, 'center': 1500, 'span': 500, 'expo': 50,
+                        'deadzone': 20},
+                       {'ch': 1, 'center': 1500, 'span': 500}),
+            'outputs': ({'motor': 1, 'mix': (1, 0.5), 'limit': 1024},
+                        {'servo': 2, 'mix': (0, -1), 'center': 1450, 'travel': 400}),
+        },
+    }, out.set_motor, out.set_servo)
+    assert set(mixes) == {'SS8', 'SRT', 'SRV'}
+    srv = mixes['SRV']
+
+    srv.apply([1510, 1500, 0, 0])           # Inside the throttle deadzone
+    assert out.motor[1] == 0 and out.servo[2] == 1450
+    srv.apply([1750, 1500, 0, 0])           # Half stick, 50% expo: 5/8 of linear
+    assert out.motor[1] == 640, out.motor
+    srv.apply([2000, 2000, 0, 0])           # 2048 + 1024 limited to 1024
+    assert out.motor[1] == 1024 and out.servo[2] == 1050
+    srv.apply([1000, 1250, 0, 0])           # -2048 - 512 limited
+    assert out.motor[1] == -1024 and out.servo[2] == 1650
+
+    # Fractional coefficients round toward zero in both directions, like
+    # int() on the float sum of the Q8 coefficients
+    frac = Mixer({'inputs': ({'ch': 0, 'center': 1500, 'span': 500},
+                             {'ch': 1, 'center': 1500, 'span': 500}),
+                  'outputs': ({'motor': 1, 'mix': (0.3, -0.7)},
+                              {'motor': 2, 'mix': (-0.45, 0.1)})},
+                 out.set_motor, out.set_servo)
+    q1 = (round(0.3 * 256), round(-0.7 * 256))
+    q2 = (round(-0.45 * 256), round(0.1 * 256))
+    for a in range(1000, 2001, 7):
+        for b in range(1000, 2001, 13):
+            frac.apply([a, b])
+            n = ((a - 1500) * 2048 // 500 if a >= 1500 else -((1500 - a) * 2048 // 500),
+                 (b - 1500) * 2048 // 500 if b >= 1500 else -((1500 - b) * 2048 // 500))
+            want1 = int((q1[0] * n[0] + q1[1] * n[1]) / 256)
+            want2 = int((q2[0] * n[0] + q2[1] * n[1]) / 256)
+            assert (out.motor[1], out.motor[2]) == (want1, want2), (a, b, out.motor)
+    frac.apply([1501, 1500])            # +4 * 0.3 = +1.2 and -4 * 0.3 = -1.2
+    assert out.motor[1] == 1
+    frac.apply([1499, 1500])
+    assert out.motor[1] == -1
+
+    # Identical input shapes share one table
+    assert mixes['SS8'].in_table[0] is mixes['SS8'].in_table[1]
+    try:
+        Mixer({'inputs': ({'ch': 0, 'center': 0, 'span': 10},),
+               'outputs': ({'motor': 1, 'mix': (1, 1)},)}, None, None)
+        assert False, "row length not checked"
+    except ValueError:
+        pass
+    print("✓ PASS")
+
+
+if __name__ == '__main__':
+    test_ss8_preset_exact()
+    test_srt_preset_exact()
+    test_custom_mix()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Motor Driver Strategy Test Script
+MotorsController binds one driver class at init; drivers can be added by
+registering a class
+"""
+
+import sys
+
+import sim
+
+sim.install()
+from sim import machine
+
+
+def test_driver_selection():
+    """Each config maps to its strategy with the right stop state"""
+    print("=" * 60)
+    print("Motor Driver Strategy Test")
+    print("=" * 60)
+    for driver, hardware, cls, stop in (('L298N', False, 'L298N', (100, 100)),
+                                        ('TB6612', False, 'TB6612', (100, 100)),
+                                        ('L9110S', False, 'L9110S', (0, 0)),
+                                        ('L9110S', True, 'L9110SHardware', (0, 0))):
+        motors = sim.motors(driver, hardware)
+        assert type(motors.driver).__name__ == cls, (driver, type(motors.driver))
+        assert motors.driver.needs_tick() is not hardware
+
+        motors.set_speed(1, 1024)
+        motors.stop(1)
+        if hardware:
+            assert (motors.motor1_1.duty(), motors.motor1_2.duty()) == stop
+        else:
+            assert (motors.soft_pwm.duty(0), motors.soft_pwm.duty(1)) == stop
+            # Loop-stepped carrier: tick() toggles the pins
+            motors.set_speed(2, -1024)
+            machine.reset_trace()
+            for _ in range(300):    # 3 carrier periods
+                motors.motors_period_cb()
+            edges = [pin for _, kind, pin, _ in machine.trace if kind == 'pin']
+            assert edges.count(7) >= 5, edges
+        try:
+            motors.stop(3)
+            assert False, "bad index accepted"
+        except ValueError:
+            pass
+        print(f"✓ {driver}{' (hardware PWM)' if hardware else ''} -> {cls}")
+    print("✓ PASS")
+
+
+def test_register_driver():
+    """A registered class is picked up for its config name"""
+    print("\n[drivers] Registering a driver")
+    sim.reset()
+    import bbl.motor_drivers
+
+    class DRV8833(bbl.motor_drivers.SoftPWMDriver):
+        """Inputs high brake, 50-step carrier"""
+        stop_high = True
+        instances = 0
+
+        def __init__(self, config, gpios):
+            super().__init__(config, gpios)
+            DRV8833.instances += 1
+
+    config = {'use_hardware_pwm': False, 'pwm_period': 50,
+              'description': 'DRV8833 dual H-bridge'}
+    motors = sim.motors('DRV8833', config=config)
+    assert type(motors.driver).__name__ == 'L298N'  # Not registered: generic
+    import bbl.motor_drivers
+    bbl.motor_drivers.register_driver('DRV8833', DRV8833)
+    sys.modules.pop('bbl.motors')
+    from bbl.motors import MotorsController
+    motors = MotorsController()
+    assert isinstance(motors.driver, DRV8833) and DRV8833.instances == 1
+    motors.set_speed(2, 2048)
+    assert (motors.soft_pwm.duty(2), motors.soft_pwm.duty(3)) == (50, 0)
+    motors.set_speed(2, 0)
+    assert (motors.soft_pwm.duty(2), motors.soft_pwm.duty(3)) == (50, 50)
+    print("✓ PASS")
+
+
+def test_base_driver():
+    """The base class works as a driver that touches no pin"""
+    print("\n[drivers] No-op base driver")
+    sim.reset()
+    from bbl.motor_drivers import MotorDriver
+    from bbl.resources import NullPWM
+    machine.reset_trace()
+    driver = MotorDriver({}, (4, 5, 6, 7))
+    driver.build_lut(1, 10000, 10000)
+    assert driver.apply(1, 2048) and driver.stop(2) and not driver.apply(3, 0)
+    assert not driver.stop(0) and not driver.needs_tick()
+    driver.tick()
+    assert len(driver.pins) == 4 and all(isinstance(p, NullPWM) for p in driver.pins)
+    assert machine.trace == [], machine.trace
+    print("✓ PASS")
+
+
+if __name__ == '__main__':
+    test_driver_selection()
+    test_register_driver()
+    test_base_driver()
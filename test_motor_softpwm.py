@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+Motor Software PWM Test Script
+Runs the timer-driven software PWM engine against recording pins and
+checks carrier frequency and duty accuracy for every motor driver type
+"""
+
+import sys
+import types
+sys.path.insert(0, 'bbl')
+
+
+# Minimal recording stand-in for the machine module
+class _Clock:
+    us = 0.0
+
+
+class _Pin:
+    OUT = 1
+
+    def __init__(self, pin_id, mode=None):
+        self.id = pin_id
+        self.level = 0
+        self.edges = []     # (time_us, level) on every change
+
+    def value(self, v=None):
+        if v is None:
+            return self.level
+        v = 1 if v else 0
+        if v != self.level:
+            self.level = v
+            self.edges.append((_Clock.us, v))
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+
+class _Timer:
+    PERIODIC = 1
+    started = []
+
+    def __init__(self, timer_id):
+        self.id = timer_id
+
+    def init(self, freq, mode, callback):
+        self.freq = freq
+        self.callback = callback
+        _Timer.started.append(self)
+
+    def deinit(self):
+        _Timer.started.remove(self)
+
+
+_machine = types.ModuleType('machine')
+_machine.Pin = _Pin
+_machine.Timer = _Timer
+sys.modules.setdefault('machine', _machine)
+
+from config import MOTOR_DRIVER_CONFIG, SOFTWARE_PWM_CARRIER_HZ
+import softpwm
+from softpwm import SoftPWM, motor_duties
+
+# Use the recording machine even if another test installed its own
+softpwm.Timer = _Timer
+
+SPEEDS = [2048, 1536, 1024, 512, 100, -100, -700, -2048, 0]
+CARRIER_PERIODS = 20
+
+
+def _run(timer, periods, period):
+    # Fire the timer callback for a number of carrier periods
+    step_us = 1e6 / timer.freq
+    for _ in range(periods * period):
+        _Clock.us += step_us
+        timer.callback(timer)
+
+
+def _measure(pin, start_us, end_us, start_level):
+    """Returns (high_fraction, carrier_hz or None) of a pin in a window"""
+    high = 0.0
+    level = start_level
+    t = start_us
+    rises = []
+    for when, v in pin.edges:
+        if when <= start_us:
+            continue
+        if level:
+            high += when - t
+        t = when
+        level = v
+        if v:
+            rises.append(when)
+    if level:
+        high += end_us - t
+    carrier = None
+    if len(rises) >= 2:
+        carrier = 1e6 * (len(rises) - 1) / (rises[-1] - rises[0])
+    return high / (end_us - start_us), carrier
+
+
+def test_driver_types():
+    """Carrier frequency and duty accuracy for each software PWM driver"""
+    print("=" * 60)
+    print("Motor Software PWM Test")
+    print("=" * 60)
+    for name, cfg in MOTOR_DRIVER_CONFIG.items():
+        if cfg['use_hardware_pwm']:
+            print(f"\n[{name}] hardware PWM, skipped")
+            continue
+        period = cfg['pwm_period']
+        carrier = cfg.get('pwm_carrier_hz', SOFTWARE_PWM_CARRIER_HZ)
+        stop_high = cfg['stop_state'] == 'high'
+        print(f"\n[{name}] {carrier} Hz carrier, {period} steps, stop {cfg['stop_state']}")
+
+        pins = [_Pin(i) for i in (4, 5, 6, 7)]
+        idle = period if stop_high else 0
+        pwm = SoftPWM(pins, period, carrier, [idle] * 4)
+        assert pwm.start(0)
+        timer = _Timer.started[-1]
+        assert timer.freq == carrier * period
+
+        for speed in SPEEDS:
+            pwm.set_duties(0, *motor_duties(speed, period, stop_high))
+            _run(timer, 2, period)  # Settle on the new duty
+            levels = [p.level for p in pins[:2]]
+            start = _Clock.us
+            _run(timer, CARRIER_PERIODS, period)
+            end = _Clock.us
+
+            expected = [max(speed, 0) / 2048, max(-speed, 0) / 2048]
+            if speed == 0:
+                # Stopped: both channels held at the stop level
+                expected = [1.0, 1.0] if stop_high else [0.0, 0.0]
+            for ch in range(2):
+                duty, hz = _measure(pins[ch], start, end, levels[ch])
+                assert abs(duty - expected[ch]) <= 1 / period, (name, speed, ch, duty)
+                if 0 < pwm.duty(ch) < period:
+                    assert abs(hz - carrier) <= carrier * 0.01, (name, speed, ch, hz)
+            print(f"✓ speed {speed:5d}: duty {pwm.duty(0):3d}/{pwm.duty(1):3d} of {period}")
+
+        # Motor 2 channels were never touched
+        assert pwm.duty(2) == pwm.duty(3) == idle
+        pwm.stop()
+        assert timer not in _Timer.started
+        print("✓ PASS")
+
+
+def test_atomic_update():
+    """set_duties swaps in a complete duty set, the timer never sees half of it"""
+    print("\n[SoftPWM] Double-buffered duty update")
+    pins = [_Pin(i) for i in range(4)]
+    pwm = SoftPWM(pins, 10, 100)
+    active = pwm._duties[pwm._active]
+    pwm.set_duties(2, 3, 7)
+    # The array the timer was reading is untouched until the swap
+    assert list(active) == [0, 0, 0, 0]
+    assert [pwm.duty(i) for i in range(4)] == [0, 0, 3, 7]
+    pwm.set_duties(0, 5)
+    assert [pwm.duty(i) for i in range(4)] == [5, 0, 3, 7]
+    print("✓ PASS")
+
+
+def test_edge_schedule():
+    """Only steps with an edge touch the port, with one batched write"""
+    print("\n[SoftPWM] Precomputed edge schedule")
+    writes = []
+
+    class _CountingPort:
+        def write(self, set_mask, clr_mask):
+            writes.append((set_mask, clr_mask))
+
+    pwm = SoftPWM([_Pin(i) for i in range(4)], 100, 50)
+    pwm._port = _CountingPort()
+    pwm.set_duties(0, 30, 0, 100, 70)
+    for _ in range(200):
+        pwm.tick()
+    # Per period: the start (on 0b1101, off 0b0010) and two falling edges
+    assert len(writes) == 6
+    assert writes[:3] == [(0, 0b0001), (0, 0b1000), (0b1101, 0b0010)]
+    print(f"✓ {len(writes)} port writes in 200 steps")
+
+    # Register port: channel masks become GPIO masks, one store each
+    stores = []
+
+    class _Mem32:
+        def __setitem__(self, addr, value):
+            stores.append((addr, value))
+
+    saved = softpwm.mem32
+    softpwm.mem32 = _Mem32()
+    try:
+        pwm = SoftPWM([_Pin(i) for i in range(4)], 10, 50,
+                      gpios=[4, 5, 6, 7], gpio_base=0x60004000)
+        pwm.set_duties(0, 5, 0, 0, 0)
+        for _ in range(10):
+            pwm.tick()
+    finally:
+        softpwm.mem32 = saved
+    assert stores == [(0x6000400C, 1 << 4),
+                      (0x6000400C, 0b1110 << 4), (0x60004008, 1 << 4)]
+    print("✓ PASS")
+
+
+def test_loop_fallback():
+    """Without a timer the engine is stepped by tick() from the control loop"""
+    print("\n[SoftPWM] Control loop fallback")
+    pins = [_Pin(0)]
+    pwm = SoftPWM(pins, 4, 25)
+    saved = softpwm.Timer
+    softpwm.Timer = None
+    try:
+        assert not pwm.start(0)
+    finally:
+        softpwm.Timer = saved
+    assert not pwm.running()
+    pwm.set_duties(0, 1)
+    levels = []
+    for _ in range(8):
+        pwm.tick()
+        levels.append(pins[0].level)
+    assert sum(levels) == 2
+    print("✓ PASS")
+
+
+if __name__ == '__main__':
+    test_driver_types()
+    test_atomic_update()
+    test_edge_schedule()
+    test_loop_fallback()
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+NeoPixel Driver Test Script
+Bulk GRB fills, the dirty flag that skips unchanged strip writes, and the
+breathing lookup table
+"""
+
+import math
+import tempfile
+
+import sim
+
+sim.install()
+from sim import bluetooth, machine
+from sim.vclock import VirtualClock
+
+
+def test_driver():
+    """GRB layout, mask fills, writes only after a change"""
+    print("=" * 60)
+    print("NeoPixel Driver Test")
+    print("=" * 60)
+    print("\n[np] Buffer and dirty flag")
+    sim.reset()
+    from bbl.neopixel import NeoPixel, counters
+    np = NeoPixel(machine.Pin(21), 4)
+    np[1] = (1, 2, 3)
+    assert bytes(np.buf) == bytes((0, 0, 0, 2, 1, 3, 0, 0, 0, 0, 0, 0))
+    assert np[1] == (1, 2, 3)
+    assert np.write() and not np.write()
+
+    np[1] = (1, 2, 3)              # Same color: nothing to send
+    np.fill_mask(0b0010, (1, 2, 3))
+    assert not np.dirty and not np.write()
+    np.fill_mask(0b1001, (255, 0, 16), (0, 0, 0))
+    assert bytes(np.buf) == bytes((0, 255, 16, 0, 0, 0, 0, 0, 0, 0, 255, 16))
+    assert np.write()
+    np.fill((7, 8, 9))
+    assert bytes(np.buf) == bytes((8, 7, 9)) * 4 and np.write()
+    assert counters == {'writes': 3, 'skipped': 2}, counters
+    sent = [value for _, kind, _, value in machine.trace if kind == 'bitstream']
+    assert len(sent) == 3 and sent[-1] == bytes((8, 7, 9)) * 4
+
+    rgbw = NeoPixel(machine.Pin(20), 2, bpp=4)
+    rgbw.fill_mask(0b10, (1, 2, 3, 4))
+    assert bytes(rgbw.buf) == bytes((0, 0, 0, 0, 2, 1, 3, 4)) and rgbw[1] == (1, 2, 3, 4)
+    unwired = NeoPixel(None, 4)
+    unwired.fill((9, 9, 9))
+    assert unwired.write() and counters['writes'] == 3
+    print("✓ PASS")
+
+
+def test_breathing_table():
+    """The table gives the colors of the former float math (within 1)"""
+    print("\n[np] Breathing lookup table")
+    sim.reset()
+    from bbl.leds import LEDController, BREATH_STEPS
+    led = LEDController('LED1')
+    led.set_led_effect(2, 2560, 0xFF, 0b0101, 0xFF8010)
+    start = led.starts[0]
+    for k in range(BREATH_STEPS):
+        # Former code: duty = int(512 * (1 + sin(2 pi p - pi / 2))), color * duty / 1024
+        progress = k / BREATH_STEPS
+        duty = int(512 * (1 + math.sin(2 * math.pi * progress - math.pi / 2)))
+        want = tuple(int(c * duty / 1024.0) for c in (0xFF, 0x80, 0x10))
+        led.starts[0] = led.starts[2] = start - k * 20
+        led.timing_proc()
+        got = led.np[0]
+        assert all(abs(g - w) <= 1 for g, w in zip(got, want)), (k, got, want)
+        assert led.np[1] == (0, 0, 0) and led.np[2] == got
+    print("✓ PASS")
+
+
+def test_avoided_writes():
+    """Repeated LED frames in app/main.py no longer resend the strip"""
+    print("\n[np] Bitstream calls avoided in app/main.py")
+    sim.reset()
+    import bbl.config
+    bbl.config.BLE_ENABLED = True
+    import uasyncio
+
+    async def scenario():
+        ble = bluetooth.BLE()
+        ble.inject_connect()
+        for _ in range(60):     # 3 s of frames at 20 Hz
+            ble.inject_write(b'LEDF00FF00F0F0F000A#')
+            ble.inject_write(b'LE200F100F100F100F1#')
+            await uasyncio.sleep(0.05)
+
+    with tempfile.TemporaryDirectory() as fs:
+        sim.run('app/main.py', duration_s=3.5, scenario=scenario, fs=fs,
+                port_map={6188: 0}, clock=VirtualClock())
+    import bbl.neopixel
+    writes = bbl.neopixel.counters['writes']
+    skipped = bbl.neopixel.counters['skipped']
+    print(f"  {writes / 3.5:.1f} bitstream calls/s, {skipped / 3.5:.1f}/s avoided")
+    assert writes == machine.counters['bitstream_calls']
+    # Solid LED1 is sent once; blinking LE2 once per 100 ms on/off edge
+    by_pin = {}
+    for _, kind, pin, value in machine.trace:
+        if kind == 'bitstream':
+            by_pin.setdefault(pin, []).append(value)
+    assert len(by_pin[21]) <= 3, by_pin[21]
+    assert all(a != b for a, b in zip(by_pin[20], by_pin[20][1:]))
+    assert skipped > writes
+    print("✓ PASS")
+
+
+if __name__ == '__main__':
+    test_driver()
+    test_breathing_table()
+    test_avoided_writes()
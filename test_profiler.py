@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Control Loop Profiler Test Script
+Times scheduler tasks and command handlers on the simulator's virtual
+clock, flags over-budget ticks and reads the table back with '?PRF'
+"""
+
+import tempfile
+
+import sim
+
+sim.install()
+from sim import bluetooth
+from sim.vclock import VirtualClock
+
+
+def test_stage_timing_and_budget():
+    """Per-stage min/avg/max/p99, nested handler time, blame on overrun"""
+    print("=" * 60)
+    print("Control Loop Profiler Test")
+    print("=" * 60)
+    print("\n[prof] Stage timing on the virtual clock")
+    sim.reset()
+    clock = VirtualClock()
+    sim.use_clock(clock)
+    try:
+        from bbl import profiler
+        from bbl.scheduler import Scheduler
+        from bbl.v7rc_parser import V7RCParser
+        from bbl.mailbox import CommandMailbox
+
+        parser = V7RCParser()
+        parser.registry.set_handler(b'SRV', lambda frame: clock.sleep_us(300))
+        mailbox = CommandMailbox(parser)
+        leds = {'n': 0}
+
+        def led_effect():
+            leds['n'] += 1
+            clock.sleep_us(5000 if leds['n'] == 20 else 100)
+
+        sched = Scheduler()
+        sched.add('mailbox', mailbox.apply, period_ms=10)
+        sched.add('led1', led_effect, period_ms=33)
+        prof = profiler.enable(sched, parser.registry, budget_us=2000)
+
+        end = clock.now_us() + 1000000
+        while clock.now_us() < end:
+            mailbox.post(b'SRV1500150015001500#')
+            clock.sleep_us(max(1, sched.run_once()) * 1000)
+        print(prof.report())
+    finally:
+        sim.use_clock(None)
+
+    stats = prof.stats()
+    assert stats['SRV']['calls'] == stats['mailbox']['calls'] >= 99
+    assert stats['SRV']['min_us'] == stats['SRV']['max_us'] == 300
+    assert stats['led1']['max_us'] == 5000 and stats['led1']['p99_us'] == 5000
+    assert stats['led1']['min_us'] == 100
+    # The mailbox time includes its handler calls
+    assert stats['mailbox']['min_us'] == 300
+    # One stalled LED tick, blamed on the LED stage, not the handler
+    assert prof.over_budget == 1 and stats['led1']['blamed'] == 1
+    assert 'led1 5000 us' in prof.report()
+    print("✓ PASS")
+
+
+def test_disable_restores_functions():
+    """enable()/disable() swap the wrappers in and out"""
+    print("\n[prof] Zero overhead when disabled")
+    sim.reset()
+    from bbl import profiler
+    from bbl.scheduler import Scheduler
+    from bbl.v7rc_parser import V7RCParser
+
+    def task():
+        pass
+
+    def handler(frame):
+        pass
+
+    parser = V7RCParser()
+    parser.registry.set_handler(b'SRT', handler)
+    sched = Scheduler()
+    sched.add('task', task, period_ms=10)
+    run_once = sched.run_once
+    profiler.enable(sched, parser.registry)
+    assert sched.funcs[0] is not task and sched.run_once != run_once
+    profiler.disable()
+    assert sched.funcs == [task] and sched.run_once == run_once
+    assert handler in parser.registry.handlers
+    assert profiler.report() == "profiler disabled"
+    print("✓ PASS")
+
+
+def test_raising_handler_keeps_nesting():
+    """A handler that raises is still timed and blamed, not its mailbox"""
+    print("\n[prof] Exceptions in timed stages")
+    sim.reset()
+    clock = VirtualClock()
+    sim.use_clock(clock)
+    try:
+        from bbl import profiler
+        from bbl.scheduler import Scheduler
+        from bbl.v7rc_parser import V7RCParser
+        from bbl.mailbox import CommandMailbox
+
+        def broken(frame):
+            clock.sleep_us(3000)
+            raise ValueError("broken handler")
+
+        parser = V7RCParser()
+        parser.registry.set_handler(b'SRV', broken)
+        mailbox = CommandMailbox(parser)
+        sched = Scheduler()
+        sched.add('mailbox', mailbox.apply, period_ms=10)
+        prof = profiler.enable(sched, parser.registry, budget_us=2000)
+        for _ in range(5):
+            mailbox.post(b'SRV1500150015001500#')
+            clock.sleep_us(10000)
+            sched.run_once()
+        profiler.disable()
+    finally:
+        sim.use_clock(None)
+
+    stats = prof.stats()
+    assert stats['SRV']['calls'] == 5 and stats['SRV']['min_us'] == 3000, stats
+    assert prof.over_budget == 5
+    assert stats['SRV']['blamed'] == 5 and stats['mailbox']['blamed'] == 0, stats
+    print("✓ PASS")
+
+
+def test_remote_query():
+    """app/main.py with PROFILER enabled answers '?PRF' over BLE"""
+    print("\n[prof] ?PRF over BLE")
+    sim.reset()
+    import bbl.config
+    bbl.config.BLE_ENABLED = True
+    bbl.config.PROFILER = True
+    from bbl import diag
+    import uasyncio
+
+    async def scenario():
+        ble = bluetooth.BLE()
+        ble.inject_connect()
+        ble.inject_write(b'SRV1800150015001500#LEDF005F005F005F005#')
+        await uasyncio.sleep(1)
+        ble.notifications.clear()
+        ble.inject_write(diag.query(b'PRF'))
+        await uasyncio.sleep(0.1)
+
+    with tempfile.TemporaryDirectory() as fs:
+        sim.run('app/main.py', duration_s=2, scenario=scenario, fs=fs,
+                port_map={6188: 0}, clock=VirtualClock())
+    text = b''.join(n[2] for n in bluetooth.BLE().notifications).decode()
+    print(text)
+    assert text.startswith('stage'), text
+    for stage in ('mailbox', 'led1', 'SRV', 'LED'):
+        assert '\n' + stage in text, stage
+    print("✓ PASS")
+
+
+if __name__ == '__main__':
+    test_stage_timing_and_budget()
+    test_disable_restores_functions()
+    test_raising_handler_keeps_nesting()
+    test_remote_query()
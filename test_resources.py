@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Pin and LEDC Channel Manager Test Script
+Boot-time grants by priority, the LED/buzzer clash on GPIO 21/20, motors
+on hardware PWM when channels are left, and the simulator's 6-channel limit
+"""
+
+import tempfile
+
+import sim
+
+sim.install()
+from sim import bluetooth, machine
+from sim.vclock import VirtualClock
+
+
+def test_default_plan():
+    """Default priorities: LEDs win the shared pins, motors fall back"""
+    print("=" * 60)
+    print("Resource Manager Test")
+    print("=" * 60)
+    print("\n[res] Default boot plan")
+    sim.reset()
+    from bbl import resources
+    from bbl.config import RESOURCE_PRIORITY
+    notes = resources.allocate(RESOURCE_PRIORITY)
+    print(resources.report())
+    assert notes == ['motors: 2 LEDC channels left, 4 needed, using plain outputs',
+                     'BUZZER1: denied, GPIO 21 is used by LED1',
+                     'BUZZER2: denied, GPIO 20 is used by LED2'], notes
+
+    from bbl import ServosController, MotorsController, LEDController
+    from bbl.buzzer import BuzzerController
+    servos = ServosController()
+    for idx in range(1, 5):
+        servos.set_angle(idx, 90)
+    motors = MotorsController()
+    led = LEDController('LED1')
+    buzzer = BuzzerController('BUZZER1')
+    assert not motors.driver.hardware_pwm
+    assert isinstance(buzzer.buzzer, resources.NullPWM)
+
+    machine.reset_trace()
+    buzzer.set_freq(440)
+    buzzer.set_duty(512)
+    buzzer.reinit(freq=880, duty=100)
+    led.set_led_rgbm(1, 255, 0, 0, 'solid')
+    led.timing_proc()
+    kinds = set((kind, pin) for _, kind, pin, _ in machine.trace)
+    assert ('bitstream', 21) in kinds and ('pwm_duty', 21) not in kinds, kinds
+    assert resources.free_channels() == 2
+    print("✓ PASS")
+
+
+def test_motors_take_free_channels():
+    """With two servos listed, the motors get four LEDC channels"""
+    print("\n[res] Hardware PWM for the motors")
+    sim.reset(MOTOR_DRIVER_TYPE='L298N', SOFTWARE_PWM_USE_TIMER=False)
+    from bbl import resources
+    from bbl.motors import MotorsController
+    from bbl.servos import ServosController
+    notes = resources.allocate(('servo1', 'servo2', 'motors', 'LED1'))
+    assert notes == [], notes
+
+    motors = MotorsController()
+    assert type(motors.driver).__name__ == 'L298NHardware'
+    assert not motors.driver.needs_tick()
+    motors.set_speed(1, 2048)
+    assert (motors.motor1_1.duty(), motors.motor1_2.duty()) == (1023, 0)
+    motors.stop(1)
+    assert (motors.motor1_1.duty(), motors.motor1_2.duty()) == (1023, 1023)
+
+    # Servo 3 is not in the plan and all six channels are taken
+    servos = ServosController()
+    servos.set_angle(1, 0)
+    servos.set_angle(3, 0)
+    assert servos.servos_map[0].duty() == 25 and servos.servos_map[2] is None
+    assert resources.grants()['servo3'] == 'denied'
+    assert resources.free_channels() == 0
+    assert 'LEDC 6/6' in resources.report()
+    print("✓ PASS")
+
+
+def test_motors_denied():
+    """Motor pins given to another device: no-op driver, GPIO 4-7 untouched"""
+    print("\n[res] Motors without their pins")
+    sim.reset()
+    from bbl import resources
+    assert resources.acquire('other', (6,), pwm=False) == resources.DIGITAL
+    notes = resources.allocate(('servo1', 'motors'))
+    assert notes == ['motors: denied, GPIO 6 is used by other'], notes
+
+    machine.reset_trace()
+    from bbl.motors import MotorsController
+    from bbl.motor_drivers import MotorDriver
+    motors = MotorsController()
+    assert type(motors.driver) is MotorDriver
+    assert isinstance(motors.motor1_1, resources.NullPWM)
+    motors.set_speed(1, 1024)
+    motors.set_speed(2, -2048)
+    motors.stop(1)
+    motors.motors_period_cb()
+    touched = [(kind, pin) for _, kind, pin, _ in machine.trace if pin in (4, 5, 6, 7)]
+    assert touched == [], touched
+    print("✓ PASS")
+
+
+def test_first_come_without_plan():
+    """No boot plan: grants in request order, release frees the pins"""
+    print("\n[res] First come, first served")
+    sim.reset()
+    from bbl import resources, LEDController
+    from bbl.buzzer import BuzzerController
+    buzzer = BuzzerController('BUZZER2')
+    led = LEDController('LED2')
+    assert not isinstance(buzzer.buzzer, resources.NullPWM)
+    assert resources.grants() == {'BUZZER2': 'PWM', 'LED2': 'denied'}
+    machine.reset_trace()
+    led.set_led_rgbm(1, 0, 255, 0, 'solid')
+    led.timing_proc()
+    assert machine.counters['bitstream_calls'] == 0
+
+    resources.release('BUZZER2')
+    resources.release('LED2')
+    assert resources.acquire('LED2', (20,), pwm=False) == resources.DIGITAL
+    assert resources.acquire('x', (8, 9, 10, 11, 12, 13), pwm=True) == resources.PWM
+    assert resources.acquire('y', (14,), pwm=True) == resources.DENIED
+    print("✓ PASS")
+
+
+def test_sim_channel_limit():
+    """The simulated PWM runs out after six LEDC channels like the chip"""
+    print("\n[res] Simulator LEDC limit")
+    sim.reset()
+    pwms = [machine.PWM(machine.Pin(gpio), freq=50) for gpio in range(6)]
+    machine.PWM(machine.Pin(0), freq=50)       # Same pin, same channel
+    try:
+        machine.PWM(machine.Pin(6), freq=50)
+        assert False, "seventh channel granted"
+    except RuntimeError:
+        pass
+    pwms[5].deinit()
+    machine.PWM(machine.Pin(6), freq=50)
+    print("✓ PASS")
+
+
+def test_remote_query():
+    """app/main.py reports its grants with '?RES'"""
+    print("\n[res] ?RES over BLE")
+    sim.reset()
+    import bbl.config
+    bbl.config.BLE_ENABLED = True
+    from bbl import diag
+    import uasyncio
+
+    async def scenario():
+        ble = bluetooth.BLE()
+        ble.inject_connect()
+        await uasyncio.sleep(0.5)
+        ble.notifications.clear()
+        ble.inject_write(diag.query(b'RES'))
+        await uasyncio.sleep(0.1)
+
+    with tempfile.TemporaryDirectory() as fs:
+        sim.run('app/main.py', duration_s=1, scenario=scenario, fs=fs,
+                port_map={6188: 0}, clock=VirtualClock())
+    text = b''.join(n[2] for n in bluetooth.BLE().notifications).decode()
+    print(text)
+    assert text.startswith('LEDC 4/6'), text
+    assert 'BUZZER1: denied' in text and 'servo1' in text
+    print("✓ PASS")
+
+
+if __name__ == '__main__':
+    test_default_plan()
+    test_motors_take_free_channels()
+    test_motors_denied()
+    test_first_come_without_plan()
+    test_sim_channel_limit()
+    test_remote_query()
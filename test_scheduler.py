@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Control Loop Scheduler Test Script
+Runs bbl.scheduler on the simulator's virtual clock: absolute deadlines
+without drift, idle skipping, event-driven deadlines and overrun counts
+"""
+
+import sim
+
+sim.install()
+from sim.vclock import VirtualClock
+
+
+def _run(sched, clock, duration_ms):
+    """Scheduler passes with the virtual clock sleeping between them"""
+    end = clock.now_us() + duration_ms * 1000
+    while clock.now_us() < end:
+        clock.sleep_us(max(1, sched.run_once()) * 1000)
+
+
+def _scheduler(clock):
+    sim.reset()
+    sim.use_clock(clock)
+    from bbl.scheduler import Scheduler
+    return Scheduler()
+
+
+def test_rates_without_drift():
+    """Tasks keep their own rate even though each call takes time"""
+    print("=" * 60)
+    print("Control Loop Scheduler Test")
+    print("=" * 60)
+    print("\n[sched] 50 Hz and 30 Hz tasks, 3 ms of work per call")
+    clock = VirtualClock.before_wrap(ms=500)  # Also crosses the ticks_ms wrap
+    try:
+        sched = _scheduler(clock)
+        calls = {'servos': [], 'leds': []}
+
+        def work(name):
+            def func():
+                calls[name].append(clock.now_us())
+                clock.sleep_us(3000)
+            return func
+
+        sched.add('servos', work('servos'), period_ms=20)
+        sched.add('leds', work('leds'), period_ms=33)
+        _run(sched, clock, 2000)
+    finally:
+        sim.use_clock(None)
+
+    stats = sched.stats()
+    assert abs(len(calls['servos']) - 100) <= 1, len(calls['servos'])
+    assert abs(len(calls['leds']) - 61) <= 1, len(calls['leds'])
+    assert stats['servos']['overruns'] == 0 and stats['leds']['overruns'] == 0
+    # Absolute deadlines: the n-th call is never more than a few ms late
+    t0 = calls['servos'][0]
+    late = max(t - t0 - n * 20000 for n, t in enumerate(calls['servos']))
+    assert late <= 6000, late
+    print(f"✓ {len(calls['servos'])} / {len(calls['leds'])} calls in 2 s, "
+          f"worst lateness {late / 1000:.0f} ms")
+    print("✓ PASS")
+
+
+def test_idle_and_due_tasks():
+    """Idle tasks are skipped, event tasks run on their own deadlines"""
+    print("\n[sched] Idle skipping and note-boundary deadlines")
+    clock = VirtualClock()
+    try:
+        sched = _scheduler(clock)
+        import utime
+        state = {'stepping': False, 'notes': [], 'next': 0, 'left': 0}
+
+        def note():
+            state['notes'].append(utime.ticks_ms())
+            state['left'] -= 1
+            state['next'] = utime.ticks_add(utime.ticks_ms(), 125)
+
+        sched.add('servos', lambda: None, period_ms=20,
+                  idle=lambda: not state['stepping'])
+        sched.add('music', note, period_ms=5, idle=lambda: state['left'] <= 0,
+                  due=lambda: state['next'])
+        _run(sched, clock, 1000)
+        assert sched.stats()['servos']['runs'] == 0
+        assert sched.stats()['servos']['skipped'] >= 49
+        assert not state['notes']
+
+        state['stepping'] = True
+        state['left'] = 4
+        state['next'] = utime.ticks_ms()
+        _run(sched, clock, 1000)
+    finally:
+        sim.use_clock(None)
+
+    stats = sched.stats()
+    assert stats['servos']['runs'] >= 49
+    assert len(state['notes']) == 4
+    gaps = [b - a for a, b in zip(state['notes'], state['notes'][1:])]
+    assert gaps == [125, 125, 125], gaps
+    assert stats['music']['overruns'] == 0
+    print(f"✓ notes at {gaps} ms intervals")
+    print("✓ PASS")
+
+
+def test_overruns_counted():
+    """A slow task makes the others miss deadlines, counted per task"""
+    print("\n[sched] Overruns")
+    clock = VirtualClock()
+    try:
+        sched = _scheduler(clock)
+        slow = {'n': 0}
+
+        def hog():
+            slow['n'] += 1
+            if slow['n'] == 10:
+                clock.sleep_us(100000)  # One 100 ms stall
+
+        sched.add('hog', hog, period_ms=10)
+        sched.add('servos', lambda: None, period_ms=20)
+        _run(sched, clock, 1000)
+    finally:
+        sim.use_clock(None)
+
+    stats = sched.stats()
+    assert stats['servos']['overruns'] == 1, stats
+    assert stats['servos']['max_late_ms'] >= 80, stats
+    # Re-anchored after the stall instead of a burst of catch-up calls
+    assert stats['servos']['runs'] <= 46, stats
+    print(sched.report())
+    print("✓ PASS")
+
+
+def test_task_errors_isolated():
+    """A raising task is counted; it and the other tasks keep running"""
+    print("\n[sched] Task exceptions")
+    clock = VirtualClock()
+    try:
+        sched = _scheduler(clock)
+        calls = {'bad': 0, 'servos': 0, 'music': 0}
+
+        def bad():
+            calls['bad'] += 1
+            raise ValueError("broken")
+
+        def servos():
+            calls['servos'] += 1
+
+        def note():
+            calls['music'] += 1
+            raise RuntimeError("bad note")
+
+        sched.add('bad', bad, period_ms=10)
+        sched.add('servos', servos, period_ms=20)
+        sched.add('music', note, period_ms=5, idle=lambda: calls['music'] >= 3,
+                  due=lambda: 0)
+        _run(sched, clock, 200)
+    finally:
+        sim.use_clock(None)
+
+    stats = sched.stats()
+    assert stats['bad']['errors'] == calls['bad'] >= 19, stats
+    assert stats['servos']['errors'] == 0 and calls['servos'] >= 9, stats
+    assert stats['music']['errors'] == 3, stats
+    assert 'errors' in sched.report()
+    sched.reset_stats()
+    assert sched.stats()['bad']['errors'] == 0
+    print("✓ PASS")
+
+
+if __name__ == '__main__':
+    test_rates_without_drift()
+    test_idle_and_due_tasks()
+    test_overruns_counted()
+    test_task_errors_isolated()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Servo Fixed-Point Math Test Script
+Compares the integer servo math against the original float formulas:
+every generated duty must be within one duty step
+"""
+
+import sim
+
+sim.install()
+
+
+class _FloatServo:
+    """The original float implementation of one stepping servo"""
+
+    def __init__(self, angle, radPSec=4, call_freq=100):
+        self.sensitivity = (57.3 * radPSec) / call_freq
+        self.c_ang = angle
+
+    def step_to(self, s_ang, velocity):
+        duties = []
+        while self.c_ang != s_ang:
+            if self.c_ang < s_ang:
+                angle = self.c_ang + (velocity / 100 * self.sensitivity)
+                angle = angle if angle <= s_ang else s_ang
+            else:
+                angle = self.c_ang - (velocity / 100 * self.sensitivity)
+                angle = angle if angle >= s_ang else s_ang
+            self.c_ang = angle
+            duties.append((int)(angle * 102 / 180 + 25))
+        return duties
+
+
+def test_direct_conversions():
+    """set_angle, set_pwm and set_speed match the float formulas"""
+    print("=" * 60)
+    print("Servo Fixed-Point Math Test")
+    print("=" * 60)
+    servos = sim.servos()
+    print("\n[servo] set_angle 0..180, set_pwm 500..2500, set_speed -100..100")
+    worst = 0
+    for angle in range(181):
+        servos.set_angle(1, angle)
+        diff = abs(servos.servos_map[0].duty() - int(angle * 102 / 180 + 25))
+        worst = max(worst, diff)
+    for pwm_us in range(500, 2501):
+        servos.set_pwm(2, pwm_us)
+        diff = abs(servos.servos_map[1].duty() - int((pwm_us - 500) * 102 / 2000 + 25))
+        worst = max(worst, diff)
+    for speed in range(-100, 101):
+        servos.set_speed(3, speed)
+        diff = abs(servos.servos_map[2].duty() - round(speed * 51.2 / 100 + 76.8))
+        worst = max(worst, diff)
+    assert worst <= 1, worst
+    print(f"✓ worst difference {worst} duty step")
+    print("✓ PASS")
+
+
+def test_stepping_sequences():
+    """Stepping moves produce the float duty sequence within one step"""
+    print("\n[servo] set_angle_stepping sequences")
+    moves = [(0, 180, 100), (180, 0, 100), (90, 135, 10), (45, 44, 3),
+             (10, 170, 57), (170, 20, 33), (0, 180, 1), (120, 60, 180)]
+    worst = 0
+    longest = 0
+    for freq in (100, 50):
+        for start, target, velocity in moves:
+            servos = sim.servos()
+            servos.set_call_freq(freq)
+            servos.set_angle(1, start)
+            servos.set_angle_stepping(1, target, velocity)
+            pwm = servos.servos_map[0]
+            duties = []
+            while not servos.idle():
+                servos.timing_proc()
+                duties.append(pwm.duty())
+
+            expected = _FloatServo(start, call_freq=freq).step_to(target, velocity)
+            # Integer steps may land on the target one call apart
+            assert abs(len(duties) - len(expected)) <= 1, (start, target, velocity)
+            assert duties[-1] == expected[-1]
+            for i in range(max(len(duties), len(expected))):
+                a = duties[min(i, len(duties) - 1)]
+                b = expected[min(i, len(expected) - 1)]
+                worst = max(worst, abs(a - b))
+            longest = max(longest, len(duties))
+    assert worst <= 1, worst
+    print(f"✓ {2 * len(moves)} moves, up to {longest} steps, worst difference {worst}")
+    print("✓ PASS")
+
+
+def test_no_float_state():
+    """Stepping state stays integer, so the tick path allocates no floats"""
+    print("\n[servo] Integer state")
+    servos = sim.servos()
+    servos.set_angle(1, 30)
+    servos.set_angle_stepping(1, 150, 25)
+    for _ in range(10):
+        servos.timing_proc()
+    for column in (servos.c_ang, servos.s_ang, servos.rh_ang, servos.step):
+        assert type(column[0]) is int
+    assert type(servos.sensitivity) is int
+    print("✓ PASS")
+
+
+if __name__ == '__main__':
+    test_direct_conversions()
+    test_stepping_sequences()
+    test_no_float_state()
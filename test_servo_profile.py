@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+Servo Motion Profile Test Script
+Trapezoidal and S-curve moves precomputed into duty-step tables and
+played back by timing_proc
+"""
+
+import sim
+
+sim.install()
+
+
+def _play(servos, idx):
+    """Duty after every timing_proc call until the servos are idle"""
+    pwm = servos.servos_map[idx - 1]
+    duties = []
+    while not servos.idle():
+        servos.timing_proc()
+        duties.append(pwm.duty())
+    return duties
+
+
+def test_trapezoid():
+    """Accelerate, cruise at max velocity, decelerate, land on target"""
+    print("=" * 60)
+    print("Servo Motion Profile Test")
+    print("=" * 60)
+    print("\n[servo] Trapezoidal 0 -> 180°, 180°/s, 360°/s²")
+    servos = sim.servos(freq=50)
+    servos.set_angle(1, 0)
+    duration = servos.move(1, 180, 180, 360)
+    assert duration == 1500, duration
+    duties = _play(servos, 1)
+    assert 73 <= len(duties) <= 75, len(duties)   # 1.5 s at 50 Hz
+    assert duties[-1] == 127 and duties == sorted(duties)
+    speeds = [b - a for a, b in zip(duties, duties[1:])]
+    # Slow at both ends, ~2 duty/tick (180°/s) while cruising
+    assert max(speeds[:5]) <= 1 and max(speeds[-5:]) <= 1
+    cruise = speeds[30:40]
+    assert 18 <= sum(cruise) <= 23, cruise
+    assert servos.c_ang[0] == servos.s_ang[0] == 180000000
+    print(f"✓ {len(duties)} ticks, cruise {sum(cruise) / 10:.1f} duty/tick")
+    print("✓ PASS")
+
+
+def test_triangular_and_s_curve():
+    """Short moves never reach max velocity; jerk limit smooths the start"""
+    print("\n[servo] Triangular and S-curve")
+    servos = sim.servos(freq=50)
+    servos.set_angle(2, 90)
+    servos.move(2, 100, 180, 360)          # 10°: peak 60°/s < 180°/s
+    trap = _play(servos, 2)
+    assert trap[-1] == servos.servos_map[1].duty() == 81
+
+    servos.set_angle(2, 0)
+    trap_ms = servos.move(2, 90, 180, 360)
+    trap = _play(servos, 2)
+    servos.set_angle(2, 0)
+    s_ms = servos.move(2, 90, 180, 360, jerk=1800)
+    scurve = _play(servos, 2)
+    assert s_ms == trap_ms + 200, (trap_ms, s_ms)
+    assert scurve[-1] == trap[-1] == 76
+    # Position lags the trapezoid early on (acceleration ramps in)
+    assert all(s <= t for s, t in zip(scurve[:10], trap[:10]))
+    assert scurve[:10] != trap[:10]
+    print(f"✓ trapezoid {trap_ms} ms, S-curve {s_ms} ms")
+    print("✓ PASS")
+
+
+def test_coordinated_moves():
+    """move_sync: different distances, same arrival tick"""
+    print("\n[servo] Coordinated moves")
+    servos = sim.servos(freq=50)
+    servos.set_angle(1, 0)
+    servos.set_angle(3, 80)
+    duration = servos.move_sync({1: 180, 3: 100}, 180, 360, jerk=2000)
+    arrived = {}
+    tick = 0
+    while not servos.idle():
+        servos.timing_proc()
+        tick += 1
+        for idx in (1, 3):
+            if not servos.moving & (1 << (idx - 1)) and idx not in arrived:
+                arrived[idx] = tick
+    assert abs(arrived[1] - arrived[3]) <= 2, arrived
+    assert abs(arrived[1] * 20 - duration) <= 60, (arrived, duration)
+    assert servos.servos_map[0].duty() == 127 and servos.servos_map[2].duty() == 81
+    print(f"✓ both servos arrive after {arrived[1]} / {arrived[3]} ticks ({duration} ms)")
+    print("✓ PASS")
+
+
+def test_interrupted_move():
+    """New commands take over from the current position of a move"""
+    print("\n[servo] Interrupting a move")
+    servos = sim.servos(freq=50)
+    servos.set_angle(4, 0)
+    servos.move(4, 180, 90, 180)
+    for _ in range(40):
+        servos.timing_proc()
+    duty = servos.servos_map[3].duty()
+    from bbl.servos import udeg_to_duty
+    assert udeg_to_duty(servos.c_ang[3]) == duty
+    servos.set_angle_stepping(4, 0, 100)
+    assert servos.moving == 0
+    servos.timing_proc()
+    assert servos.servos_map[3].duty() < duty
+    servos.move(4, 180, 90, 180)
+    servos.set_pwm(4, 1500)
+    assert servos.idle()
+    print("✓ PASS")
+
+
+def test_move_always_lands():
+    """Start/target pairs that left the table one duty step short"""
+    print("\n[servo] Start/target sweep lands on the target duty")
+    servos = sim.servos(freq=50)
+    from bbl.servos import udeg_to_duty, UDEG
+    pairs = [(703, 150), (801, 60), (1011, 180), (1053, 180), (1102, 120)]
+    pairs += [(us, angle) for us in range(500, 2501, 11) for angle in range(0, 181, 30)]
+    for us, angle in pairs:
+        for jerk in ((None, 2000) if (us, angle) in pairs[:5] else (None,)):
+            servos.set_pwm(1, us)
+            servos.move(1, angle, 180, 360, jerk)
+            duties = _play(servos, 1)
+            target = udeg_to_duty(angle * UDEG)
+            assert not duties or duties[-1] == target, (us, angle, jerk, duties[-1])
+    print(f"✓ {len(pairs)} moves")
+    print("✓ PASS")
+
+
+if __name__ == '__main__':
+    test_trapezoid()
+    test_triangular_and_s_curve()
+    test_coordinated_moves()
+    test_interrupted_move()
+    test_move_always_lands()
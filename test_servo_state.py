@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Servo State Test Script
+Checks the array-backed ServosController: only stepping servos are
+visited, and PWM.duty() is skipped when the duty does not change
+"""
+
+import sim
+
+sim.install()
+from sim import machine
+
+
+def _duty_writes(gpio):
+    return [v for _, kind, pin, v in machine.trace if kind == 'pwm_duty' and pin == gpio]
+
+
+def test_stepping_bitmask():
+    """Only servos with a move in progress are in the stepping mask"""
+    print("=" * 60)
+    print("Servo State Test")
+    print("=" * 60)
+    print("\n[servo] Stepping bitmask")
+    servos = sim.servos()
+    assert servos.idle() and servos.stepping == 0
+    servos.set_angle(2, 0)
+    servos.set_angle(4, 0)
+    servos.set_angle_stepping(2, 90, 100)
+    servos.set_angle_stepping(4, 10, 100)
+    assert servos.stepping == 0b1010
+
+    for _ in range(5):
+        servos.timing_proc()
+    assert servos.stepping == 0b0010  # Servo 4 arrived after 5 steps of 2.29°
+    while not servos.idle():
+        servos.timing_proc()
+    assert servos.c_ang[1] == servos.s_ang[1] == servos.rh_ang[1] == 90000000
+
+    # A direct command cancels the move
+    servos.set_angle_stepping(2, 0, 10)
+    servos.timing_proc()
+    servos.set_pwm(2, 1500)
+    assert servos.idle()
+    print("✓ PASS")
+
+
+def test_redundant_writes_skipped():
+    """Repeated packets and slow steps don't rewrite an unchanged duty"""
+    print("\n[servo] Duty write cache")
+    servos = sim.servos()
+    servos.set_pwm(1, 1500)
+    assert _duty_writes(3) == [76]
+    machine.reset_trace()
+    for _ in range(50):
+        servos.set_pwm(1, 1500)   # Same SRV value at the packet rate
+    assert machine.counters['pwm_writes'] == 0
+
+    machine.reset_trace()
+    servos.set_angle(1, 0)
+    servos.set_angle_stepping(1, 20, 10)    # 0.229° per call, 1.76° per duty
+    calls = 0
+    while not servos.idle():
+        servos.timing_proc()
+        calls += 1
+    writes = _duty_writes(3)
+    assert writes == list(range(25, 37)), writes
+    print(f"✓ {calls} stepping calls, {len(writes)} duty writes")
+
+    servos.stop(1)
+    servos.stop(1)
+    assert _duty_writes(3)[-2:] == [36, 0]
+    print("✓ PASS")
+
+
+def test_public_api_unchanged():
+    """set_angle / set_pwm / set_angle_stepping keep their behaviour"""
+    print("\n[servo] Public API")
+    servos = sim.servos()
+    servos.set_angle(3, 90)
+    assert servos.servos_map[2].duty() == 76
+    servos.set_pwm(3, 2500)
+    assert servos.servos_map[2].duty() == 127
+    servos.set_angle_step(3, 100)
+    servos.set_angle_stepping(3, 0)
+    servos.timing_proc()
+    assert servos.servos_map[2].duty() < 127
+    servos.set_angle(5, 90)     # Invalid index is rejected, not raised
+    servos.set_pwm(0, 1500)
+
+    # Step speeds outside 0..180 are rejected before reaching the array
+    servos.set_angle_step(3, 180)
+    assert servos.vel[2] == 180
+    for bad in (-1, 181, 70000):
+        servos.set_angle_step(3, bad)
+        servos.set_angle_stepping(3, 45, bad)
+        assert servos.vel[2] == 180, bad
+    servos.set_angle_step(5, 50)
+    servos.set_angle_step(0, 50)
+    print("✓ PASS")
+
+
+if __name__ == '__main__':
+    test_stepping_bitmask()
+    test_redundant_writes_skipped()
+    test_public_api_unchanged()
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+Host Simulator Test Script
+Boots app/main.py on CPython through the sim package and drives it over
+loopback UDP and injected BLE writes
+"""
+
+import os
+import sys
+import socket
+import tempfile
+import asyncio
+
+import sim
+
+sim.install()
+from sim import machine, bluetooth, usocket
+
+
+def _boot_main(scenario, duration_s=1.0):
+    """Fresh device with BLE enabled, run app/main.py with a scenario"""
+    sim.reset()
+    import bbl.config
+    bbl.config.BLE_ENABLED = True
+    bbl.config.CONNECTION_MODE = 'BOTH'
+    with tempfile.TemporaryDirectory() as fs:
+        return sim.run('app/main.py', duration_s=duration_s, scenario=scenario,
+                       fs=fs, port_map={6188: 0})
+
+
+def _pin_edges(pin, since_us=0):
+    return [e for e in machine.trace if e[1] == 'pin' and e[2] == pin and e[0] >= since_us]
+
+
+def test_main_boots_and_serves_udp_and_ble():
+    """app/main.py runs unmodified; UDP and BLE frames reach the hardware"""
+    print("=" * 60)
+    print("Host Simulator Test")
+    print("=" * 60)
+    marks = {}
+
+    async def scenario():
+        await asyncio.sleep(0.1)
+        # UDP: SRV to servo 1 (GPIO 3)
+        host_addr = [actual for requested, actual in usocket.bound][0]
+        client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        client.sendto(b'SRV1800150015001500#', host_addr)
+        client.close()
+        await asyncio.sleep(0.1)
+
+        # BLE: two frames in one write, the SRT one drives the motors
+        marks['ble'] = machine.now_us()
+        ble = bluetooth.BLE()
+        ble.inject_connect()
+        ble.inject_write(b'SRV1500150015001500#SRT2000150000000000#')
+        await asyncio.sleep(0.3)
+        marks['end'] = machine.now_us()
+
+    scope = _boot_main(scenario)
+
+    print("\n[sim] UDP SRV -> servo PWM on GPIO 3")
+    duties = [e[3] for e in machine.trace if e[1] == 'pwm_duty' and e[2] == 3]
+    assert duties, "servo 1 never driven"
+    print(f"✓ duties {duties[:5]}")
+
+    print("\n[sim] BLE SRT -> motor software PWM on GPIO 4")
+    assert scope['ble_service'] is not None
+    assert scope['ble_service'].stats()['frames'] == 2
+    # Throttle 2000, steering 1500: both motors forward at half speed,
+    # a 50% carrier on GPIO 4 while GPIO 5 stays low
+    start = marks['ble'] + 40000  # Skip the period that applies the frame
+    edges = _pin_edges(4, start)
+    assert len(edges) >= 10
+    high = 0
+    for (t0, _, _, v), (t1, _, _, _) in zip(edges, edges[1:]):
+        if v:
+            high += t1 - t0
+    duty = high / (edges[-1][0] - edges[0][0])
+    assert abs(duty - 0.5) < 0.05, duty
+    assert not _pin_edges(5, start) and machine.level(5) == 0
+    print(f"✓ {len(edges)} edges on GPIO 4, duty {duty:.2f}, "
+          f"{machine.counters['timer_callbacks']} timer ticks")
+    print("✓ PASS")
+
+
+def test_short_datagrams():
+    """Empty and 1-byte datagrams are ignored, the server keeps running"""
+    print("\n[sim] Empty and 1-byte UDP datagrams")
+
+    async def scenario():
+        await asyncio.sleep(0.1)
+        host_addr = [actual for requested, actual in usocket.bound][0]
+        client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        client.sendto(b'', host_addr)
+        client.sendto(b'?', host_addr)
+        client.sendto(b'S', host_addr)
+        await asyncio.sleep(0.1)
+        client.sendto(b'SRV1800150015001500#', host_addr)
+        client.close()
+        await asyncio.sleep(0.1)
+
+    scope = _boot_main(scenario, duration_s=0.5)
+    duties = [e[3] for e in machine.trace if e[1] == 'pwm_duty' and e[2] == 3]
+    assert duties, "frame after the short datagrams not applied"
+    assert scope['mailbox'].stats()['invalid'] == 2
+    print("✓ PASS")
+
+
+def test_trace_records_transitions():
+    """Pins, PWM and bitstream writes are recorded with timestamps"""
+    print("\n[sim] Trace recording")
+    sim.reset()
+    pin = machine.Pin(9, machine.Pin.OUT)
+    pin.on()
+    pin.on()        # No change, no trace entry
+    pin.off()
+    pwm = machine.PWM(machine.Pin(10), freq=50, duty=77)
+    machine.bitstream(pin, 0, (400, 850, 800, 450), bytearray(b'\x01\x02\x03'))
+    kinds = [(k, p, v) for _, k, p, v in machine.trace]
+    assert kinds == [('pin', 9, 1), ('pin', 9, 0), ('pwm_freq', 10, 50),
+                     ('pwm_duty', 10, 77), ('bitstream', 9, b'\x01\x02\x03')]
+    assert machine.counters['pin_writes'] == 3
+    assert pwm.duty() == 77
+    times = [t for t, _, _, _ in machine.trace]
+    assert times == sorted(times)
+
+    # mem32 GPIO set/clear registers drive the same pins
+    machine.mem32[0x60004008] = 1 << 9
+    assert pin.value() == 1
+    machine.mem32[0x6000400C] = 1 << 9
+    assert pin.value() == 0
+    print("✓ PASS")
+
+
+def test_ticks_wrap():
+    """utime ticks wrap at 2^30 and ticks_diff handles the rollover"""
+    print("\n[sim] utime tick arithmetic")
+    utime = sim.utime
+    period = 1 << 30
+    assert utime.ticks_diff(5, period - 5) == 10
+    assert utime.ticks_diff(period - 5, 5) == -10
+    assert utime.ticks_add(period - 1, 2) == 1
+    assert 0 <= utime.ticks_ms() < period
+    print("✓ PASS")
+
+
+def test_firmware_files_stay_out_of_repo():
+    """The motor driver detection cache goes to the device fs, not the cwd"""
+    print("\n[sim] Firmware file writes")
+    sim.reset()
+    cached = os.path.join(sim.scratch_dir(), 'detected_driver.txt')
+    if os.path.exists(cached):
+        os.remove(cached)
+    from bbl import MotorsController
+    MotorsController()
+    assert os.path.exists(cached)
+    assert not os.path.exists(os.path.join(sim.ROOT, 'detected_driver.txt'))
+    assert not os.path.exists('detected_driver.txt')
+
+    sim.reset()
+    with tempfile.TemporaryDirectory() as fs:
+        sim.run('app/main.py', duration_s=0.2, fs=fs, port_map={6188: 0})
+        with open(os.path.join(fs, 'detected_driver.txt')) as f:
+            assert f.read() == 'L9110S'
+    print("✓ PASS")
+
+
+def test_reset_with_config():
+    """reset() overrides reach modules that bind config values at import"""
+    print("\n[sim] Config overrides")
+    sim.reset(MOTOR_DRIVER_TYPE='TB6612', SOFTWARE_PWM_USE_TIMER=False)
+    import bbl.config
+    import bbl.motors
+    import bbl.motor_drivers
+    from bbl import resources, servos
+    assert bbl.config.MOTOR_DRIVER_TYPE == 'TB6612'
+    assert bbl.motors.MOTOR_DRIVER_TYPE == 'TB6612'
+    assert bbl.motor_drivers.SOFTWARE_PWM_USE_TIMER is False
+    # One set of firmware modules, none left over from the default import
+    assert servos.resources is resources is sys.modules['bbl.resources']
+    motors = sim.motors('L9110S', hardware=True)
+    assert type(motors.driver).__name__ == 'L9110SHardware'
+    assert sim.servos(freq=50).tim_call_freq == 50
+
+    sim.reset()
+    import bbl.motors
+    assert bbl.motors.MOTOR_DRIVER_TYPE == 'AUTO'
+    print("✓ PASS")
+
+
+if __name__ == '__main__':
+    test_main_boots_and_serves_udp_and_ble()
+    test_short_datagrams()
+    test_trace_records_transitions()
+    test_ticks_wrap()
+    test_firmware_files_stay_out_of_repo()
+    test_reset_with_config()
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Servo Input Smoothing Test Script
+Replays a jittery, lossy 20 Hz SRV trace through app/main.py in the host
+simulator with and without INPUT_SMOOTHING and compares the servo output
+"""
+
+import os
+import math
+import random
+import tempfile
+
+import sim
+
+sim.install()
+from sim import traces
+from sim.vclock import VirtualClock
+
+START_MS = 500      # Boot time before the first frame
+SWEEP_MS = 2000     # Sine period of the recorded stick movement
+
+
+def _stick(t_ms):
+    """Servo 1 pulse the user was commanding at t_ms into the recording"""
+    return 1500 + int(500 * math.sin(2 * math.pi * t_ms / SWEEP_MS))
+
+
+def _recording(path, seconds=6):
+    """~20 Hz SRV frames with ±15 ms jitter and 10% packet loss"""
+    rng = random.Random(7)
+    frames = []
+    for k in range(seconds * 20):
+        if rng.random() < 0.1:
+            continue
+        t_ms = k * 50 + rng.randint(-15, 15) + 15
+        frames.append((t_ms, b'SRV%04d150015001500#' % _stick(t_ms)))
+    traces.save(path, frames, comment='synthetic 20 Hz sine sweep, 10% loss')
+    return traces.load(path)
+
+
+def _output(frames, smoothing):
+    """Servo 1 pulse every 5 ms while the trace plays"""
+    sim.reset()
+    import bbl.config
+    bbl.config.BLE_ENABLED = True
+    bbl.config.INPUT_SMOOTHING = smoothing
+    with tempfile.TemporaryDirectory() as fs:
+        sim.run('app/main.py', duration_s=(START_MS + frames[-1][0]) / 1000 + 0.5,
+                scenario=traces.replay(frames, 'ble', start_ms=START_MS),
+                fs=fs, port_map={6188: 0}, clock=VirtualClock())
+    t0 = (START_MS + 500) * 1000   # Skip the first ramp from the boot position
+    t1 = (START_MS + frames[-1][0]) * 1000
+    return traces.pulse_series(3, t0, t1, 5000)
+
+
+def _lag_and_error(series):
+    """Best-fit delay (ms) of the output behind the stick, and RMS error"""
+    best = None
+    for lag_ms in range(0, 600, 5):
+        err = 0
+        for i, us in enumerate(series):
+            t_ms = 500 + i * 5 - lag_ms
+            err += (us - _stick(t_ms)) ** 2
+        rms = math.sqrt(err / len(series))
+        if best is None or rms < best[1]:
+            best = (lag_ms, rms)
+    return best
+
+
+def test_smoothing_against_recorded_trace():
+    """Interpolation removes the stair steps with bounded lag"""
+    print("=" * 60)
+    print("Servo Input Smoothing Test")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        frames = _recording(os.path.join(tmp, 'srv_sweep.txt'))
+    print(f"\n[smooth] Replaying {len(frames)} frames over BLE")
+
+    results = {}
+    for name, mask in (('raw', 0), ('smoothed', 0b0001)):
+        series = _output(frames, mask)
+        # Largest change within one 20 ms servo frame
+        step = max(abs(b - a) for a, b in zip(series, series[4:]))
+        lag, rms = _lag_and_error(series)
+        results[name] = (step, lag, rms)
+        print(f"  {name:8s} max step {step:4d} us / 20 ms, lag {lag:3d} ms, "
+              f"rms error {rms:5.1f} us")
+
+    raw, smooth = results['raw'], results['smoothed']
+    # The raw run's delay is the simulator's boot/connect offset; the
+    # difference is what smoothing adds
+    added = smooth[1] - raw[1]
+    print(f"  smoothing adds {added} ms")
+    assert smooth[0] * 3 < raw[0] * 2, results
+    assert smooth[2] < raw[2], results
+    assert 0 <= added <= 100 + 20, results   # SMOOTH_MAX_LAG_MS + one tick
+    print("✓ PASS")
+
+
+def test_channel_mask_and_extrapolation():
+    """Unsmoothed channels pass through; extrapolation settles back"""
+    print("\n[smooth] Per-channel mask and extrapolation")
+    sim.reset()
+    clock = VirtualClock()
+    sim.use_clock(clock)
+    try:
+        from bbl.servos import ServosController
+        from bbl.smoothing import InputSmoother
+        servos = ServosController()
+        smoother = InputSmoother(servos, mask=0b0001, extrapolate_ms=40)
+
+        smoother.target(2, 2000)      # Not smoothed: immediate
+        assert servos.servos_map[1].duty() == 101 and smoother.idle()
+
+        smoother.target(1, 1000)
+        for value in (1100, 1200, 1300):
+            clock.advance(0.05)
+            smoother.target(1, value)
+            for _ in range(5):
+                clock.advance(0.01)
+                smoother.tick()
+        # Packets stop: keeps going past 1300 for a while, then settles
+        peak = 0
+        for _ in range(30):
+            clock.advance(0.01)
+            smoother.tick()
+            peak = max(peak, smoother.out[0])
+        assert 1300 < peak <= 1400, peak
+        assert smoother.out[0] == 1300 and smoother.idle()
+    finally:
+        sim.use_clock(None)
+    print(f"✓ overshoot to {peak} us, settled at 1300 us")
+    print("✓ PASS")
+
+
+if __name__ == '__main__':
+    test_smoothing_against_recorded_trace()
+    test_channel_mask_and_extrapolation()
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+V7RC Framer Test Script
+Feeds the parser test frames through the BLE stream framer, whole,
+concatenated and randomly fragmented
+"""
+
+import sys
+import random
+sys.path.insert(0, 'bbl')
+
+from v7rc_parser import V7RCParser, CMD_NONE, new_frame
+from v7rc_framer import V7RCFramer, FRAME_LEN
+from test_v7rc_parser import CORPUS
+
+PARSER = V7RCParser(log_func=lambda *args: None)
+PREFIXES = PARSER.registry.prefixes()
+
+# Frames the framer must deliver (full length, known prefix, '#' terminated)
+VALID = [f for f in CORPUS
+         if len(f) == FRAME_LEN and f[-1:] == b'#'
+         and PARSER.parse_into(f, new_frame()) != CMD_NONE]
+INVALID = [f for f in CORPUS if f not in VALID]
+
+
+def _framer():
+    out = []
+    framer = V7RCFramer(PREFIXES, lambda frame: out.append(bytes(frame)))
+    return framer, out
+
+
+def _fragment(rng, data):
+    # Split data into random chunks of 1..3 frames worth of bytes
+    chunks = []
+    i = 0
+    while i < len(data):
+        n = rng.randint(1, 3 * FRAME_LEN)
+        chunks.append(data[i:i + n])
+        i += n
+    return chunks
+
+
+def test_whole_frames():
+    """Aligned single-frame writes pass through unchanged"""
+    print("\n[framer] One frame per write")
+    framer, out = _framer()
+    for f in VALID:
+        framer.feed(f)
+    assert out == VALID
+    assert framer.dropped == 0
+    print(f"✓ {len(out)} frames")
+    print("✓ PASS")
+
+
+def test_concatenated():
+    """Several frames in one write (large MTU)"""
+    print("\n[framer] All frames in one write")
+    framer, out = _framer()
+    framer.feed(b''.join(VALID))
+    assert out == VALID
+    print("✓ PASS")
+
+
+def test_random_fragmentation():
+    """Random split points, frames straddle writes"""
+    print("\n[framer] Random fragmentation")
+    stream = b''.join(VALID * 4)
+    for seed in range(50):
+        rng = random.Random(seed)
+        framer, out = _framer()
+        for chunk in _fragment(rng, stream):
+            framer.feed(chunk)
+        assert out == VALID * 4, seed
+        assert framer.dropped == 0, seed
+    print("✓ 50 seeds")
+    print("✓ PASS")
+
+
+def test_resync_on_garbage():
+    """Invalid frames and noise are skipped, valid frames still arrive"""
+    print("\n[framer] Resynchronization")
+    for seed in range(50):
+        rng = random.Random(seed)
+        expected = []
+        stream = b''
+        for _ in range(30):
+            if rng.random() < 0.3:
+                stream += rng.choice(INVALID + [b'#', b'S', b'SR', b'LE2F'])
+            else:
+                f = rng.choice(VALID)
+                stream += f
+                expected.append(f)
+        framer, out = _framer()
+        for chunk in _fragment(rng, stream):
+            framer.feed(chunk)
+        assert out == expected, seed
+    print("✓ 50 seeds")
+
+    # A frame cut short by a lost fragment only costs that frame
+    framer, out = _framer()
+    framer.feed(b'SRV15001500')
+    framer.feed(VALID[0])
+    framer.feed(VALID[1][:7])
+    framer.feed(VALID[1][7:])
+    assert out == [VALID[0], VALID[1]]
+    assert framer.dropped == 11
+    print("✓ PASS")
+
+
+def test_parsed_frames_match():
+    """Frames from the framer decode exactly like the originals"""
+    print("\n[framer] Delivered frames parse like the originals")
+    got = []
+    expected = []
+    framer = V7RCFramer(PREFIXES, lambda frame: got.append(PARSER.parse(frame)))
+    rng = random.Random(1)
+    for chunk in _fragment(rng, b''.join(VALID)):
+        framer.feed(chunk)
+    for f in VALID:
+        expected.append(PARSER.parse(f))
+    assert got == expected
+    print("✓ PASS")
+
+
+def test_reset():
+    """reset() drops a partial frame (e.g. on disconnect)"""
+    print("\n[framer] reset()")
+    framer, out = _framer()
+    framer.feed(VALID[0][:10])
+    framer.reset()
+    framer.feed(VALID[0][10:])
+    framer.feed(VALID[1])
+    assert out == [VALID[1]]
+    print("✓ PASS")
+
+
+if __name__ == '__main__':
+    test_whole_frames()
+    test_concatenated()
+    test_random_fragmentation()
+    test_resync_on_garbage()
+    test_parsed_frames_match()
+    test_reset()
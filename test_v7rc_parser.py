@@ -7,7 +7,24 @@ Tests the V7RC parser with various command formats
 import sys
 sys.path.insert(0, 'bbl')
 
-from v7rc_parser import V7RCParser
+from v7rc_parser import V7RCParser, CommandRegistry, CMD_NONE, CMD_NAMES, new_frame, frame_to_dict
+from v7rc_parser import _decode_pwm4
+
+# Every frame exercised by test_parser(), valid and invalid
+CORPUS = [
+    b'SRV1500150015001500#',
+    b'SRV0500100015002000#',
+    b'SR21200130014001500#',
+    b'SS89696969696969696#',
+    b'SS800326496AAFF0000#',
+    b'SRT1800120000000000#',
+    b'LEDF00AF00AF00AF00A#',
+    b'LED0F050F050F050F05#',
+    b'LE200F0F00FF00FF00F#',
+    b'SRV1500#',
+    b'SRV1500150015001500!',
+    b'XXX1234567890123456#',
+]
 
 def test_parser():
     """Test V7RC parser with all command types"""
@@ -150,5 +167,111 @@ def test_parser():
     print("All tests passed! ✓")
     print("=" * 60)
 
+def _reference_parse(msg):
+    """Original string-based decoder, kept as the reference for parse_into"""
+    if not msg or len(msg) != 20 or not msg.endswith(b'#'):
+        return None
+    try:
+        cmd_type = msg[:3].decode('ascii')
+        data = msg[3:19].decode('ascii')
+        if cmd_type in ('SRV', 'SR2', 'SRT'):
+            pwm = [int(data[i*4:(i+1)*4]) for i in range(4)]
+            result = {'pwm': pwm}
+            if cmd_type == 'SRT':
+                result['throttle'] = pwm[0]
+                result['steering'] = pwm[1]
+        elif cmd_type == 'SS8':
+            result = {'pwm': [int(data[i*2:(i+1)*2], 16) * 10 for i in range(8)]}
+        elif cmd_type in ('LED', 'LE2'):
+            leds = []
+            for i in range(4):
+                rgbm = data[i*4:(i+1)*4]
+                m_hex = int(rgbm[3], 16)
+                if m_hex == 0:
+                    mode, blink_ms = 'off', 0
+                elif m_hex < 10:
+                    mode, blink_ms = 'blink', m_hex * 100
+                else:
+                    mode, blink_ms = 'solid', 0
+                leds.append({'r': int(rgbm[0], 16) * 17,
+                             'g': int(rgbm[1], 16) * 17,
+                             'b': int(rgbm[2], 16) * 17,
+                             'mode': mode,
+                             'blink_ms': blink_ms})
+            result = {'leds': leds}
+        else:
+            return None
+    except ValueError:
+        return None
+    return {'type': cmd_type, 'data': result}
+
+
+def test_parse_into_agrees_with_parse():
+    """parse_into must decode every corpus frame exactly like parse()"""
+    parser = V7RCParser(log_func=lambda *args: None)
+    frame = new_frame()
+
+    print("\n[parse_into] Agreement with parse() on the test corpus")
+    extra = [
+        b'SS8ff00Aa0b96969696#',                # Lowercase hex digits
+        b'LED0F0G0F050F050F05#',                # Invalid hex nibble
+        b'SRV15001500150O1500#',                # Letter O instead of zero
+        b'SRV9999000000000000#',                # Out of range, still decoded
+        memoryview(b'SRV1500150015001500#'),    # memoryview input
+    ]
+    for msg in CORPUS + extra:
+        expected = parser.parse(msg)
+        code = parser.parse_into(msg, frame)
+        if expected is None:
+            assert code == CMD_NONE, msg
+        else:
+            assert CMD_NAMES[code] == expected['type'], msg
+            assert frame_to_dict(CMD_NAMES[code], frame) == expected['data'], msg
+        assert expected == _reference_parse(bytes(msg)), msg
+        print(f"✓ {bytes(msg)} -> {CMD_NAMES[code]}")
+    print("✓ PASS")
+
+
+def test_command_registry():
+    """Custom commands are decoded and dispatched through the registry"""
+    print("\n[registry] register_command() and dispatch")
+    commands = CommandRegistry()
+    applied = []
+
+    def decode_xyz(buf, out, log):
+        out[0] = buf[3]
+        return True
+
+    code = commands.register_command(b'XYZ', decode_xyz, lambda f: applied.append(f[0]))
+    assert code == 1
+    parser = V7RCParser(log_func=lambda *args: None, commands=commands)
+    frame = new_frame()
+
+    assert parser.parse_into(b'XYZA000000000000000#', frame) == code
+    assert commands.dispatch(code, frame)
+    assert applied == [ord('A')]
+
+    # Built-in commands are not part of a fresh registry
+    assert parser.parse_into(b'SRV1500150015001500#', frame) == CMD_NONE
+
+    # parse() shapes the result by command name, not by code: XYZ has
+    # code 1 here, the code of SRV in the default registry
+    assert parser.parse(b'XYZA000000000000000#') == \
+        {'type': 'XYZ', 'data': {'values': [ord('A')] + [0] * 15}}
+    # A built-in name in another registry keeps its own shape
+    srt = commands.register_command(b'SRT', _decode_pwm4)
+    assert srt == 2
+    assert parser.parse(b'SRT1800120000000000#') == \
+        {'type': 'SRT', 'data': {'pwm': [1800, 1200, 0, 0],
+                                 'throttle': 1800, 'steering': 1200}}
+
+    # Re-registering keeps the code and replaces the handler
+    assert commands.register_command(b'XYZ', decode_xyz) == code
+    assert not commands.dispatch(code, frame)
+    print("✓ PASS")
+
+
 if __name__ == '__main__':
     test_parser()
+    test_parse_into_agrees_with_parse()
+    test_command_registry()
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Virtual Clock Test Script
+Runs app/main.py on simulated time: instant, bit-identical between runs,
+and across the 2^30 ticks_ms() rollover
+"""
+
+import time
+import tempfile
+
+import sim
+
+sim.install()
+from sim import machine, bluetooth, uasyncio
+from sim.vclock import VirtualClock, TICKS_PERIOD
+
+# Blinking red on all four LED1 pixels (mode 5 = 1 s blink period)
+LED_BLINK = b'LEDF005F005F005F005#'
+
+
+def _session(clock, duration_s, scenario, timer=True):
+    """Fresh device with BLE enabled, run app/main.py on `clock`"""
+    sim.reset()
+    import bbl.config
+    import bbl.motor_drivers
+    bbl.config.BLE_ENABLED = True
+    bbl.motor_drivers.SOFTWARE_PWM_USE_TIMER = timer
+    with tempfile.TemporaryDirectory() as fs:
+        sim.run('app/main.py', duration_s=duration_s, scenario=scenario,
+                fs=fs, port_map={6188: 0}, clock=clock)
+    return list(machine.trace)
+
+
+async def _drive():
+    """Scripted BLE session: blink LEDs, drive, steer, stop"""
+    ble = bluetooth.BLE()
+    await uasyncio.sleep_ms(500)
+    ble.inject_write(LED_BLINK)
+    for throttle, steering in ((1800, 1500), (1800, 1900), (1200, 1500), (1500, 1500)):
+        ble.inject_write(b'SRT%04d%04d00000000#' % (throttle, steering))
+        ble.inject_write(b'SRV%04d150015001500#' % steering)
+        await uasyncio.sleep(2)
+
+
+def test_deterministic():
+    """Two runs of the same scenario produce identical traces"""
+    print("=" * 60)
+    print("Virtual Clock Test")
+    print("=" * 60)
+    print("\n[vclock] 20 s session, twice")
+    t0 = time.monotonic()
+    first = _session(VirtualClock(), 20, _drive)
+    second = _session(VirtualClock(), 20, _drive)
+    wall = time.monotonic() - t0
+    assert first == second
+    kinds = {kind for _, kind, _, _ in first}
+    assert {'pin', 'pwm_duty', 'bitstream'} <= kinds, kinds
+    print(f"✓ {len(first)} identical trace entries, {wall:.1f} s wall for 40 s simulated")
+    print("✓ PASS")
+
+
+def test_faster_than_real_time():
+    """Ten simulated minutes of control loop run in a few seconds"""
+    print("\n[vclock] 10 minute session")
+    clock = VirtualClock()
+    t0 = time.monotonic()
+    _session(clock, 600, _drive, timer=False)
+    wall = time.monotonic() - t0
+    assert clock.elapsed_us() >= 600 * 1000000
+    assert wall < 60, wall
+    print(f"✓ 600 s simulated in {wall:.1f} s ({600 / wall:.0f}x)")
+    print("✓ PASS")
+
+
+def test_ticks_ms_wraparound():
+    """LED blinking keeps going when ticks_ms() rolls over"""
+    print("\n[vclock] ticks_ms() rollover during a session")
+    clock = VirtualClock.before_wrap(ms=3000)
+    wrap_us = TICKS_PERIOD * 1000
+
+    async def blink():
+        await uasyncio.sleep_ms(500)
+        bluetooth.BLE().inject_write(LED_BLINK)
+
+    trace = _session(clock, 8, blink, timer=False)
+    writes = [t for t, kind, pin, _ in trace if kind == 'bitstream' and pin == 21]
+    before = [t for t in writes if t < wrap_us]
+    after = [t for t in writes if t >= wrap_us]
+    assert clock.now_us() > wrap_us  # ticks_ms() wrapped during the run
+    assert len(before) >= 4 and len(after) >= 8, (len(before), len(after))
+    print(f"✓ {len(before)} LED writes before, {len(after)} after the wrap")
+    print("✓ PASS")
+
+
+def test_music_across_wraparound():
+    """Non-blocking RTTTL playback survives the ticks_ms() rollover"""
+    print("\n[vclock] MusicController across the rollover")
+    sim.reset()
+    clock = VirtualClock.before_wrap(ms=300)
+    sim.use_clock(clock)
+    try:
+        from bbl.buzzer import MusicController
+        music = MusicController('BUZZER1', volume=50)
+        music.play('Test:d=8,o=5,b=240:c,d,e,f,g,a,b,c6', block=False)
+        for _ in range(300):
+            music.timing_proc()
+            clock.sleep_us(10000)
+            if not music.is_playing:
+                break
+        assert not music.is_playing, music.tune_index
+    finally:
+        sim.use_clock(None)
+    freqs = [v for _, kind, pin, v in machine.trace if kind == 'pwm_freq' and pin == 21]
+    assert len(freqs) >= 7, freqs
+    print(f"✓ {len(freqs)} notes played across the wrap")
+    print("✓ PASS")
+
+
+if __name__ == '__main__':
+    test_deterministic()
+    test_faster_than_real_time()
+    test_ticks_ms_wraparound()
+    test_music_across_wraparound()